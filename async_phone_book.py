@@ -0,0 +1,158 @@
+# This file provides an asyncio interface to a PhoneBook, for services that run on an event loop.
+# Every operation runs on a small pool of threads, so that imports, exports and large searches do not stall the loop,
+# and large results can be read as async iterators that fetch a batch of contacts at a time.
+import asyncio
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial, wraps
+from phone_book import PhoneBook
+from sqlite_phone_book import SQLitePhoneBook
+from thread_safe_phone_book import ThreadSafePhoneBook
+
+DEFAULT_WORKERS = 4  # Operations run at once; the others wait on the event loop
+DEFAULT_BATCH_SIZE = 1000  # Contacts an async iterator reads from the phone book at a time
+
+
+def _offloaded(method):
+    # Async version of a PhoneBook method, which runs it on the pool
+    @wraps(method)
+    async def offloaded(self, *args, **kwargs):
+        return await self._run(getattr(self.phonebook, method.__name__), *args, **kwargs)
+    return offloaded
+
+
+def _batched(method):
+    # Async version of a PhoneBook iter_ method, which returns an async iterator of its results
+    @wraps(method)
+    def batched(self, *args, **kwargs):
+        return self._iterate(lambda: getattr(self.phonebook, method.__name__)(*args, **kwargs))
+    return batched
+
+
+class AsyncPhoneBook:
+    '''
+        Asyncio facade of a PhoneBook: every method is a coroutine version of the PhoneBook method of the same name,
+        with the same arguments and results, except the iter_ methods, which return async iterators.
+
+            async with AsyncPhoneBook() as phonebook:
+                await phonebook.bulk_import_contacts("contacts.csv")
+                async for contact in phonebook.iter_search_contact("Smith"):
+                    ...
+
+        Calls run on a pool of max_workers threads, never on the event loop; calls beyond that wait on the loop,
+        where they can be cancelled before they start. The phone book must be safe to call from several threads,
+        so by default it is a new ThreadSafePhoneBook; a plain PhoneBook is only accepted with max_workers=1,
+        and an SQLitePhoneBook not at all.
+        An async iterator finds the record ids of its results when it starts, then reads the contacts batch_size
+        at a time, only when the consumer reaches them, so a slow consumer never holds more than one batch.
+        Changes made meanwhile are seen by the batches read after them: deleted contacts are skipped,
+        and updated ones are read as they are then. Deleting all contacts, or saving over the snapshot the phone book
+        was loaded from, ends the iterators that started before.
+    '''
+    def __init__(self, phonebook=None, max_workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE):
+        if phonebook is None:
+            phonebook = ThreadSafePhoneBook()
+        elif isinstance(phonebook, SQLitePhoneBook):
+            # Its connection only works on the thread that opened it, and it keeps no record ids to iterate by
+            raise ValueError("An SQLitePhoneBook cannot be used from the pool's threads")
+        elif max_workers > 1 and not isinstance(phonebook, ThreadSafePhoneBook):
+            raise ValueError("A PhoneBook shared by several threads must be a ThreadSafePhoneBook")
+        self.phonebook = phonebook
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="AsyncPhoneBook")
+        self._slots = asyncio.Semaphore(max_workers)
+
+    async def _run(self, function, *args, **kwargs):
+        # Call the function on the pool, once a thread is free
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, partial(function, *args, **kwargs))
+
+    def _reading(self):
+        # Context holding the phone book's read lock, if it has one, while the pool reads its internals
+        lock = getattr(self.phonebook, 'lock', None)
+        return nullcontext() if lock is None else lock.reading()
+
+    def _find_ids(self, find_contacts):
+        # Record ids of the contacts find_contacts() yields, and the phone index they were found with.
+        # The index is replaced, e.g. by delete_all_contacts, exactly when record ids are given out again from 0.
+        phonebook = self.phonebook
+        with self._reading():
+            phones = phonebook._phones()
+            return array('q', (phones[contact.phone_number] for contact in find_contacts())), phones
+
+    def _read_batch(self, record_ids, phones):
+        # Contacts of the record ids that are still in the phone book, or None if its record ids were given out again
+        phonebook = self.phonebook
+        with self._reading():
+            if phonebook._phones() is not phones:
+                return None
+            records = phonebook._records
+            return [records[record_id] for record_id in record_ids if record_id in records]
+
+    async def _iterate(self, find_contacts):
+        record_ids, phones = await self._run(self._find_ids, find_contacts)
+        batch_size = self.batch_size
+        for start in range(0, len(record_ids), batch_size):
+            contacts = await self._run(self._read_batch, record_ids[start:start + batch_size], phones)
+            if contacts is None:
+                return
+            for contact in contacts:
+                yield contact
+
+    async def call(self, function, *args, **kwargs):
+        '''
+            Return function(phonebook, *args, **kwargs), run on the pool, e.g. to make several changes under one lock:
+
+                def add_if_missing(phonebook, *fields):
+                    with phonebook.lock.writing():
+                        ...
+
+                await async_phonebook.call(add_if_missing, "Ann", "Lee", "(222) 222-2222")
+        '''
+        return await self._run(function, self.phonebook, *args, **kwargs)
+
+    async def count(self):
+        '''
+            Return the number of contacts in the phone book.
+        '''
+        return await self._run(len, self.phonebook)
+
+    async def close(self):
+        '''
+            Wait for the running calls to finish and stop the pool's threads.
+        '''
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    add_contact = _offloaded(PhoneBook.add_contact)
+    get_by_phone = _offloaded(PhoneBook.get_by_phone)
+    import_contacts = _offloaded(PhoneBook.import_contacts)
+    bulk_import_contacts = _offloaded(PhoneBook.bulk_import_contacts)
+    search_contact = _offloaded(PhoneBook.search_contact)
+    search_contact_by_updated_time = _offloaded(PhoneBook.search_contact_by_updated_time)
+    search_contact_by_created_time = _offloaded(PhoneBook.search_contact_by_created_time)
+    update_contact = _offloaded(PhoneBook.update_contact)
+    delete_contact = _offloaded(PhoneBook.delete_contact)
+    delete_all_contacts = _offloaded(PhoneBook.delete_all_contacts)
+    list_contacts = _offloaded(PhoneBook.list_contacts)
+    sort_contacts = _offloaded(PhoneBook.sort_contacts)
+    group_contacts_by_initial_letter = _offloaded(PhoneBook.group_contacts_by_initial_letter)
+    count_contacts_by_initial_letter = _offloaded(PhoneBook.count_contacts_by_initial_letter)
+    get_contacts_by_initial_letter = _offloaded(PhoneBook.get_contacts_by_initial_letter)
+    group_contacts_by_area_code = _offloaded(PhoneBook.group_contacts_by_area_code)
+    count_contacts_by_area_code = _offloaded(PhoneBook.count_contacts_by_area_code)
+    get_contacts_by_area_code = _offloaded(PhoneBook.get_contacts_by_area_code)
+    export_contacts = _offloaded(PhoneBook.export_contacts)
+    save_snapshot = _offloaded(PhoneBook.save_snapshot)
+
+    iter_contacts = _batched(PhoneBook.iter_contacts)
+    iter_search_contact = _batched(PhoneBook.iter_search_contact)
+    iter_search_contact_by_updated_time = _batched(PhoneBook.iter_search_contact_by_updated_time)
+    iter_search_contact_by_created_time = _batched(PhoneBook.iter_search_contact_by_created_time)
+    iter_sorted_contacts = _batched(PhoneBook.iter_sorted_contacts)
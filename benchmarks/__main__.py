@@ -0,0 +1,80 @@
+# Benchmark every PhoneBook operation on synthetic phone books of one or more sizes, and report JSON.
+# Run with: python -m benchmarks [--sizes 10000 100000 ...] [--output results.json] [--baseline baseline.json]
+# Each size runs in a fresh process, so that its peak RSS is its own. With --baseline, every operation whose
+# throughput fell by more than --threshold against the saved results is reported and the exit status is 1.
+import argparse
+import json
+import platform
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from benchmarks.suite import OPERATIONS, run_size
+
+DEFAULT_THRESHOLD = 0.2  # Largest accepted drop in ops/sec against the baseline
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    '''
+        Compare result entries with those of a baseline report, matched by operation and size.
+        Return (operation, size, baseline ops/sec, ops/sec, change) for every entry in both, with change the relative
+        difference in ops/sec, and the list of those whose change is below -threshold.
+    '''
+    previous = {(entry['operation'], entry['size']): entry for entry in baseline['results']}
+    comparisons = []
+    regressions = []
+    for entry in results:
+        old = previous.get((entry['operation'], entry['size']))
+        if old is None or not old['ops_per_sec'] or entry['ops_per_sec'] is None:
+            continue
+        change = entry['ops_per_sec'] / old['ops_per_sec'] - 1
+        comparison = (entry['operation'], entry['size'], old['ops_per_sec'], entry['ops_per_sec'], change)
+        comparisons.append(comparison)
+        if change < -threshold:
+            regressions.append(comparison)
+    return comparisons, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the PhoneBook operations.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[10000], help="Numbers of contacts to benchmark, e.g. 10000 1000000.")
+    parser.add_argument("--operations", nargs='+', choices=OPERATIONS, help="Operations to run; all by default.")
+    parser.add_argument("--samples", type=int, default=200, help="Calls timed for each query, update and delete benchmark.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated contacts and queries.")
+    parser.add_argument("--output", help="File to write the JSON report to, instead of standard output.")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative drop in ops/sec that counts as a regression (default %(default)s).")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        print(f"Benchmarking {size} contacts...", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            results += executor.submit(run_size, size, args.seed, args.samples, args.operations).result()
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'samples': args.samples,
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            comparisons, regressions = compare(results, json.load(file), args.threshold)
+        for operation, size, old, new, change in comparisons:
+            flag = "  REGRESSION" if change < -args.threshold else ""
+            print(f"{operation:18} {size:>10} {old:>14.1f} -> {new:>14.1f} ops/s {change:+7.1%}{flag}", file=sys.stderr)
+        if regressions:
+            print(f"{len(regressions)} operations slower than the baseline by more than {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Measure the throughput of a ThreadSafePhoneBook shared by reader and writer threads, against the number of threads.
+# Run with: python -m benchmarks.concurrency [--contacts 50000] [--seconds 2] [--readers 1 2 4 8] [--writers 0 1 2]
+# Readers mix lookups and searches; writers add, update and delete contacts of their own. Every combination runs
+# for the same time on the same phone book, and its calls per second are reported with the speedup over one reader.
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from benchmarks.dataset import generate_rows, write_csv
+from thread_safe_phone_book import ThreadSafePhoneBook
+
+SEARCH_KEYWORDS = ["jo", "an", "Smith", "Kowalski12", "qz"]
+
+
+def run(phonebook, phone_numbers, readers, writers, seconds):
+    '''
+        Run readers and writers threads on phonebook for seconds, and return (reads, writes) completed.
+    '''
+    stop = threading.Event()
+    counts = [0] * (readers + writers)
+
+    def reader(slot):
+        rng = random.Random(slot)
+        calls = 0
+        while not stop.is_set():
+            if calls % 4:
+                phonebook.get_by_phone(rng.choice(phone_numbers))
+            else:
+                phonebook.search_contact(rng.choice(SEARCH_KEYWORDS), limit=20)
+            calls += 1
+        counts[slot] = calls
+
+    def writer(slot):
+        calls = 0
+        while not stop.is_set():
+            contact = phonebook.add_contact("Writer", f"Thread{slot}", "(999) %03d-%04d" % (slot, calls % 10000))
+            phonebook.update_contact(contact, last_name=f"Updated{slot}")
+            phonebook.delete_contact(contact)
+            calls += 3
+        counts[slot] = calls
+
+    threads = [threading.Thread(target=reader, args=(slot,)) for slot in range(readers)]
+    threads += [threading.Thread(target=writer, args=(slot,)) for slot in range(readers, readers + writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts[:readers]), sum(counts[readers:])
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.concurrency", description="Measure ThreadSafePhoneBook throughput against threads.")
+    parser.add_argument("--contacts", type=int, default=50000, help="Contacts in the phone book.")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Time each combination of threads runs for.")
+    parser.add_argument("--readers", type=int, nargs='+', default=[1, 2, 4, 8], help="Numbers of reader threads.")
+    parser.add_argument("--writers", type=int, nargs='+', default=[0, 1, 2], help="Numbers of writer threads.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "contacts.csv")
+        write_csv(csv_path, generate_rows(args.contacts))
+        phonebook = ThreadSafePhoneBook()
+        phonebook.bulk_import_contacts(csv_path)
+    phone_numbers = [contact.phone_number for contact in phonebook.iter_contacts()]
+    phonebook.search_contact("jo")  # Build the search indexes before timing
+
+    print(f"{args.contacts} contacts, {os.cpu_count()} CPUs, {args.seconds:g}s per run")
+    print(f"{'readers':>8} {'writers':>8} {'reads/s':>12} {'writes/s':>12} {'speedup':>8}")
+    single = None
+    for writers in args.writers:
+        for readers in args.readers:
+            reads, writes = run(phonebook, phone_numbers, readers, writers, args.seconds)
+            reads_per_second = reads / args.seconds
+            if single is None:
+                single = reads_per_second
+            print(f"{readers:>8} {writers:>8} {reads_per_second:>12.0f} {writes / args.seconds:>12.0f} {reads_per_second / single:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
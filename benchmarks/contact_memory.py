@@ -0,0 +1,108 @@
+# Measure the memory used per stored contact by the different PhoneBook storage options,
+# first for the contacts alone, then for a whole PhoneBook with its indexes built.
+# Run with: python -m benchmarks.contact_memory [number of contacts]
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from contact import Contact
+from contact_store import ContactStore
+from phone_book import PhoneBook
+
+FIRST_NAMES = ["John", "Jane", "Lily", "Emily", "Ming", "Li", "Johnson", "Tom", "Anna", "Chen"]
+LAST_NAMES = ["Smith", "Doe", "Ying", "Chen", "Brown", "Wilson", "Taylor", "Martin"]
+
+
+class DictContact:
+    # Same attributes as Contact, but with a per-instance __dict__ like Contact had before __slots__
+    def __init__(self, first_name, last_name, phone_number, email, address, created_at, updated_at):
+        self.first_name = first_name
+        self.last_name = last_name
+        self.phone_number = phone_number
+        self.email = email
+        self.address = address
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+
+def make_rows(count):
+    # Rows are built from fresh strings, the way csv.DictReader hands them to PhoneBook
+    now = int(time.time())
+    for i in range(count):
+        yield (
+            "".join(FIRST_NAMES[i % len(FIRST_NAMES)]),
+            "".join(LAST_NAMES[i % len(LAST_NAMES)]),
+            "(%03d) %03d-%04d" % (i // 10000000, i // 10000 % 1000, i % 10000),
+            f"user{i}@example.com",
+            f"{i % 1000} Main St",
+            now,
+            now,
+        )
+
+
+def fill_dict(contact_class, count):
+    records = {}
+    for record_id, row in enumerate(make_rows(count)):
+        records[record_id] = contact_class(*row)
+    return records
+
+
+def fill_store(count):
+    store = ContactStore()
+    for record_id, row in enumerate(make_rows(count)):
+        store[record_id] = Contact.from_record(*row)
+    return store
+
+
+def measure(build, count):
+    # Return the bytes still allocated per contact once the container is built
+    tracemalloc.start()
+    container = build(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    return current / count
+
+
+def measure_phonebook(build, count, search_index=True):
+    # Return the bytes per contact of the stored contacts, then of each index as its first use builds it, and the total
+    tracemalloc.start()
+    phonebook = PhoneBook(build(count), search_index)
+    sizes = {'contacts': tracemalloc.get_traced_memory()[0]}
+    steps = [
+        ('phone index', lambda: phonebook.get_by_phone("(000) 000-0000")),
+        ('search index', lambda: phonebook.search_contact("Smith")),
+        ('time indexes', lambda: (phonebook.search_contact_by_created_time(datetime(2000, 1, 1), datetime(2000, 1, 2)),
+                                  phonebook.search_contact_by_updated_time(datetime(2000, 1, 1), datetime(2000, 1, 2)))),
+        ('sort view', lambda: phonebook.sort_contacts('last_name', limit=1)),
+    ]
+    for name, use in steps:
+        before = tracemalloc.get_traced_memory()[0]
+        use()
+        sizes[name] = tracemalloc.get_traced_memory()[0] - before
+    sizes['total'] = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del phonebook
+    return {name: size / count for name, size in sizes.items()}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"Bytes per contact for {count} contacts:")
+    print(f"  dict of Contact with __dict__ : {measure(lambda n: fill_dict(DictContact, n), count):8.1f}")
+    print(f"  dict of Contact with __slots__: {measure(lambda n: fill_dict(Contact.from_record, n), count):8.1f}")
+    print(f"  ContactStore columns          : {measure(fill_store, count):8.1f}")
+    print(f"Bytes per contact of a whole PhoneBook, each index built by its first use:")
+    books = [
+        ("dict of Contact", measure_phonebook(lambda n: fill_dict(Contact.from_record, n), count)),
+        ("ContactStore", measure_phonebook(fill_store, count)),
+        ("ContactStore, search_index=False", measure_phonebook(fill_store, count, search_index=False)),
+    ]
+    names = list(books[0][1])
+    print(f"  {'':33}" + "".join(f"{name:>14}" for name in names))
+    for label, sizes in books:
+        print(f"  {label:33}" + "".join(f"{sizes[name]:14.1f}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
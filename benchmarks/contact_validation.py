@@ -0,0 +1,59 @@
+# Measure the per-contact cost of constructing and validating contacts.
+# Run with: python -m benchmarks.contact_validation [number of rows]
+import re
+import sys
+import time
+from datetime import datetime
+from contact import Contact
+from validation import validate_many
+
+
+class LegacyContact:
+    # Contact as it was before the validation module: string patterns passed to re.match and two clock readings
+    __slots__ = ('first_name', 'last_name', 'phone_number', 'email', 'address', 'created_at', 'updated_at')
+
+    def __init__(self, first_name, last_name, phone_number, email=None, address=None):
+        if not first_name:
+            raise ValueError("First name is required.")
+        if not last_name:
+            raise ValueError("Last name is required.")
+        if not phone_number:
+            raise ValueError("Phone number is required.")
+        if email and not re.match(r"[^@]+@[^@]+\.[^@]+", email):
+            raise ValueError("Invalid email address")
+        if not re.match(r"\(\d{3}\) \d{3}-\d{4}", phone_number):
+            raise ValueError("Phone number must be in the format (###) ###-####")
+        self.first_name = first_name
+        self.last_name = last_name
+        self.phone_number = phone_number
+        self.email = email
+        self.address = address
+        self.created_at = datetime.now().replace(microsecond=0)
+        self.updated_at = datetime.now().replace(microsecond=0)
+
+
+def make_rows(count):
+    return [(f"First{i}", f"Last{i}", "(%03d) %03d-%04d" % (i // 10000000, i // 10000 % 1000, i % 10000),
+             f"user{i}@example.com", f"{i % 1000} Main St") for i in range(count)]
+
+
+def construct(contact_class, rows):
+    for row in rows:
+        contact_class(*row)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rows = make_rows(count)
+    print(f"{count} rows:")
+    for name, action in [("legacy Contact()", lambda: construct(LegacyContact, rows)),
+                         ("Contact()", lambda: construct(Contact, rows)),
+                         ("validate_many only", lambda: validate_many(rows))]:
+        start = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - start
+        print(f"  {name:20}: {elapsed:6.2f}s, {elapsed / count * 1e9:5.0f} ns per row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# Synthetic contact datasets for the benchmarks. The same seed always gives the same contacts.
+import csv
+import random
+from bisect import bisect_right
+from itertools import accumulate
+
+FIRST_NAMES = ["John", "Jane", "Lily", "Emily", "Ming", "Li", "Johnson", "Tom", "Anna", "Chen", "Olivia", "Noah",
+               "Sofia", "Mateo", "Amara", "Kenji", "Fatima", "Lucas", "Ingrid", "Ravi"]
+LAST_NAMES = ["Smith", "Doe", "Ying", "Chen", "Brown", "Wilson", "Taylor", "Martin", "Garcia", "Nguyen", "Okafor",
+              "Kowalski", "Haddad", "Silva", "Tanaka", "Jensen"]
+START_TIMESTAMP = 1577836800  # 2020-01-01 UTC, the earliest creation time
+TIME_SPAN = 5 * 365 * 86400  # Creation times are spread over five years
+CSV_COLUMNS = ['first_name', 'last_name', 'phone_number', 'email', 'address']
+AREA_CODES = 300  # Distinct area codes, from 200 up
+AREA_CODE_SKEW = 1.2  # Zipf exponent of how unevenly the area codes are used, as in real phone books
+LOCAL_NUMBERS = 10 ** 7  # Local 7-digit numbers; phone numbers are unique for up to this many contacts
+SCRAMBLE = 7919 * 13  # Coprime with LOCAL_NUMBERS, so index -> local number is a bijection that looks random
+# Cumulative Zipf weights of the area codes, the most used first
+AREA_CODE_WEIGHTS = list(accumulate(1 / rank ** AREA_CODE_SKEW for rank in range(1, AREA_CODES + 1)))
+SPREAD = 0x9E3779B97F4A7C15  # 2**64 / golden ratio: i * SPREAD mod 2**64 spreads consecutive i evenly over [0, 2**64)
+
+
+def area_code(i):
+    # Area code of contact i, drawn from the Zipf weights by a fixed function of i, so that it needs no random state
+    position = (i * SPREAD) % 2 ** 64 / 2 ** 64 * AREA_CODE_WEIGHTS[-1]
+    return 200 + min(bisect_right(AREA_CODE_WEIGHTS, position), AREA_CODES - 1)
+
+
+def phone_number(i):
+    # Distinct for every i below LOCAL_NUMBERS, whatever the area code, since the local number alone is
+    local = i * SCRAMBLE % LOCAL_NUMBERS
+    return "(%03d) %03d-%04d" % (area_code(i), local // 10000, local % 10000)
+
+
+def generate_rows(count, seed=0):
+    '''
+        Yield count contacts as (first name, last name, phone number, email, address, created_at, updated_at),
+        with the timestamps in epoch seconds, as taken by Contact.from_record.
+        Names are drawn from small lists with a numeric suffix on the last name, so that short keywords match
+        many contacts and full names few. About one contact in ten has no email.
+    '''
+    rng = random.Random(seed)
+    for i in range(count):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = f"{rng.choice(LAST_NAMES)}{rng.randrange(1000)}"
+        email = None if rng.random() < 0.1 else f"{first_name.lower()}.{i}@example.com"
+        created_at = START_TIMESTAMP + rng.randrange(TIME_SPAN)
+        updated_at = created_at + rng.randrange(86400 * 30)
+        yield (first_name, last_name, phone_number(i), email, f"{rng.randrange(1, 10000)} Main St", created_at, updated_at)
+
+
+def write_csv(path, rows):
+    '''
+        Write rows from generate_rows to a CSV file in the import format, without the timestamps.
+    '''
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_COLUMNS)
+        writer.writerows(row[:5] for row in rows)
@@ -0,0 +1,276 @@
+# Generate large CSV files of synthetic contacts in the data.csv format, for load and scale testing of the imports,
+# and optionally a trace of phone book operations on those contacts for replay benchmarks.
+# Run with: python -m benchmarks.generate contacts.csv --rows 1000000 [--trace trace.jsonl] [options, see --help]
+#
+# Rows are built a chunk at a time as NumPy byte-string columns and written as one block per chunk, and numbers are
+# turned into digits through lookup tables, so there is no Python loop per row. The same seed and options always
+# give the same files. Generated values are ASCII and never contain commas, quotes or line breaks, so rows are
+# written without CSV quoting.
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from benchmarks.dataset import AREA_CODE_SKEW, AREA_CODES, LOCAL_NUMBERS, SCRAMBLE
+
+HEADER = b"first_name,last_name,phone_number,email,address\n"
+FIRST_NAMES = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William", "Elizabeth",
+               "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+               "Wei", "Fatima", "Mohammed", "Aisha", "Hiroshi", "Yuki", "Carlos", "Sofia", "Ivan", "Olga",
+               "Lily", "Emily", "Ming", "Li", "Johnson", "Chen", "Priya", "Arjun", "Kwame", "Amara"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+              "Lee", "Wang", "Zhang", "Liu", "Chen", "Ying", "Doe", "Nguyen", "Kim", "Patel",
+              "Singh", "Tanaka", "Sato", "Ivanov", "Okafor", "Mensah", "Silva", "Santos", "Dubois", "Muller"]
+STREETS = ["Main", "Oak", "Maple", "Cedar", "Elm", "Pine", "King", "Queen", "Prince", "Laurier", "Edward", "Bank",
+           "Elgin", "Rideau", "Park", "Lake", "Hill", "Church", "Mill", "Victoria"]
+STREET_TYPES = ["St", "Ave", "Rd", "Blvd", "Dr", "Way"]
+DOMAINS = ["example.com", "mail.example.org", "example.net", "company.example"]
+CHUNK_SIZE = 100000
+# Share of each kind of operation in a trace
+TRACE_MIX = {'search_contact': 0.5, 'get_by_phone': 0.2, 'add_contact': 0.1, 'update_contact': 0.1, 'delete_contact': 0.1}
+
+
+def zipf_probabilities(count, skew):
+    '''
+        Return the probabilities of ranks 1 to count under a Zipf distribution with the given exponent; 0 is uniform.
+    '''
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    return weights / weights.sum()
+
+
+# Byte strings of the numbers 0-9999: zero-padded to 3 and 4 digits, and unpadded
+DIGITS_3 = np.array([b"%03d" % i for i in range(1000)])
+DIGITS_4 = np.array([b"%04d" % i for i in range(10000)])
+NUMBERS = np.array([b"%d" % i for i in range(10000)])
+
+
+def _join(*columns):
+    # Element-wise concatenation of byte-string arrays and plain byte strings
+    result = columns[0]
+    for column in columns[1:]:
+        result = np.char.add(result, column)
+    return result
+
+
+def local_numbers(indexes):
+    # Distinct 7-digit local numbers for distinct row indexes below LOCAL_NUMBERS
+    return (indexes * SCRAMBLE) % LOCAL_NUMBERS
+
+
+def phone_numbers(area_codes, indexes):
+    '''
+        Return the phone numbers, in the format (###) ###-####, of the rows with the given indexes and area codes,
+        as an array of byte strings.
+    '''
+    local = local_numbers(indexes)
+    return _join(b"(", DIGITS_3[area_codes], b") ", DIGITS_3[local // 10000], b"-", DIGITS_4[local % 10000])
+
+
+def phone_number(area_code, index):
+    '''
+        Return the phone number of one row as a str.
+    '''
+    return phone_numbers(np.array([area_code]), np.array([index]))[0].decode()
+
+
+class ContactGenerator:
+    '''
+        Seeded generator of synthetic contacts with controllable distributions:
+        - name_skew and area_code_skew are Zipf exponents for how unevenly names and area codes are used (0 is uniform)
+        - invalid_phone_rate and invalid_email_rate are the shares of rows with a malformed phone number or email
+        - missing_email_rate and missing_address_rate are the shares of rows without those optional fields
+        After generating rows, area_codes and valid hold the area code and the validity of every row generated,
+        which trace() uses to refer to contacts that an import accepts.
+    '''
+    def __init__(self, seed=0, name_skew=1.0, area_code_skew=AREA_CODE_SKEW, invalid_phone_rate=0.0, invalid_email_rate=0.0,
+                 missing_email_rate=0.1, missing_address_rate=0.05):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.first_names = np.array(FIRST_NAMES, dtype=bytes)
+        self.last_names = np.array(LAST_NAMES, dtype=bytes)
+        self.streets = np.array(STREETS, dtype=bytes)
+        self.street_types = np.array(STREET_TYPES, dtype=bytes)
+        self.domains = np.array(DOMAINS, dtype=bytes)
+        self._lower_first = np.char.lower(self.first_names)
+        self._lower_last = np.char.lower(self.last_names)
+        self.first_name_probabilities = zipf_probabilities(len(FIRST_NAMES), name_skew)
+        self.last_name_probabilities = zipf_probabilities(len(LAST_NAMES), name_skew)
+        self.area_code_probabilities = zipf_probabilities(AREA_CODES, area_code_skew)
+        self.invalid_phone_rate = invalid_phone_rate
+        self.invalid_email_rate = invalid_email_rate
+        self.missing_email_rate = missing_email_rate
+        self.missing_address_rate = missing_address_rate
+        self.rows = 0
+        self._area_codes = []  # One array per generated chunk
+        self._valid = []
+
+    @property
+    def area_codes(self):
+        return np.concatenate(self._area_codes) if self._area_codes else np.empty(0, dtype=np.int64)
+
+    @property
+    def valid(self):
+        return np.concatenate(self._valid) if self._valid else np.empty(0, dtype=bool)
+
+    def chunk(self, size):
+        '''
+            Generate the next size rows and return them as one block of UTF-8 CSV text, without the header.
+        '''
+        rng = self.rng
+        indexes = np.arange(self.rows, self.rows + size)
+        first_choice = rng.choice(len(FIRST_NAMES), size, p=self.first_name_probabilities)
+        last_choice = rng.choice(len(LAST_NAMES), size, p=self.last_name_probabilities)
+        first = self.first_names[first_choice]
+        last = self.last_names[last_choice]
+        area_codes = 200 + rng.choice(AREA_CODES, size, p=self.area_code_probabilities)
+        local = local_numbers(indexes)
+        exchange = DIGITS_3[local // 10000]
+        line = DIGITS_4[local % 10000]
+        invalid_phone = rng.random(size) < self.invalid_phone_rate
+        # Without the opening parenthesis, e.g. 212) 555-0100, the phone format rejects the number
+        phones = _join(np.where(invalid_phone, b"", b"("), DIGITS_3[area_codes], b") ", exchange, b"-", line)
+
+        # The local number makes every email address distinct
+        invalid_email = rng.random(size) < self.invalid_email_rate
+        missing_email = rng.random(size) < self.missing_email_rate
+        emails = _join(self._lower_first[first_choice], b".", self._lower_last[last_choice], exchange, line,
+                       np.where(invalid_email, b"_at_", b"@"), self.domains[rng.integers(0, len(DOMAINS), size)])
+        emails = np.where(missing_email, b"", emails)
+
+        addresses = _join(NUMBERS[rng.integers(1, 10000, size)], b" ", self.streets[rng.integers(0, len(STREETS), size)],
+                          b" ", self.street_types[rng.integers(0, len(STREET_TYPES), size)])
+        addresses = np.where(rng.random(size) < self.missing_address_rate, b"", addresses)
+
+        self.rows += size
+        self._area_codes.append(area_codes)
+        # A missing email is valid; a present malformed one is not
+        self._valid.append(~invalid_phone & ~(invalid_email & ~missing_email))
+        return b"".join(_join(first, b",", last, b",", phones, b",", emails, b",", addresses, b"\n").tolist())
+
+    def write_csv(self, path, rows, chunk_size=CHUNK_SIZE):
+        '''
+            Write rows contacts to a CSV file with the data.csv header, a chunk at a time.
+        '''
+        with open(path, 'wb') as file:
+            file.write(HEADER)
+            for start in range(0, rows, chunk_size):
+                file.write(self.chunk(min(chunk_size, rows - start)))
+
+    def trace(self, operations, mix=None):
+        '''
+            Yield operations on the generated contacts as dicts, each with the PhoneBook method name as 'op'
+            and its arguments, for replay against a phone book the CSV was imported into:
+            - search_contact: keyword, a name prefix, a phone number fragment or a word that matches nothing
+            - get_by_phone: phone_number of an imported contact
+            - add_contact: first_name, last_name, phone_number, email and address of a new, valid contact
+            - update_contact: phone of the contact to update, and its new address
+            - delete_contact: phone of the contact to delete
+            Updates, lookups and deletes only refer to rows an import accepts, and never to a contact deleted earlier.
+            mix maps operation names to their share, TRACE_MIX by default.
+        '''
+        mix = TRACE_MIX if mix is None else mix
+        rng = np.random.default_rng([self.seed, 1])
+        names = list(mix)
+        probabilities = np.array([mix[name] for name in names], dtype=float)
+        kinds = rng.choice(len(names), operations, p=probabilities / probabilities.sum())
+        valid_indexes = np.flatnonzero(self.valid)
+        if not len(valid_indexes):
+            raise ValueError("No valid contacts to refer to; generate rows first")
+        area_codes = self.area_codes
+        # Deletes take contacts off the end of a shuffled list; lookups and updates pick from the contacts never deleted
+        rng.shuffle(valid_indexes)
+        deletes = min(int(np.count_nonzero(kinds == names.index('delete_contact'))) if 'delete_contact' in names else 0,
+                      len(valid_indexes) - 1)
+        kept = valid_indexes[:len(valid_indexes) - deletes]
+        deleted = iter(valid_indexes[len(valid_indexes) - deletes:].tolist())
+        targets = kept[rng.integers(0, len(kept), operations)]
+        phones = [phone.decode() for phone in phone_numbers(area_codes[targets], targets).tolist()]
+        next_index = self.rows  # New contacts continue the row numbering, so their phone numbers are new too
+        for number, kind in enumerate(kinds.tolist()):
+            op = names[kind]
+            if op == 'search_contact':
+                choice = rng.random()
+                if choice < 0.6:
+                    name = FIRST_NAMES[rng.integers(len(FIRST_NAMES))] if choice < 0.3 else LAST_NAMES[rng.integers(len(LAST_NAMES))]
+                    keyword = name[:int(rng.integers(3, len(name) + 1))] if len(name) > 3 else name
+                elif choice < 0.8:
+                    keyword = phones[number][6:9]
+                else:
+                    keyword = "zq" + str(int(rng.integers(1000)))
+                yield {'op': op, 'keyword': keyword}
+            elif op == 'get_by_phone':
+                yield {'op': op, 'phone_number': phones[number]}
+            elif op == 'update_contact':
+                yield {'op': op, 'phone': phones[number], 'address': f"{int(rng.integers(1, 10000))} Updated St"}
+            elif op == 'delete_contact':
+                index = next(deleted, None)
+                if index is None:
+                    continue
+                yield {'op': op, 'phone': phone_number(area_codes[index], index)}
+            elif op == 'add_contact':
+                first_name = FIRST_NAMES[rng.integers(len(FIRST_NAMES))]
+                last_name = LAST_NAMES[rng.integers(len(LAST_NAMES))]
+                phone = phone_number(200 + int(rng.integers(AREA_CODES)), next_index)
+                next_index += 1
+                yield {'op': op, 'first_name': first_name, 'last_name': last_name, 'phone_number': phone,
+                       'email': f"{first_name.lower()}.{last_name.lower()}{next_index}@example.com", 'address': None}
+            else:
+                raise ValueError(f"Unknown trace operation {op}")
+
+    def write_trace(self, path, operations, mix=None):
+        '''
+            Write trace(operations, mix) to a file as JSON lines. Return the number of operations written.
+        '''
+        written = 0
+        with open(path, 'w', encoding='utf-8') as file:
+            for operation in self.trace(operations, mix):
+                file.write(json.dumps(operation, separators=(',', ':')) + "\n")
+                written += 1
+        return written
+
+
+def parse_mix(text):
+    # "search_contact=0.5,add_contact=0.5" -> {'search_contact': 0.5, 'add_contact': 0.5}
+    mix = {}
+    for part in text.split(","):
+        name, _, share = part.partition("=")
+        if name not in TRACE_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name}; choose from {', '.join(TRACE_MIX)}")
+        mix[name] = float(share)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.generate", description="Generate synthetic contacts as CSV.")
+    parser.add_argument("output", help="CSV file to write.")
+    parser.add_argument("--rows", type=int, default=1000000, help="Number of contacts (default %(default)s).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed; the same seed and options give the same files.")
+    parser.add_argument("--name-skew", type=float, default=1.0, help="Zipf exponent of name frequencies, 0 for uniform.")
+    parser.add_argument("--area-code-skew", type=float, default=AREA_CODE_SKEW, help="Zipf exponent of area code frequencies, 0 for uniform.")
+    parser.add_argument("--invalid-phone-rate", type=float, default=0.0, help="Share of rows with a malformed phone number.")
+    parser.add_argument("--invalid-email-rate", type=float, default=0.0, help="Share of rows with a malformed email.")
+    parser.add_argument("--missing-email-rate", type=float, default=0.1, help="Share of rows without an email.")
+    parser.add_argument("--missing-address-rate", type=float, default=0.05, help="Share of rows without an address.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows generated and written at a time.")
+    parser.add_argument("--trace", help="Also write a JSON lines trace of operations on the contacts to this file.")
+    parser.add_argument("--trace-ops", type=int, default=100000, help="Number of operations in the trace.")
+    parser.add_argument("--trace-mix", type=parse_mix, help="Shares of the trace operations, e.g. search_contact=0.8,add_contact=0.2.")
+    args = parser.parse_args()
+    if args.rows > LOCAL_NUMBERS:
+        print(f"Warning: phone numbers are only unique for up to {LOCAL_NUMBERS} rows", file=sys.stderr)
+
+    generator = ContactGenerator(args.seed, args.name_skew, args.area_code_skew, args.invalid_phone_rate,
+                                 args.invalid_email_rate, args.missing_email_rate, args.missing_address_rate)
+    start = time.perf_counter()
+    generator.write_csv(args.output, args.rows, args.chunk_size)
+    seconds = time.perf_counter() - start
+    print(f"Wrote {args.rows} contacts to {args.output} in {seconds:.2f} s ({args.rows / seconds:.0f} rows/s), "
+          f"{int(np.count_nonzero(generator.valid))} valid")
+    if args.trace:
+        written = generator.write_trace(args.trace, args.trace_ops, args.trace_mix)
+        print(f"Wrote {written} operations to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
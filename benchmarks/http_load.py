@@ -0,0 +1,131 @@
+# Load generator for phone_book_server: measure its requests per second and latencies over keep-alive connections.
+# Run with: python -m benchmarks.http_load [--contacts 50000] [--connections 8] [--pipeline 1 8] [--seconds 5]
+# Starts a server in another process on a generated phone book, unless --port names one that is already running.
+# Each connection sends --pipeline requests before reading their responses, then one more for every response,
+# with a mix of lookups by phone number and searches limited to 20 results.
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+from benchmarks.dataset import generate_rows, phone_number, write_csv
+from benchmarks.suite import percentile
+
+SEARCH_KEYWORDS = ["jo", "an", "Smith", "Kowalski12", "qz"]
+SEARCH_SHARE = 0.2  # Share of requests that are searches; the others are lookups
+
+
+async def read_response(reader):
+    # Read one response, with a Content-Length or chunked body; return its status
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding':
+            chunked = 'chunked' in value
+    if not chunked:
+        await reader.readexactly(length)
+        return status
+    while True:
+        size = int(await reader.readline(), 16)
+        await reader.readexactly(size + 2)
+        if size == 0:
+            return status
+
+
+def request_paths(contacts, seed):
+    # Endless request paths of the benchmark mix
+    rng = random.Random(seed)
+    while True:
+        if rng.random() < SEARCH_SHARE:
+            yield f"/search?q={quote(rng.choice(SEARCH_KEYWORDS))}&limit=20"
+        else:
+            yield "/contacts/" + quote(phone_number(rng.randrange(contacts)))
+
+
+async def run_connection(host, port, paths, pipeline, deadline, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = []  # Send times of the requests awaiting a response, oldest first
+
+    def send():
+        writer.write(f"GET {next(paths)} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+        sent.append(time.perf_counter())
+
+    for _ in range(pipeline):
+        send()
+    while sent:
+        await writer.drain()
+        status = await read_response(reader)
+        latencies.append(time.perf_counter() - sent.pop(0))
+        statuses[status] = statuses.get(status, 0) + 1
+        if time.perf_counter() < deadline:
+            send()
+    writer.close()
+
+
+async def load(host, port, contacts, connections, pipeline, seconds):
+    '''
+        Run the load for seconds and return (requests per second, latencies in seconds, count of each status).
+    '''
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(run_connection(host, port, request_paths(contacts, seed), pipeline, start + seconds, latencies, statuses)
+                           for seed in range(connections)))
+    return len(latencies) / (time.perf_counter() - start), latencies, statuses
+
+
+def start_server(contacts, directory):
+    # Start phone_book_server in another process on a generated phone book; return the process and its port
+    csv_path = os.path.join(directory, "contacts.csv")
+    write_csv(csv_path, generate_rows(contacts))
+    server = subprocess.Popen([sys.executable, "phone_book_server.py", "--port", "0", "--contacts", csv_path,
+                               "--log-file", os.path.join(directory, "server.log")],
+                              stdout=subprocess.PIPE, text=True)
+    for line in server.stdout:
+        if line.startswith("Serving on"):
+            return server, int(line.rsplit(":", 1)[1])
+    raise RuntimeError("The server stopped before serving")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.http_load", description="Measure phone_book_server throughput.")
+    parser.add_argument("--contacts", type=int, default=50000, help="Contacts of the generated phone book, or of the running server's.")
+    parser.add_argument("--connections", type=int, default=8, help="Concurrent keep-alive connections.")
+    parser.add_argument("--pipeline", type=int, nargs='+', default=[1, 8], help="Requests in flight on each connection.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Time each pipeline depth runs for.")
+    parser.add_argument("--host", default="127.0.0.1", help="Host of a running server.")
+    parser.add_argument("--port", type=int, help="Port of a running server, filled with benchmarks.dataset contacts.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = None
+        port = args.port
+        if port is None:
+            server, port = start_server(args.contacts, directory)
+        try:
+            print(f"{args.contacts} contacts, {args.connections} connections, {os.cpu_count()} CPUs")
+            print(f"{'pipeline':>8} {'requests/s':>12} {'p50 ms':>9} {'p99 ms':>9}  statuses")
+            for pipeline in args.pipeline:
+                rate, latencies, statuses = asyncio.run(load(args.host, port, args.contacts, args.connections, pipeline, args.seconds))
+                print(f"{pipeline:>8} {rate:>12.0f} {percentile(latencies, 0.5) * 1000:>9.2f} "
+                      f"{percentile(latencies, 0.99) * 1000:>9.2f}  {dict(sorted(statuses.items()))}")
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Measure the cost of journaling changes under the different fsync policies.
+# Run with: python -m benchmarks.journal_overhead [number of operations]
+import os
+import sys
+import tempfile
+import time
+from journal import JournaledPhoneBook
+from phone_book import PhoneBook
+
+POLICIES = [
+    ("no journal", None),
+    ("flush only, no fsync", {'sync_every': None}),
+    ("fsync every 1000 ops", {'sync_every': 1000}),
+    ("fsync every 100 ops", {'sync_every': 100}),
+    ("fsync every 10 ms", {'sync_every': None, 'sync_interval': 0.01}),
+    ("fsync every op", {'sync_every': 1}),
+]
+
+
+def run(phonebook, count):
+    # Add, update and delete contacts, three journaled changes per contact
+    start = time.perf_counter()
+    for i in range(count):
+        phone_number = "(%03d) %03d-%04d" % (i // 10000000, i // 10000 % 1000, i % 10000)
+        contact = phonebook.add_contact(f"First{i}", f"Last{i}", phone_number, f"user{i}@example.com")
+        phonebook.update_contact(contact, address=f"{i} Main St")
+        phonebook.delete_contact(contact)
+    return 3 * count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    baseline = None
+    print(f"{3 * count} changes (add, update, delete):")
+    for name, policy in POLICIES:
+        with tempfile.TemporaryDirectory() as directory:
+            if policy is None:
+                phonebook = PhoneBook()
+            else:
+                phonebook = JournaledPhoneBook(os.path.join(directory, "journal"), os.path.join(directory, "snapshot"), **policy)
+            ops_per_second = run(phonebook, count)
+            if policy is not None:
+                phonebook.close()
+        baseline = baseline or ops_per_second
+        print(f"  {name:22}: {ops_per_second:10.0f} ops/s ({ops_per_second / baseline:6.1%} of no journal)")
+
+
+if __name__ == "__main__":
+    main()
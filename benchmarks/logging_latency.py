@@ -0,0 +1,58 @@
+# Measure the latency the log file adds to phone book changes, with a synchronous FileHandler and with the
+# background LogWriter of configure_logging.
+# Run with: python -m benchmarks.logging_latency [number of contacts]
+import logging
+import os
+import sys
+import tempfile
+import time
+from logging_setup import LOG_FORMAT, configure_logging, shutdown_logging
+from phone_book import PhoneBook
+
+
+def percentile(latencies, fraction):
+    return sorted(latencies)[int(fraction * (len(latencies) - 1))]
+
+
+def run(count):
+    # Add and delete contacts, timing each call; every delete writes one log record
+    phonebook = PhoneBook()
+    adds = []
+    deletes = []
+    for i in range(count):
+        phone_number = "(%03d) %03d-%04d" % (i // 10000000, i // 10000 % 1000, i % 10000)
+        start = time.perf_counter()
+        contact = phonebook.add_contact(f"First{i}", f"Last{i}", phone_number)
+        middle = time.perf_counter()
+        phonebook.delete_contact(contact)
+        deletes.append(time.perf_counter() - middle)
+        adds.append(middle - start)
+    return adds, deletes
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    root = logging.getLogger()
+    print(f"{count} adds and deletes, latency in microseconds:")
+    with tempfile.TemporaryDirectory() as directory:
+        log_file = os.path.join(directory, "phonebook.log")
+        for name in ["synchronous FileHandler", "background LogWriter"]:
+            if name == "synchronous FileHandler":
+                handler = logging.FileHandler(log_file, encoding='utf-8')
+                handler.setFormatter(logging.Formatter(LOG_FORMAT))
+                root.addHandler(handler)
+                root.setLevel(logging.INFO)
+            else:
+                configure_logging(log_file)
+            adds, deletes = run(count)
+            if name == "synchronous FileHandler":
+                root.removeHandler(handler)
+                handler.close()
+            else:
+                shutdown_logging()
+            print(f"  {name:24} add p50 {percentile(adds, 0.5) * 1e6:6.1f} p99 {percentile(adds, 0.99) * 1e6:6.1f}"
+                  f"   delete p50 {percentile(deletes, 0.5) * 1e6:6.1f} p99 {percentile(deletes, 0.99) * 1e6:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
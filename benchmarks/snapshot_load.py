@@ -0,0 +1,53 @@
+# Compare the cold start of a phone book from a CSV file with loading it from a binary snapshot.
+# Run with: python -m benchmarks.snapshot_load [number of contacts]
+import csv
+import os
+import sys
+import tempfile
+import time
+from phone_book import PhoneBook
+
+
+def write_csv(path, count):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['first_name', 'last_name', 'phone_number', 'email', 'address'])
+        for i in range(count):
+            writer.writerow([f"First{i % 5000}", f"Last{i % 3000}", "(%03d) %03d-%04d" % (i // 10000000, i // 10000 % 1000, i % 10000),
+                             f"user{i}@example.com", f"{i % 1000} Main St"])
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "contacts.csv")
+        snapshot_path = os.path.join(directory, "contacts.snap")
+        write_csv(csv_path, count)
+        phonebook = PhoneBook()
+        _, import_time = timed(lambda: phonebook.bulk_import_contacts(csv_path))
+        _, save_time = timed(lambda: phonebook.save_snapshot(snapshot_path))
+        loaded, load_time = timed(lambda: PhoneBook.load_snapshot(snapshot_path))
+        unverified, fast_load_time = timed(lambda: PhoneBook.load_snapshot(snapshot_path, verify=False))
+        _, lookup_time = timed(lambda: unverified.get_by_phone("(000) 000-0001"))
+        _, access_time = timed(lambda: unverified.contacts[count // 2])
+        _, search_time = timed(lambda: unverified.search_contact("First123"))
+        print(f"{count} contacts, snapshot of {os.path.getsize(snapshot_path) / 1e6:.1f} MB")
+        print(f"  CSV bulk import (cold start)     : {import_time:8.3f}s")
+        print(f"  save_snapshot                    : {save_time:8.3f}s")
+        print(f"  load_snapshot, verified          : {load_time:8.3f}s")
+        print(f"  load_snapshot, verify=False      : {fast_load_time:8.4f}s")
+        print(f"  first lookup (stored index)      : {lookup_time:8.4f}s")
+        print(f"  list every contact after loading : {access_time:8.3f}s")
+        print(f"  first search (builds its index)  : {search_time:8.3f}s")
+        loaded._records.close()
+        unverified._records.close()
+
+
+if __name__ == "__main__":
+    main()
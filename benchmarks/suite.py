@@ -0,0 +1,156 @@
+# The operations timed by python -m benchmarks, run against one synthetic phone book of a given size.
+import compileall
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.dataset import START_TIMESTAMP, TIME_SPAN, generate_rows, phone_number, write_csv
+from contact import Contact
+from phone_book import PhoneBook
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, where peak RSS is reported as None
+    resource = None
+
+# Keywords of the search benchmarks: names in the dataset match, the others match nothing
+SEARCH_KEYWORDS = {
+    'search_hit_short': ["jo", "an", "li"],
+    'search_hit_long': ["Johnson", "Kowalski12", "Tanaka999"],
+    'search_miss_short': ["qz", "xv", "zz"],
+    'search_miss_long': ["Nonexistent", "Bartholomew", "Zzyzxville"],
+}
+RANGE_FRACTION = 0.01  # Share of the creation time span covered by each time-range search
+STARTUP_SAMPLES = 20  # CLI processes started by each startup benchmark
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "phone_book_CLI.py")
+OPERATIONS = ['add', 'import', 'index', *SEARCH_KEYWORDS, 'time_range', 'sort', 'group', 'update', 'export',
+              'startup', 'startup_get', 'delete']
+
+
+def peak_rss_mb():
+    '''
+        Return the peak resident set size of this process so far, in MiB, or None where it cannot be measured.
+    '''
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentile(latencies, fraction):
+    return sorted(latencies)[int(fraction * (len(latencies) - 1))]
+
+
+def measure(operation, size, calls, items=None):
+    '''
+        Time each call in calls, an iterable of argument-less functions, and return the result entry of the operation:
+        items per second (items defaults to one per call, e.g. rows for an import), the p50 and p99 latency
+        of a call in milliseconds, and the peak RSS of the process afterwards.
+    '''
+    latencies = []
+    clock = time.perf_counter
+    for call in calls:
+        start = clock()
+        call()
+        latencies.append(clock() - start)
+    seconds = sum(latencies)
+    items = len(latencies) if items is None else items
+    return {
+        'operation': operation,
+        'size': size,
+        'calls': len(latencies),
+        'items': items,
+        'seconds': round(seconds, 6),
+        'ops_per_sec': round(items / seconds, 1) if seconds else None,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_size(size, seed=0, samples=200, operations=None):
+    '''
+        Run the benchmarks on a phone book of size contacts generated with seed, and return their result entries.
+        Queries, updates and deletes are timed over samples calls each; add, import, index and export over the whole book;
+        startup and startup_get over STARTUP_SAMPLES runs of the CLI in a new process.
+        operations limits the run to those operation names, e.g. ['add', 'search_hit_short'].
+    '''
+    rng = random.Random(seed)
+    results = []
+
+    def wanted(name):
+        return operations is None or name in operations
+
+    with tempfile.TemporaryDirectory() as directory:
+        if wanted('add'):
+            phonebook = PhoneBook()
+            # A generator, so that the calls are not all built up front
+            results.append(measure('add', size, (lambda row=row: phonebook.add_contact(*row[:5])
+                                                 for row in generate_rows(size, seed))))
+            del phonebook
+        if wanted('import'):
+            csv_file = os.path.join(directory, "contacts.csv")
+            write_csv(csv_file, generate_rows(size, seed))
+            phonebook = PhoneBook()
+            results.append(measure('import', size, [lambda: phonebook.bulk_import_contacts(csv_file)], size))
+            del phonebook
+            os.remove(csv_file)
+
+        # The remaining operations share one book, with creation times spread over TIME_SPAN
+        records = {record_id: Contact.from_record(*row) for record_id, row in enumerate(generate_rows(size, seed))}
+        phonebook = PhoneBook(records)
+        # Indexing happens on first use; the later operations run on the built indexes either way
+        index_result = measure('index', size, [lambda: phonebook.get_by_phone(phone_number(0))], size)
+        if wanted('index'):
+            results.append(index_result)
+
+        for name, keywords in SEARCH_KEYWORDS.items():
+            if wanted(name):
+                results.append(measure(name, size, [lambda keyword=keywords[i % len(keywords)]: phonebook.search_contact(keyword)
+                                                    for i in range(samples)]))
+        if wanted('time_range'):
+            span = int(TIME_SPAN * RANGE_FRACTION)
+            windows = [START_TIMESTAMP + rng.randrange(TIME_SPAN - span) for _ in range(samples)]
+            results.append(measure('time_range', size, [
+                lambda start=start: phonebook.search_contact_by_created_time(datetime.fromtimestamp(start), datetime.fromtimestamp(start + span))
+                for start in windows]))
+        if wanted('sort'):
+            # The first sort by a key builds its view; the later ones read it
+            results.append(measure('sort', size, [lambda key=key: phonebook.sort_contacts(key)
+                                                  for key in ['first_name', 'last_name', 'created_at'] * 2]))
+        if wanted('group'):
+            results.append(measure('group', size, [phonebook.group_contacts_by_area_code,
+                                                   lambda: phonebook.group_contacts_by_initial_letter('last_name')] * 2))
+        if wanted('update'):
+            contacts = [phonebook.get_by_phone(phone_number(rng.randrange(size))) for _ in range(samples)]
+            results.append(measure('update', size, [lambda contact=contact, i=i: phonebook.update_contact(contact, address=f"{i} Updated St")
+                                                    for i, contact in enumerate(contacts)]))
+        if wanted('export'):
+            csv_file = os.path.join(directory, "export.csv")
+            results.append(measure('export', size, [lambda: phonebook.export_contacts(csv_file)], size))
+        if wanted('startup') or wanted('startup_get'):
+            # Cold starts of the CLI in new processes, from compiled modules as an installed copy would have them
+            compileall.compile_dir(os.path.dirname(CLI), maxlevels=0, quiet=1)
+            log_file = os.path.join(directory, "phonebook.log")
+            if wanted('startup'):
+                # To the menu's first prompt, answered with 7 to exit
+                results.append(measure('startup', size, [lambda: subprocess.run([sys.executable, CLI, "--log-file", log_file],
+                                                                                input="7\n", capture_output=True, text=True, check=True)
+                                                         for _ in range(STARTUP_SAMPLES)]))
+            if wanted('startup_get'):
+                # A one-shot lookup against a snapshot of the book, as scripts run it
+                snapshot_file = os.path.join(directory, "contacts.snap")
+                phonebook.save_snapshot(snapshot_file)
+                phones = [phone_number(rng.randrange(size)) for _ in range(STARTUP_SAMPLES)]
+                results.append(measure('startup_get', size, [
+                    lambda phone=phone: subprocess.run([sys.executable, CLI, "--log-file", log_file, "--snapshot", snapshot_file, "get", phone],
+                                                       capture_output=True, text=True, check=True)
+                    for phone in phones]))
+        if wanted('delete'):
+            contacts = [phonebook.get_by_phone(phone_number(i)) for i in rng.sample(range(size), min(samples, size))]
+            results.append(measure('delete', size, [lambda contact=contact: phonebook.delete_contact(contact) for contact in contacts]))
+    return results
@@ -0,0 +1,103 @@
+# This file implements the streaming CSV export used by PhoneBook.export_contacts.
+# Rows are formatted into a large in-memory buffer that is written out, optionally compressed, in big blocks.
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+import time
+from itertools import islice
+from operator import attrgetter
+
+CONTACT_COLUMNS = ['first_name', 'last_name', 'phone_number', 'email', 'address']
+TIMESTAMP_COLUMNS = ['created_at', 'updated_at']
+COMPRESSION_OPENERS = {'gzip': gzip.open, 'bz2': bz2.open, 'lzma': lzma.open}
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma', '.lzma': 'lzma'}
+DEFAULT_BUFFER_SIZE = 1 << 20  # Bytes of CSV text collected before each write
+ROWS_PER_BATCH = 1000  # Rows formatted per csv writerows call
+
+
+class ExportSummary:
+    '''
+        Size and timing of one export.
+    '''
+    def __init__(self, rows=0, bytes_written=0, file_size=0, elapsed=0.0):
+        self.rows = rows
+        self.bytes_written = bytes_written  # Uncompressed CSV bytes
+        self.file_size = file_size  # Bytes on disk, after compression
+        self.elapsed = elapsed  # Seconds
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes_written / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return f"Wrote {self.rows} rows, {self.bytes_written} bytes ({self.file_size} on disk) in {self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/s, {self.bytes_per_second / 1e6:.1f} MB/s)"
+
+
+def export_columns(columns=None, include_timestamps=False):
+    '''
+        Return the list of columns to export.
+        Raise a ValueError if a column is not a Contact attribute.
+    '''
+    columns = list(columns) if columns else list(CONTACT_COLUMNS)
+    if include_timestamps:
+        columns += [column for column in TIMESTAMP_COLUMNS if column not in columns]
+    unknown = [column for column in columns if column not in CONTACT_COLUMNS + TIMESTAMP_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    return columns
+
+
+def open_output(csv_file, compression=None):
+    '''
+        Open the file for binary writing, compressed with gzip, bz2 or lzma.
+        When compression is None it is inferred from the file extension, and .csv or any other extension is written as is.
+        Raise a ValueError for an unknown compression.
+    '''
+    if compression is None:
+        compression = COMPRESSION_EXTENSIONS.get(os.path.splitext(csv_file)[1].lower())
+    if compression is None:
+        return open(csv_file, 'wb')
+    if compression not in COMPRESSION_OPENERS:
+        raise ValueError(f"Unknown compression: {compression}")
+    return COMPRESSION_OPENERS[compression](csv_file, 'wb')
+
+
+def export_csv(contacts, csv_file, columns, compression=None, buffer_size=DEFAULT_BUFFER_SIZE):
+    '''
+        Write the given columns of the contacts to a CSV file, header first.
+        The contacts can be any iterable, e.g. a generator over search results, and are only read once.
+        Return an ExportSummary.
+    '''
+    summary = ExportSummary()
+    start = time.perf_counter()
+    get_row = attrgetter(*columns)
+    if len(columns) == 1:
+        # attrgetter returns a bare value rather than a tuple for a single attribute
+        rows = ((get_row(contact),) for contact in contacts)
+    else:
+        rows = map(get_row, contacts)
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    with open_output(csv_file, compression) as file:
+        while True:
+            # Format a batch of rows at a time, and write once the buffer is full
+            batch = list(islice(rows, ROWS_PER_BATCH))
+            writer.writerows(batch)
+            summary.rows += len(batch)
+            if len(batch) < ROWS_PER_BATCH or text.tell() >= buffer_size:
+                summary.bytes_written += file.write(text.getvalue().encode('utf-8'))
+                text.seek(0)
+                text.truncate()
+            if len(batch) < ROWS_PER_BATCH:
+                break
+    summary.file_size = os.path.getsize(csv_file)
+    summary.elapsed = time.perf_counter() - start
+    return summary
@@ -0,0 +1,196 @@
+# This file implements the streaming bulk import used by PhoneBook.bulk_import_contacts.
+# Rows are read and validated in chunks, and rejected rows go to an errors report instead of the console.
+# Large files can be split into byte ranges that are parsed and validated by several worker processes.
+import csv
+import logging
+import os
+import time
+from itertools import islice, repeat
+from contact import Contact
+from validation import validate_many
+
+REQUIRED_COLUMNS = ('first_name', 'last_name', 'phone_number')
+ERROR_REPORT_COLUMNS = ['line_number', 'error', 'first_name', 'last_name', 'phone_number', 'email', 'address']
+SHARDS_PER_WORKER = 4  # More shards than workers keeps every worker busy when some shards are slower
+# Once an import has added this share of the phone book's size, its secondary indexes are dropped and rebuilt in bulk
+# by their next use, rather than updated row by row on the process that inserts the rows
+REINDEX_SHARE = 0.25
+
+logger = logging.getLogger(__name__)
+
+
+class ImportSummary:
+    '''
+        Counts and timing of one bulk import.
+    '''
+    def __init__(self, rows_read=0, accepted=0, rejected=0, elapsed=0.0):
+        self.rows_read = rows_read
+        self.accepted = accepted
+        self.rejected = rejected
+        self.elapsed = elapsed  # Seconds
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return f"Read {self.rows_read} rows: {self.accepted} accepted, {self.rejected} rejected in {self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/s)"
+
+
+def validate_chunk(rows):
+    '''
+        Validate a chunk of (line number, row) pairs.
+        Return the valid rows as field tuples and the rejected ones as (line number, error, row) tuples.
+        Applies the same checks, in the same order and with the same messages, as the Contact constructor.
+    '''
+    fields = [(row.get('first_name'), row.get('last_name'), row.get('phone_number'), row.get('email')) for _, row in rows]
+    valid = []
+    rejected = []
+    for (line_number, row), (first_name, last_name, phone_number, email), error in zip(rows, fields, validate_many(fields)):
+        if error:
+            rejected.append((line_number, error, row))
+        else:
+            valid.append((line_number, first_name, last_name, phone_number, email, row.get('address')))
+    return valid, rejected
+
+
+def read_chunks(reader, chunk_size):
+    # Yield lists of (line number, row) pairs of at most chunk_size rows
+    while True:
+        chunk = [(reader.line_num, row) for row in islice(reader, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def serial_chunks(reader, chunk_size):
+    # Yield (rows read, valid rows, rejected rows) for each chunk of the reader
+    for chunk in read_chunks(reader, chunk_size):
+        valid, rejected = validate_chunk(chunk)
+        yield len(chunk), valid, rejected
+
+
+def read_header(csv_file):
+    '''
+        Return the column names of a CSV file and the byte offset where its data rows start.
+    '''
+    with open(csv_file, 'rb') as file:
+        header = file.readline().decode('utf-8')
+        return next(csv.reader([header]), []), file.tell()
+
+
+def shard_bounds(data_start, file_size, shard_count):
+    '''
+        Split the bytes from data_start to file_size into at most shard_count (start, end) ranges.
+        A shard holds the lines that start inside its range, so ranges do not need to fall on line boundaries.
+    '''
+    step = max(1, -(-(file_size - data_start) // shard_count))
+    return [(start, min(start + step, file_size)) for start in range(data_start, file_size, step)]
+
+
+def parse_shard(csv_file, fieldnames, start, end):
+    '''
+        Parse and validate the lines of a CSV file that start between the byte offsets start and end.
+        Runs in a worker process, so it only takes and returns picklable values.
+        Return the number of rows and lines read, and the valid and rejected rows with line numbers relative to the shard.
+        Assumes that quoted fields do not contain line breaks.
+    '''
+    lines = []
+    with open(csv_file, 'rb') as file:
+        # Skip the rest of the line that starts before the shard; it belongs to the previous shard.
+        # If the previous byte is a line break this only consumes that byte.
+        file.seek(start - 1)
+        file.readline()
+        while file.tell() < end:
+            line = file.readline()
+            if not line:
+                break
+            lines.append(line.decode('utf-8'))
+    reader = csv.DictReader(lines, fieldnames=fieldnames)
+    rows = [(reader.line_num, row) for row in reader]
+    valid, rejected = validate_chunk(rows)
+    return len(rows), len(lines), valid, rejected
+
+
+def parallel_chunks(csv_file, fieldnames, data_start, workers):
+    # Yield (rows read, valid rows, rejected rows) for each shard, in file order, with line numbers of the whole file
+    shards = shard_bounds(data_start, os.path.getsize(csv_file), workers * SHARDS_PER_WORKER)
+    starts = [start for start, _ in shards]
+    ends = [end for _, end in shards]
+    first_line = 2  # Line 1 is the header
+    from concurrent.futures import ProcessPoolExecutor  # Imported here: multiprocessing takes longer to import than the rest of the phone book
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map returns the results in shard order whatever order the workers finish in
+        for rows_read, line_count, valid, rejected in executor.map(parse_shard, repeat(csv_file), repeat(fieldnames), starts, ends):
+            offset = first_line - 1
+            valid = [(row[0] + offset,) + row[1:] for row in valid]
+            rejected = [(line_number + offset, error, row) for line_number, error, row in rejected]
+            first_line += line_count
+            yield rows_read, valid, rejected
+
+
+def load_chunks(phonebook, chunks, summary, now, error_writer=None):
+    # Insert the valid rows of each chunk into the phone book, stamped with the timestamp now, and report the rejected ones
+    reindex = False
+    for rows_read, valid, rejected in chunks:
+        summary.rows_read += rows_read
+        if not reindex and summary.accepted + len(valid) >= REINDEX_SHARE * len(phonebook):
+            reindex = True
+            phonebook._drop_secondary_indexes()
+        for line_number, first_name, last_name, phone_number, email, address in valid:
+            try:
+                phonebook._insert(Contact.from_record(first_name, last_name, phone_number, email, address, now, now))
+                summary.accepted += 1
+            except ValueError as ve:
+                # Duplicate phone number
+                rejected.append((line_number, str(ve), {'first_name': first_name, 'last_name': last_name, 'phone_number': phone_number, 'email': email, 'address': address}))
+        summary.rejected += len(rejected)
+        if error_writer:
+            rejected.sort(key=lambda rejected_row: rejected_row[0])
+            error_writer.writerows([line_number, error] + [row.get(column) for column in ERROR_REPORT_COLUMNS[2:]] for line_number, error, row in rejected)
+
+
+def import_csv(phonebook, csv_file, errors_file=None, chunk_size=10000, workers=1):
+    '''
+        Stream contacts from a CSV file into the phone book, chunk_size rows at a time.
+        With more than one worker, the file is split into byte ranges that worker processes parse and validate;
+        the contacts are still added in file order. This assumes quoted fields do not contain line breaks.
+        Only the phone index is kept up to date while a large import inserts its rows; the other indexes are rebuilt
+        in one pass by their next use.
+        All imported contacts share one creation timestamp, read from the clock once per import.
+        Rejected rows, including duplicate phone numbers, are written to errors_file as CSV when it is given.
+        Return an ImportSummary.
+        Raise a ValueError if the file cannot be read or lacks a required column.
+    '''
+    summary = ImportSummary()
+    start = time.perf_counter()
+    now = int(time.time())
+    errors = None
+    error_writer = None
+    try:
+        fieldnames, data_start = read_header(csv_file)
+        missing = [column for column in REQUIRED_COLUMNS if column not in fieldnames]
+        if missing:
+            raise ValueError(f"Missing column(s) in file {csv_file}: {', '.join(missing)}")
+        if errors_file:
+            errors = open(errors_file, 'w', newline='')
+            error_writer = csv.writer(errors)
+            error_writer.writerow(ERROR_REPORT_COLUMNS)
+        if workers > 1:
+            load_chunks(phonebook, parallel_chunks(csv_file, fieldnames, data_start, workers), summary, now, error_writer)
+        else:
+            with open(csv_file, 'r', newline='', encoding='utf-8') as file:
+                reader = csv.DictReader(file)
+                load_chunks(phonebook, serial_chunks(reader, chunk_size), summary, now, error_writer)
+    except FileNotFoundError:
+        logger.error("File not found: %s", csv_file)
+        raise ValueError(f"File not found: {csv_file}")
+    except (IOError, csv.Error) as e:
+        logger.error("Error reading file %s: %s", csv_file, e)
+        raise ValueError(f"Error reading file {csv_file}: {e}")
+    finally:
+        if errors:
+            errors.close()
+    summary.elapsed = time.perf_counter() - start
+    logger.info("Bulk import from %s: %s", csv_file, summary)
+    return summary
@@ -1,55 +1,120 @@
 # This file represents an individual contact entry with attributes and timestamps.
+import math
+import time
 from datetime import datetime
-import re
+from validation import contact_error, update_error, validate_many
+
+
+def to_timestamp(moment):
+    # Epoch seconds of a datetime, in the whole seconds contacts store
+    return int(moment.timestamp())
+
+
+def timestamp_range(start_time, end_time):
+    # Whole-second timestamps from start_time to end_time inclusive, rounded inwards
+    return math.ceil(start_time.timestamp()), math.floor(end_time.timestamp())
+
 
 class Contact:
+    # No per-instance __dict__, which saves memory when the phone book holds millions of contacts.
+    # Timestamps are kept as integer epoch seconds; created_at and updated_at build datetimes from them on demand.
+    __slots__ = ('first_name', 'last_name', 'phone_number', 'email', 'address', 'created_timestamp', 'updated_timestamp')
+
     def __init__(self, first_name, last_name, phone_number, email=None, address=None): 
         # First name, last name and phone number are required fields.
         # The email and address are optional fields.
         # Initialize the contact with the provided attributes.
         # Raise a ValueError if required fields are missing or if the phone number or email is in an invalid format.
         
-        #Validation for required fields
-        if not first_name:
-            raise ValueError("First name is required.")
-        if not last_name:
-            raise ValueError("Last name is required.")
-        if not phone_number:
-            raise ValueError("Phone number is required.")
-
-        # Validation for email format
-        if email and not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            raise ValueError("Invalid email address")
-        
-        # Validation for phone number format
-        if not re.match(r"\(\d{3}\) \d{3}-\d{4}", phone_number):
-            raise ValueError("Phone number must be in the format (###) ###-####")
-        
+        # Validation for required fields and the email and phone number formats
+        error = contact_error(first_name, last_name, phone_number, email)
+        if error:
+            raise ValueError(error)
+
         # Set the validated attributes and timestamps for the contact
         self.first_name = first_name
         self.last_name = last_name
         self.phone_number = phone_number
         self.email = email
         self.address = address
-        self.created_at = datetime.now().replace(microsecond=0)  # Timestamp(Round to sec) for when contact was created
-        self.updated_at = datetime.now().replace(microsecond=0)  # Timestamp(Round to sec) for when contact was last updated
+        # One clock reading for both timestamps
+        self.created_timestamp = int(time.time())  # Epoch seconds for when contact was created
+        self.updated_timestamp = self.created_timestamp  # Epoch seconds for when contact was last updated
+
+    @property
+    def created_at(self):
+        return datetime.fromtimestamp(self.created_timestamp)
+
+    @created_at.setter
+    def created_at(self, moment):
+        self.created_timestamp = to_timestamp(moment)
+
+    @property
+    def updated_at(self):
+        return datetime.fromtimestamp(self.updated_timestamp)
+
+    @updated_at.setter
+    def updated_at(self, moment):
+        self.updated_timestamp = to_timestamp(moment)
+
+    @classmethod
+    def from_record(cls, first_name, last_name, phone_number, email, address, created_timestamp, updated_timestamp):
+        # Build a contact from values that were already validated, e.g. when reading it back from storage.
+        # Skips validation and keeps the stored timestamps, given as epoch seconds.
+        contact = cls.__new__(cls)
+        contact.first_name = first_name
+        contact.last_name = last_name
+        contact.phone_number = phone_number
+        contact.email = email
+        contact.address = address
+        contact.created_timestamp = created_timestamp
+        contact.updated_timestamp = updated_timestamp
+        return contact
+
+    @classmethod
+    def from_rows(cls, rows, timestamp=None):
+        # Build contacts from (first_name, last_name, phone_number, email, address) rows, validating all of them first.
+        # Every contact is stamped with the same timestamp, by default one clock reading for the whole batch.
+        # Raise a ValueError for the first invalid row, in which case no contact is built.
+        rows = list(rows)
+        error = next((error for error in validate_many(rows) if error), None)
+        if error:
+            raise ValueError(error)
+        if timestamp is None:
+            timestamp = int(time.time())
+        return [cls.from_record(first_name, last_name, phone_number, email, address, timestamp, timestamp)
+                for first_name, last_name, phone_number, email, address in rows]
 
     def update_contact(self, first_name=None, last_name=None, phone_number=None, email=None, address=None):
         # Update provided fields of contact and update the timestamp
+        # Validate everything first so that a failed update leaves the contact unchanged
+        error = update_error(phone_number, email)
+        if error:
+            raise ValueError(error)
         if first_name:
             self.first_name = first_name
         if last_name:
             self.last_name = last_name
-        # Validation for phone number format
-        if phone_number and not re.match(r"\(\d{3}\) \d{3}-\d{4}", phone_number):
-            raise ValueError("Phone number must be in the format (###) ###-####")
-        # Validation for email format
-        if email and not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            raise ValueError("Invalid email address")
+        if phone_number:
+            self.phone_number = phone_number
+        if email:
+            self.email = email
         if address:
             self.address = address
-        self.updated_at = datetime.now().replace(microsecond=0)
+        self.updated_timestamp = int(time.time())
     
+    def to_dict(self):
+        # Attributes of the contact as JSON-compatible values, with the timestamps in ISO 8601
+        return {
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'phone_number': self.phone_number,
+            'email': self.email,
+            'address': self.address,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+        }
+
     def __str__(self):
         # Return a string representation of the contact
         # For optional fields, print None if the value is not provided.
@@ -0,0 +1,190 @@
+# This file provides a compact, column-oriented container for contacts.
+# It can replace the default dict of Contact objects inside PhoneBook when the phone book holds millions of contacts.
+from array import array
+import re
+import sys
+from contact import Contact
+
+PACKABLE_PHONE = re.compile(r"\((\d{3})\) (\d{3})-(\d{4})")  # Phone numbers that can be stored as a single integer
+
+
+def pack_phone(phone_number):
+    '''
+        Return the phone number as a 10-digit integer.
+        Return None if the phone number is not exactly in the format (###) ###-####.
+    '''
+    match = PACKABLE_PHONE.fullmatch(phone_number)
+    if match is None:
+        return None
+    return int(''.join(match.groups()))
+
+
+def unpack_phone(number):
+    '''
+        Return the (###) ###-#### form of a phone number packed by pack_phone.
+    '''
+    digits = "%010d" % number
+    return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+
+
+class PackedStrings:
+    '''
+        Column of optional strings stored as UTF-8 bytes in one shared buffer.
+        Each entry costs two array slots plus its encoded bytes, instead of a separate str object.
+    '''
+    def __init__(self):
+        self._buffer = bytearray()
+        self._offsets = array('q')  # Start of each entry in the buffer
+        self._lengths = array('q')  # Encoded length of each entry, -1 for None
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, text):
+        if text is None:
+            self._offsets.append(0)
+            self._lengths.append(-1)
+            return
+        data = text.encode('utf-8')
+        self._offsets.append(len(self._buffer))
+        self._lengths.append(len(data))
+        self._buffer += data
+
+    def __getitem__(self, row):
+        length = self._lengths[row]
+        if length < 0:
+            return None
+        offset = self._offsets[row]
+        return self._buffer[offset:offset + length].decode('utf-8')
+
+    def __setitem__(self, row, text):
+        if text is None:
+            self._lengths[row] = -1
+            return
+        data = text.encode('utf-8')
+        if len(data) <= self._lengths[row]:
+            # The new value fits in the old slot, overwrite it in place
+            offset = self._offsets[row]
+            self._buffer[offset:offset + len(data)] = data
+        else:
+            # Otherwise append it; the old bytes stay unused until the column is cleared
+            self._offsets[row] = len(self._buffer)
+            self._buffer += data
+        self._lengths[row] = len(data)
+
+    def clear(self):
+        self._buffer = bytearray()
+        self._offsets = array('q')
+        self._lengths = array('q')
+
+
+class ContactStore:
+    '''
+        Columnar storage for contacts, keyed by increasing integer record ids that double as row numbers.
+        Supports the subset of the dict interface PhoneBook uses, so it can be passed as PhoneBook(store=ContactStore()).
+
+        Names are interned, since the same names repeat across many contacts.
+        Emails and addresses are packed into UTF-8 buffers.
+        Phone numbers are 10-digit integers and timestamps are epoch seconds, both in int64 arrays.
+        Contact objects are only built when a record is read, and changing one does not change the store;
+        write it back with store[record_id] = contact (PhoneBook.update_contact does this).
+        Deleted records leave a tombstone until the store is cleared.
+    '''
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._first_names = []
+        self._last_names = []
+        self._phones = array('q')
+        self._odd_phones = {}  # Record id -> phone number that does not fit the packed format
+        self._emails = PackedStrings()
+        self._addresses = PackedStrings()
+        self._created_at = array('q')
+        self._updated_at = array('q')
+        self._live = bytearray()  # 1 for stored records, 0 for deleted ones
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, record_id):
+        return 0 <= record_id < len(self._live) and self._live[record_id] == 1
+
+    def __iter__(self):
+        live = self._live
+        return (record_id for record_id in range(len(live)) if live[record_id])
+
+    def __getitem__(self, record_id):
+        if record_id not in self:
+            raise KeyError(record_id)
+        phone = self._odd_phones.get(record_id)
+        if phone is None:
+            phone = unpack_phone(self._phones[record_id])
+        return Contact.from_record(
+            self._first_names[record_id],
+            self._last_names[record_id],
+            phone,
+            self._emails[record_id],
+            self._addresses[record_id],
+            self._created_at[record_id],
+            self._updated_at[record_id],
+        )
+
+    def __setitem__(self, record_id, contact):
+        '''
+            Store the contact under the record id.
+            New records are appended, so their record id must be greater than every record id used so far.
+            Raise a KeyError for a smaller record id that is not stored.
+        '''
+        number = pack_phone(contact.phone_number)
+        if record_id >= len(self._live):
+            # Skipped record ids become tombstones so that record ids stay row numbers
+            for _ in range(record_id - len(self._live)):
+                self._append_tombstone()
+            self._first_names.append(sys.intern(contact.first_name))
+            self._last_names.append(sys.intern(contact.last_name))
+            self._phones.append(-1 if number is None else number)
+            self._emails.append(contact.email)
+            self._addresses.append(contact.address)
+            self._created_at.append(contact.created_timestamp)
+            self._updated_at.append(contact.updated_timestamp)
+            self._live.append(1)
+            self._count += 1
+        elif record_id in self:
+            self._first_names[record_id] = sys.intern(contact.first_name)
+            self._last_names[record_id] = sys.intern(contact.last_name)
+            self._phones[record_id] = -1 if number is None else number
+            self._emails[record_id] = contact.email
+            self._addresses[record_id] = contact.address
+            self._created_at[record_id] = contact.created_timestamp
+            self._updated_at[record_id] = contact.updated_timestamp
+        else:
+            raise KeyError(record_id)
+        if number is None:
+            self._odd_phones[record_id] = contact.phone_number
+        else:
+            self._odd_phones.pop(record_id, None)
+
+    def _append_tombstone(self):
+        self._first_names.append("")
+        self._last_names.append("")
+        self._phones.append(-1)
+        self._emails.append(None)
+        self._addresses.append(None)
+        self._created_at.append(0)
+        self._updated_at.append(0)
+        self._live.append(0)
+
+    def pop(self, record_id):
+        contact = self[record_id]
+        self._live[record_id] = 0
+        self._count -= 1
+        self._odd_phones.pop(record_id, None)
+        return contact
+
+    def values(self):
+        return (self[record_id] for record_id in self)
+
+    def items(self):
+        return ((record_id, self[record_id]) for record_id in self)
@@ -0,0 +1,253 @@
+# This file contains the in-memory index structures used by PhoneBook to answer queries without scanning every contact.
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+
+class NGramIndex:
+    '''
+        Inverted index from n-grams (substrings of length n) to the record ids whose text contains them.
+        A keyword can only be a substring of a text if every n-gram of the keyword is also an n-gram of the text,
+        so intersecting the posting lists of the keyword's n-grams gives a small superset of the matching records.
+        The caller verifies the candidates against the real match condition.
+    '''
+    def __init__(self, n=3):
+        self.n = n
+        self._postings = {}  # n-gram -> set of record ids
+
+    def _grams(self, text):
+        # Return the set of distinct n-grams in the text
+        n = self.n
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def add(self, record_id, *texts):
+        '''
+            Index the given texts under the record id.
+        '''
+        for text in texts:
+            for gram in self._grams(text):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    self._postings[gram] = {record_id}
+                else:
+                    postings.add(record_id)
+
+    def remove(self, record_id, *texts):
+        '''
+            Remove the record id from the postings of the given texts.
+            The texts must be the same ones the record was added with.
+        '''
+        for text in texts:
+            for gram in self._grams(text):
+                postings = self._postings.get(gram)
+                if postings is None:
+                    continue
+                postings.discard(record_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def candidates(self, keyword):
+        '''
+            Return the set of record ids whose indexed texts may contain the keyword.
+            Return None if the keyword is shorter than n and the index cannot narrow the search.
+        '''
+        grams = self._grams(keyword)
+        if not grams:
+            return None
+        # Intersect the smallest posting lists first so the working set shrinks as fast as possible
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result &= posting
+        return result
+
+    def clear(self):
+        self._postings = {}
+
+
+class SortedIndex:
+    '''
+        Secondary index keeping (key, record id) pairs in sorted order, used for range queries on integer keys
+        such as timestamps. The record id breaks ties between equal keys, so every pair can be found by binary search.
+        Keys and record ids are kept in two parallel int64 arrays, 16 bytes per pair instead of a tuple of two ints.
+        Build it from every (key, record id) pair at once; add and remove are meant for single changes.
+    '''
+    def __init__(self, pairs=()):
+        # Building from all the pairs at once sorts them once, O(n log n); adding them one by one would be O(n^2)
+        pairs = sorted(pairs)
+        self._keys = array('q', [key for key, _ in pairs])
+        self._ids = array('q', [record_id for _, record_id in pairs])  # Record ids in the order of their keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _position(self, key, record_id):
+        # Position of the pair, or where it would be inserted: among equal keys, record ids are in ascending order
+        keys = self._keys
+        low = bisect_left(keys, key)
+        return bisect_left(self._ids, record_id, low, bisect_right(keys, key, low))
+
+    def add(self, key, record_id):
+        '''
+            Insert the record id under the given key. O(log n) to find the slot, plus moving the entries after it.
+        '''
+        position = self._position(key, record_id)
+        self._keys.insert(position, key)
+        self._ids.insert(position, record_id)
+
+    def remove(self, key, record_id):
+        '''
+            Remove the record id stored under the given key. O(log n) to find the slot.
+            Raise a KeyError if the pair is not in the index.
+        '''
+        position = self._position(key, record_id)
+        if position == len(self._keys) or self._keys[position] != key or self._ids[position] != record_id:
+            raise KeyError((key, record_id))
+        del self._keys[position]
+        del self._ids[position]
+
+    def range(self, start, end):
+        '''
+            Return the record ids whose key lies between start and end inclusive, ordered by key. O(log n + k).
+        '''
+        return self._ids[bisect_left(self._keys, start):bisect_right(self._keys, end)].tolist()
+
+    def iter_range(self, start, end):
+        '''
+            Yield the record ids whose key lies between start and end inclusive, ordered by key, without copying them first.
+            The index must not be changed while iterating.
+        '''
+        ids = self._ids
+        low = bisect_left(self._keys, start)
+        high = bisect_right(self._keys, end)
+        return (ids[position] for position in range(low, high))
+
+    def clear(self):
+        self._keys = array('q')
+        self._ids = array('q')
+
+
+class SortedView:
+    '''
+        Record ids ordered by a sort key, with equal keys in record id order, for listing contacts in sorted order.
+        Changes are buffered and merged into the sorted list by the next read, so a change costs O(1) rather than
+        the O(n) list insertion of SortedIndex, and a read after c changes costs O(n + c log c).
+    '''
+    def __init__(self, pairs=()):
+        # Sorting by record id and then, stably, by key gives the same order as sorting the (key, record id) tuples
+        # without comparing tuples; the pairs usually come in record id order already, which makes the first sort O(n)
+        self._entries = sorted(sorted(pairs, key=itemgetter(1)), key=itemgetter(0))  # Sorted list of (key, record id) tuples
+        self._added = set()  # Pairs added since the last merge, none of them in _entries
+        self._removed = set()  # Pairs of _entries removed since the last merge
+
+    def __len__(self):
+        return len(self._entries) + len(self._added) - len(self._removed)
+
+    def add(self, key, record_id):
+        entry = (key, record_id)
+        if entry in self._removed:
+            # Removed and added back unchanged, e.g. by an update that does not change the key
+            self._removed.discard(entry)
+        else:
+            self._added.add(entry)
+
+    def remove(self, key, record_id):
+        entry = (key, record_id)
+        if entry in self._added:
+            self._added.discard(entry)
+        else:
+            self._removed.add(entry)
+
+    def _merge(self):
+        # Apply the buffered changes to the sorted list. The buffers are only emptied once the new list is complete,
+        # so a failing comparison leaves the view as it was instead of losing the removals
+        if not self._removed and not self._added:
+            return
+        entries = self._entries
+        if self._removed:
+            removed = self._removed
+            entries = [entry for entry in entries if entry not in removed]
+        if self._added:
+            # Two sorted runs, which the sort merges in linear time
+            entries = entries + sorted(self._added)
+            entries.sort()
+        self._entries = entries
+        self._removed = set()
+        self._added = set()
+
+    def iter_ids(self, reverse=False):
+        '''
+            Yield every record id ordered by key, descending with reverse. O(n) once the changes are merged.
+            Record ids with equal keys come in ascending order either way, as with a stable sort.
+            The view must not be changed while iterating.
+        '''
+        self._merge()
+        if not reverse:
+            return map(itemgetter(1), self._entries)
+        # A stable reverse sort of entries that are already in order only reverses runs of keys, which is O(n)
+        return map(itemgetter(1), sorted(self._entries, key=itemgetter(0), reverse=True))
+
+    def clear(self):
+        self._entries = []
+        self._added = set()
+        self._removed = set()
+
+
+class GroupIndex:
+    '''
+        Buckets of record ids by group, e.g. contacts by the area code of their phone number.
+        Counting a group is O(1) and listing one group only reads its own members.
+    '''
+    def __init__(self, pairs=()):
+        self._buckets = {}  # Group -> set of record ids
+        for group, record_id in pairs:
+            self.add(group, record_id)
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def add(self, group, record_id):
+        bucket = self._buckets.get(group)
+        if bucket is None:
+            bucket = self._buckets[group] = set()
+        bucket.add(record_id)
+
+    def remove(self, group, record_id):
+        '''
+            Remove the record id from its group, dropping the group once it is empty.
+            Raise a KeyError if the record id is not in the group.
+        '''
+        bucket = self._buckets[group]
+        bucket.remove(record_id)
+        if not bucket:
+            del self._buckets[group]
+
+    def count(self, group):
+        '''
+            Return the number of record ids in the group, 0 for an unknown group. O(1).
+        '''
+        bucket = self._buckets.get(group)
+        return len(bucket) if bucket else 0
+
+    def counts(self):
+        '''
+            Return a dictionary of group -> number of record ids, sorted by group. O(g log g) for g groups.
+        '''
+        return {group: len(self._buckets[group]) for group in sorted(self._buckets)}
+
+    def members(self, group):
+        '''
+            Return the record ids of the group in ascending order. O(k log k) for k members.
+        '''
+        return sorted(self._buckets.get(group, ()))
+
+    def groups(self):
+        '''
+            Return the groups in sorted order.
+        '''
+        return sorted(self._buckets)
+
+    def clear(self):
+        self._buckets = {}
@@ -0,0 +1,260 @@
+# This file provides crash-safe persistence for PhoneBook through an append-only operation journal.
+# Every change is appended to the journal as one JSON line with a sequence number; on startup the latest snapshot
+# is loaded and the journal entries that came after it are replayed. Compaction writes a new snapshot and empties the journal.
+import json
+import logging
+import os
+import threading
+import time
+from contact import Contact
+from phone_book import PhoneBook
+from snapshot import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+
+def contact_to_fields(contact):
+    return [contact.first_name, contact.last_name, contact.phone_number, contact.email, contact.address,
+            contact.created_timestamp, contact.updated_timestamp]
+
+
+def fields_to_contact(fields):
+    return Contact.from_record(*fields)
+
+
+class Journal:
+    '''
+        Append-only file of numbered operations, one JSON object per line.
+        Entries are made durable with fsync in groups, whichever comes first of:
+        - sync_every entries since the last fsync (1 syncs every entry)
+        - sync_interval seconds since the last fsync. A background thread syncs the pending entries when the interval
+          runs out, so no entry stays unsynced for longer than that, even if no other entry follows it.
+        With neither, entries are only flushed to the operating system, and fsynced on sync() or close().
+    '''
+    def __init__(self, path, sync_every=1, sync_interval=None):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.sequence = 0  # Number of the last entry written
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(path, 'ab')
+        self._lock = threading.Lock()  # Taken by every write to the file, which the flusher thread shares
+        self._closing = threading.Event()
+        self._flusher = None
+        if sync_interval is not None:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="JournalFlusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        # Sync the pending entries whenever sync_interval has passed since the last sync, until the journal is closed
+        delay = self.sync_interval
+        while not self._closing.wait(delay):
+            with self._lock:
+                if self._unsynced:
+                    self._sync()
+                # Appends may have synced in the meantime; wait for the rest of the interval since the last sync
+                remaining = self._last_sync + self.sync_interval - time.monotonic()
+            delay = remaining if remaining > 0 else self.sync_interval
+
+    def read(self):
+        '''
+            Return the entries in the journal file and set the sequence number to the last one.
+            A torn last line, left by a crash in the middle of a write, is cut off the file.
+            Raise a ValueError if any other line is not a valid entry.
+        '''
+        entries = []
+        valid_size = 0
+        with open(self.path, 'rb') as file:
+            lines = file.readlines()
+        for number, line in enumerate(lines, 1):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("incomplete line")
+                entries.append(json.loads(line))
+            except ValueError as ve:
+                if number < len(lines):
+                    raise ValueError(f"Corrupt journal {self.path} at line {number}: {ve}")
+                logger.error("Discarding torn last entry of journal %s", self.path)
+                with self._lock:
+                    self._file.truncate(valid_size)
+                break
+            valid_size += len(line)
+        if entries:
+            self.sequence = max(self.sequence, entries[-1]['seq'])
+        return entries
+
+    def append(self, operation, **arguments):
+        '''
+            Append one operation and make it durable according to the sync policy.
+            Return its sequence number.
+        '''
+        with self._lock:
+            self.sequence += 1
+            entry = {'seq': self.sequence, 'op': operation, **arguments}
+            self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b"\n")
+            self._unsynced += 1
+            if (self.sync_every and self._unsynced >= self.sync_every) or \
+                    (self.sync_interval is not None and time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync()
+            else:
+                self._file.flush()
+            return self.sequence
+
+    def _sync(self):
+        # The caller holds the lock
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        '''
+            Write every appended entry to disk.
+        '''
+        with self._lock:
+            self._sync()
+
+    def truncate(self):
+        '''
+            Empty the journal once its entries are safely in a snapshot. Sequence numbers keep counting up.
+        '''
+        with self._lock:
+            self._file.truncate(0)
+            self._sync()
+
+    def close(self):
+        '''
+            Stop the flusher thread, if any, then sync and close the file.
+        '''
+        if self._flusher is not None:
+            self._closing.set()
+            self._flusher.join()
+            self._flusher = None
+        self.sync()
+        self._file.close()
+
+
+class JournaledPhoneBook(PhoneBook):
+    '''
+        In-memory PhoneBook that records every change in a Journal and can be reopened after a crash or restart.
+        Opening loads snapshot_path, if it exists, and replays the journal entries that are newer than the snapshot.
+        compact() saves a new snapshot and empties the journal; with compact_every, this happens automatically
+        after that many journaled changes, within the change that reaches the count, which then takes as long
+        as saving the whole phone book. The sync_every and sync_interval parameters set the Journal's fsync policy.
+        A change that cannot be journaled, e.g. on a full disk, raises the journal's error and is not made in memory.
+    '''
+    def __init__(self, journal_path, snapshot_path, sync_every=1, sync_interval=None, compact_every=None):
+        store = SnapshotStore(snapshot_path) if os.path.exists(snapshot_path) else None
+        super().__init__(store)
+        self.snapshot_path = snapshot_path
+        self.compact_every = compact_every
+        self._journal = Journal(journal_path, sync_every, sync_interval)
+        self._journaling = False  # Changes are only journaled once the existing ones are replayed
+        self._changes_since_compaction = 0
+        snapshot_sequence = store.sequence if store is not None else 0
+        self._journal.sequence = snapshot_sequence
+        for entry in self._journal.read():
+            if entry['seq'] > snapshot_sequence:
+                self._apply(entry)
+                self._changes_since_compaction += 1
+        self._journaling = True
+
+    def _apply(self, entry):
+        # Redo one journaled operation without journaling it again
+        operation = entry['op']
+        if operation == 'add':
+            self._insert(fields_to_contact(entry['contact']))
+        elif operation == 'update':
+            record_id = self._phones()[entry['phone']]
+            self._unindex(record_id, self._records[record_id])
+            contact = fields_to_contact(entry['contact'])
+            self._records[record_id] = contact
+            self._index(record_id, contact)
+        elif operation == 'delete':
+            self._remove(self._phones()[entry['phone']])
+        elif operation == 'clear':
+            self._rebuild([])
+        elif operation == 'sort':
+            # Written by versions whose sort_contacts reordered the listing; sorting no longer changes anything
+            self._rebuild(PhoneBook.sort_contacts(self, entry['key'], entry['reverse']))
+        else:
+            raise ValueError(f"Unknown journal operation {operation}")
+
+    def _record(self, operation, **arguments):
+        # Journal a change. Raise whatever the journal raises, e.g. an OSError for a full disk, so that the caller
+        # can undo or skip the change in memory.
+        if self._journaling:
+            self._journal.append(operation, **arguments)
+
+    def _compact_if_due(self):
+        # Compact after compact_every changes, inside the change that reaches the count. The change is already
+        # durable in the journal, so a compaction that fails is only logged, and tried again after the next change.
+        if not self._journaling:
+            return
+        self._changes_since_compaction += 1
+        if self.compact_every and self._changes_since_compaction >= self.compact_every:
+            try:
+                self.compact()
+            except OSError as error:
+                logger.error("Compaction into %s failed: %s", self.snapshot_path, error)
+
+    def _insert(self, contact):
+        # Every way of adding contacts (add, import, bulk import) goes through here.
+        # The entry holds the stored contact, so it is journaled after the insert, which is undone if that fails.
+        record_id = super()._insert(contact)
+        try:
+            self._record('add', contact=contact_to_fields(contact))
+        except BaseException:
+            self._remove(record_id)
+            self._next_id = record_id
+            raise
+        self._compact_if_due()
+        return record_id
+
+    def update_contact(self, contact, **kwargs):
+        old_fields = contact_to_fields(contact)
+        super().update_contact(contact, **kwargs)
+        try:
+            self._record('update', phone=old_fields[2], contact=contact_to_fields(contact))
+        except BaseException:
+            # Put the old values back in place, in the object the caller holds and in every index
+            record_id = self._find(contact)
+            self._unindex(record_id, contact)
+            for name, value in zip(Contact.__slots__, old_fields):
+                setattr(contact, name, value)
+            self._records[record_id] = contact
+            self._index(record_id, contact)
+            raise
+        self._compact_if_due()
+
+    def delete_contact(self, contact):
+        # Nothing can fail once the contact is found, so the entry is journaled first, as in a write-ahead log
+        self._find(contact)
+        self._record('delete', phone=contact.phone_number)
+        super().delete_contact(contact)
+        self._compact_if_due()
+
+    def delete_all_contacts(self):
+        self._record('clear')
+        super().delete_all_contacts()
+        self._compact_if_due()
+
+    def compact(self):
+        '''
+            Save all contacts to the snapshot, with the journal's current sequence number, then empty the journal.
+            A crash in between is harmless: replay skips the entries the snapshot already includes.
+        '''
+        self._journal.sync()
+        self._write_snapshot(self.snapshot_path, self._journal.sequence)
+        self._journal.truncate()
+        self._changes_since_compaction = 0
+        logger.info("Journal compacted into %s at entry %d", self.snapshot_path, self._journal.sequence)
+
+    def sync(self):
+        self._journal.sync()
+
+    def close(self):
+        self._journal.close()
+        if isinstance(self._records, SnapshotStore):
+            self._records.close()
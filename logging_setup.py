@@ -0,0 +1,218 @@
+# This file configures the phone book's logging. Nothing is set up on import: applications call configure_logging()
+# once at startup, and until they do, the phone book modules log through Python's default handling.
+# Records are put on an in-memory queue by the thread that logs them and written to the log file by a background
+# thread in batches, flushing once per batch, so that file I/O stays off the request path. The log file can be
+# rotated by size or by time. Messages use %-style arguments, which are only formatted for records that are emitted,
+# and result sets are logged as a count and a small sample of phone numbers.
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+
+LOG_FILE = 'phonebook.log'
+LOG_FORMAT = '%(asctime)s - %(message)s'
+SAMPLE_SIZE = 5  # Phone numbers of the first results included when logging a result set
+BATCH_SIZE = 256  # Most records written between two flushes of the log file
+FLUSH_INTERVAL = 0.05  # Seconds the writer waits for more records before flushing a partial batch
+# Attributes every LogRecord has; the others were passed as extra and are added to JSON records as fields
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {'message', 'asctime'}
+
+_writer = None  # LogWriter of the current configuration
+_queue_handler = None  # EnqueueHandler installed on the root logger by the current configuration
+
+
+class JsonFormatter(logging.Formatter):
+    '''
+        Format each record as one JSON object with its time, level, logger name and message,
+        plus every field passed to the logging call as extra, e.g. count and sample.
+    '''
+    def format(self, record):
+        import json  # Imported by the writer's thread on the first record, not when the application starts
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in STANDARD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class EnqueueHandler(logging.Handler):
+    '''
+        Handler that puts records on a queue for a LogWriter.
+        The message is merged with its arguments on the logging thread, as QueueHandler does, so that a contact
+        updated right after the call is logged as it was; the rest of the formatting is left to the writer's thread.
+        Unlike QueueHandler it does not copy the record or format the whole line.
+        The writer, if given, is started by the first record, so that a run that logs nothing never starts it.
+    '''
+    def __init__(self, log_queue, writer=None):
+        super().__init__()
+        self.queue = log_queue
+        self.writer = writer
+
+    def handle(self, record):
+        # No filters and no handler lock: putting on the queue is already thread-safe
+        record.msg = record.getMessage()
+        record.args = None
+        self.queue.put(record)
+        if self.writer is not None and not self.writer.started:
+            self.writer.start()
+        return True
+
+    emit = handle
+
+
+class LogWriter:
+    '''
+        Background thread that takes records off a queue and writes them to a file handler in batches.
+        A batch ends when it holds batch_size records or when no record arrived for flush_interval seconds,
+        and the file is flushed once per batch instead of once per record.
+        Rotating handlers are rolled over between records as usual, and a handler created with delay=True
+        opens its file when the first batch is written.
+    '''
+    _STOP = object()
+
+    def __init__(self, log_queue, handler, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.queue = log_queue
+        self.handler = handler
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._rotating = hasattr(handler, 'shouldRollover')  # RotatingFileHandler or TimedRotatingFileHandler
+        self.started = False
+        self._stopped = False
+        self._thread = None
+        self._start_lock = threading.Lock()  # Several threads may log their first record at once
+
+    def start(self):
+        '''
+            Start the thread, unless it was already started or the writer was stopped.
+        '''
+        with self._start_lock:
+            if self.started or self._stopped:
+                return
+            self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+            self._thread.start()
+            self.started = True
+
+    def stop(self):
+        '''
+            Write out every record queued so far, stop the thread and close the file. Does nothing if already stopped.
+        '''
+        with self._start_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+        if self._thread is not None:
+            self.queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+        self.handler.close()
+
+    def _run(self):
+        get = self.queue.get
+        stopping = False
+        while not stopping:
+            record = get()
+            if record is self._STOP:
+                break
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    record = get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if record is self._STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+            self._write(batch)
+
+    def _write(self, records):
+        # Emit the records without the flush FileHandler.emit does after each one, then flush once
+        handler = self.handler
+        handler.acquire()
+        try:
+            if handler.stream is None:
+                handler.stream = handler._open()  # As FileHandler.emit does for a delayed file
+            for record in records:
+                try:
+                    if self._rotating and handler.shouldRollover(record):
+                        handler.doRollover()
+                    handler.stream.write(handler.format(record) + handler.terminator)
+                except Exception:
+                    handler.handleError(record)
+            handler.flush()
+        finally:
+            handler.release()
+
+
+def configure_logging(filename=LOG_FILE, level=logging.INFO, json_format=False, max_bytes=0, backup_count=5,
+                      when=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+    '''
+        Send the records of every logger at the given level or above to the file through a background LogWriter.
+        With json_format, each line is a JSON object instead of "time - message".
+        Rotation keeps backup_count old files, e.g. phonebook.log.1, and happens either:
+        - once the file would grow past max_bytes, if max_bytes is given
+        - at the interval named by when, e.g. 'midnight' or 'H', as for TimedRotatingFileHandler
+        Nothing is opened or started until the first record: the file is created and the writer's thread started then,
+        so a run that logs nothing leaves no log file behind.
+        Calling it again replaces the previous configuration, after writing out the records it still held.
+        Raise a ValueError if both max_bytes and when are given. Return the LogWriter.
+    '''
+    global _writer, _queue_handler
+    if max_bytes and when:
+        raise ValueError("Rotate the log either by size or by time, not both")
+    shutdown_logging()
+    if max_bytes or when:
+        # logging.handlers imports socket and pickle, which a short-lived CLI run would otherwise pay for on every start
+        from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+    if max_bytes:
+        file_handler = RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+    elif when:
+        file_handler = TimedRotatingFileHandler(filename, when=when, backupCount=backup_count, encoding='utf-8', delay=True)
+    else:
+        file_handler = logging.FileHandler(filename, encoding='utf-8', delay=True)
+    file_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    _writer = LogWriter(log_queue, file_handler, batch_size, flush_interval)
+    _queue_handler = EnqueueHandler(log_queue, _writer)
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    return _writer
+
+
+@atexit.register
+def shutdown_logging():
+    '''
+        Write out the queued records, close the log file and remove the configuration made by configure_logging.
+        Also runs when the interpreter exits.
+    '''
+    global _writer, _queue_handler
+    if _writer is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _writer.stop()
+    _writer = None
+    _queue_handler = None
+
+
+def log_results(logger, results, description, *args):
+    '''
+        Log a list of result contacts at INFO level as "description: N contacts, first [phone numbers]".
+        description is a %-style format for args. Nothing is computed when INFO is disabled for the logger,
+        and the contacts themselves are never formatted.
+    '''
+    if logger.isEnabledFor(logging.INFO):
+        sample = [contact.phone_number for contact in islice(results, SAMPLE_SIZE)]
+        logger.info(description + ": %d contacts, first %s", *args, len(results), sample,
+                    extra={'count': len(results), 'sample': sample})
@@ -1,29 +1,302 @@
 # This file will manage CRUD operations for the phonebook application.
 
-import csv
 import logging
-from contact import Contact
-# Configure logging
-logging.basicConfig(filename='phonebook.log', level=logging.INFO, format='%(asctime)s - %(message)s')
+import os
+from collections.abc import Sequence
+from itertools import islice
+from operator import attrgetter
+from contact import Contact, timestamp_range
+from indexes import GroupIndex, NGramIndex, SortedIndex, SortedView
+from logging_setup import log_results
+from snapshot import SnapshotPhoneIndex, SnapshotStore, sync_directory, write_snapshot
+
+logger = logging.getLogger(__name__)
 
 ORDER_DICT_LOGGING = {False: "ascending", True: "descending"} # Dictionary to map boolean values to string values. Static
+SORT_KEYS = ('first_name', 'last_name', 'phone_number', 'email', 'address', 'created_at', 'updated_at')
+GROUP_KEYS = ('first_name', 'last_name', 'phone_number', 'email', 'address')  # Attributes that can be grouped by initial letter
+# Time attributes are compared through the integer timestamps behind them, without building datetimes
+TIMESTAMP_ATTRIBUTES = {'created_at': 'created_timestamp', 'updated_at': 'updated_timestamp'}
+OPTIONAL_ATTRIBUTES = ('email', 'address')  # Attributes that may be None
+
+
+def sort_key(attributes):
+    '''
+        Return the key function of a sort by a tuple of attribute names.
+        None, for a missing email or address, sorts before every value, as NULL does in SQLite.
+    '''
+    def attribute_key(attribute):
+        get_value = attrgetter(TIMESTAMP_ATTRIBUTES.get(attribute, attribute))
+        if attribute not in OPTIONAL_ATTRIBUTES:
+            return get_value
+        return lambda contact: (False, "") if (value := get_value(contact)) is None else (True, value)
+    keys = [attribute_key(attribute) for attribute in attributes]
+    if len(keys) == 1:
+        return keys[0]
+    return lambda contact: tuple(key(contact) for key in keys)
+
+
+def page(contacts, offset=0, limit=None):
+    '''
+        Return a list of the contacts from position offset of an iterable, at most limit of them (all with None).
+        Only reads the iterable up to the end of the page, so the first pages are cheap whatever its length.
+    '''
+    return list(islice(contacts, offset, None if limit is None else offset + limit))
+
+
+class ContactsView(Sequence):
+    '''
+        Read-only sequence of the contacts of a phone book, in listing order, that follows its later changes.
+        It holds no copy: len() asks the phone book and iteration reads iter_contacts(), so the phone book must not be
+        changed while iterating, as for iter_contacts. Indexing reads the contacts up to the position, and slicing
+        returns a list. Compares equal to any list or tuple of the same contacts.
+    '''
+    __slots__ = ('_phonebook',)
+
+    def __init__(self, phonebook):
+        self._phonebook = phonebook
+
+    def __len__(self):
+        return len(self._phonebook)
+
+    def __iter__(self):
+        return iter(self._phonebook.iter_contacts())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.step is None and (index.start or 0) >= 0 and (index.stop is None or index.stop >= 0):
+                return list(islice(self, index.start, index.stop))
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if index >= 0:
+            for contact in islice(self, index, None):
+                return contact
+        raise IndexError("contact index out of range")
+
+    def __eq__(self, other):
+        if isinstance(other, (ContactsView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ContactsView({list(self)!r})"
+
 
 class PhoneBook:
-    def __init__(self):
-        self.contacts = []  # List to store Contact objects
+    def __init__(self, store=None, search_index=True):
+        # Record id -> Contact, in listing order. By default a plain dict, which keeps insertion order.
+        # Pass a contact_store.ContactStore to keep the contacts in compact columns instead.
+        self._records = {} if store is None else store
+        # The trigram indexes take more memory than a ContactStore's contacts; without them, searches scan every contact
+        self.search_index = search_index
+        self._reset_indexes()
+
+    def _reset_indexes(self):
+        # Each index is built from the stored contacts on its own first use, then kept up to date by every change,
+        # so that opening a large store is instant and a lookup never waits for the search indexes.
+        # None means not built yet.
+        self._phone_index = None  # Phone number -> record id. Primary index, phone numbers are unique
+        self._name_grams = None  # Trigrams of the lowercased first and last names
+        self._phone_grams = None  # Trigrams of the phone numbers
+        # Timestamp attribute -> SortedIndex of the contacts by it, built by the first time range search on it
+        self._time_indexes = {}
+        # Attribute names -> (sort key function, SortedView of the contacts by that key), built by the first sort on them
+        self._sort_views = {}
+        # Grouping name -> (group function, GroupIndex of the contacts by group), built by the first use of the grouping
+        self._group_indexes = {}
+        self._next_id = None  # Record id handed to the next inserted contact, found on the first insert
+
+    @property
+    def contacts(self):
+        '''
+            Read-only ContactsView of all contacts in the phone book, in insertion order, without copying them.
+            Use len(phonebook) to count them and iter_contacts() or list_contacts() to read them.
+        '''
+        return ContactsView(self)
+
+    def __len__(self):
+        return len(self._records)
+
+    def _drop_secondary_indexes(self):
+        # Drop every index but the phone index, which detects duplicates, so that each is rebuilt in one pass by its
+        # next use. Cheaper than keeping them up to date contact by contact when many contacts are added at once.
+        phone_index, next_id = self._phone_index, self._next_id
+        self._reset_indexes()
+        self._phone_index, self._next_id = phone_index, next_id
+
+    def _phones(self):
+        # Return the phone index, building it on first use. A snapshot stores its own, which is used in place.
+        if self._phone_index is None:
+            if isinstance(self._records, SnapshotStore) and self._records.has_phone_index:
+                self._phone_index = SnapshotPhoneIndex(self._records)
+            else:
+                self._phone_index = {contact.phone_number: record_id for record_id, contact in self._records.items()}
+        return self._phone_index
+
+    def _search_indexes(self):
+        # Return the name and phone trigram indexes, building both in one pass on the first search,
+        # or None without search_index
+        if not self.search_index:
+            return None
+        if self._name_grams is None:
+            name_grams = NGramIndex()
+            phone_grams = NGramIndex()
+            for record_id, contact in self._records.items():
+                name_grams.add(record_id, contact.first_name.lower(), contact.last_name.lower())
+                phone_grams.add(record_id, contact.phone_number)
+            # _name_grams last: once it is set, both are (ThreadSafePhoneBook reads it without a lock)
+            self._phone_grams = phone_grams
+            self._name_grams = name_grams
+        return self._name_grams, self._phone_grams
+
+    def _time_index(self, attribute):
+        # Return the SortedIndex of the contacts by a timestamp attribute, sorting it once on its first use
+        # rather than keeping it sorted contact by contact, which costs O(n) per contact out of timestamp order
+        index = self._time_indexes.get(attribute)
+        if index is None:
+            get_timestamp = attrgetter(attribute)
+            index = SortedIndex((get_timestamp(contact), record_id) for record_id, contact in self._records.items())
+            self._time_indexes[attribute] = index
+        return index
+
+    def _insert(self, contact):
+        '''
+            Store a validated contact and add it to every index.
+            Raise a ValueError if another contact already uses the same phone number.
+        '''
+        if contact.phone_number in self._phones():
+            raise ValueError(f"A contact with phone number {contact.phone_number} already exists.")
+        if self._next_id is None:
+            records = self._records
+            self._next_id = records.next_record_id if isinstance(records, SnapshotStore) else max(records, default=-1) + 1
+        record_id = self._next_id
+        self._next_id += 1
+        self._records[record_id] = contact
+        self._index(record_id, contact)
+        return record_id
+
+    def _remove(self, record_id):
+        '''
+            Remove a stored contact from every index.
+        '''
+        contact = self._records.pop(record_id)
+        self._unindex(record_id, contact)
+        return contact
+
+    def _index(self, record_id, contact):
+        # Add the contact's current attribute values to every index built so far
+        if self._phone_index is not None:
+            self._phone_index[contact.phone_number] = record_id
+        if self._name_grams is not None:
+            self._name_grams.add(record_id, contact.first_name.lower(), contact.last_name.lower())
+            self._phone_grams.add(record_id, contact.phone_number)
+        for attribute, index in self._time_indexes.items():
+            index.add(getattr(contact, attribute), record_id)
+        for get_key, view in self._sort_views.values():
+            view.add(get_key(contact), record_id)
+        for get_group, groups in self._group_indexes.values():
+            groups.add(get_group(contact), record_id)
+
+    def _unindex(self, record_id, contact):
+        # Remove the contact's current attribute values from every index built so far
+        if self._phone_index is not None:
+            del self._phone_index[contact.phone_number]
+        if self._name_grams is not None:
+            self._name_grams.remove(record_id, contact.first_name.lower(), contact.last_name.lower())
+            self._phone_grams.remove(record_id, contact.phone_number)
+        for attribute, index in self._time_indexes.items():
+            index.remove(getattr(contact, attribute), record_id)
+        for get_key, view in self._sort_views.values():
+            view.remove(get_key(contact), record_id)
+        for get_group, groups in self._group_indexes.values():
+            groups.remove(get_group(contact), record_id)
+
+    def _find(self, contact):
+        '''
+            Return the record id of a contact stored in this phone book.
+            Raise a ValueError if the contact is not in the phone book.
+        '''
+        # Contacts are identified by their phone number, so that copies read back from a store are found as well
+        record_id = self._phones().get(contact.phone_number)
+        if record_id is None:
+            raise ValueError("Contact is not in the phone book.")
+        return record_id
+
+    def _rebuild(self, contacts):
+        '''
+            Replace the stored contacts with the given ones, in the given order, and rebuild every index.
+        '''
+        contacts = list(contacts)  # The contacts may be read from the store being replaced
+        self._records.clear()
+        for record_id, contact in enumerate(contacts):
+            self._records[record_id] = contact
+        self._reset_indexes()
+
+    def _write_snapshot(self, path, sequence=0):
+        # Save every contact to a snapshot file, with the journal sequence number it includes
+        records = self._records
+        if not (isinstance(records, SnapshotStore) and os.path.exists(path) and os.path.samefile(records.path, path)):
+            write_snapshot(records.values(), len(records), path, sequence)
+            return
+        # The contacts are read from the mapping of that very file, which Windows does not let anything replace:
+        # write the new snapshot next to it, close the mapping, rename, and continue from the new file.
+        # Its record ids follow the listing order from 0, so every index is rebuilt by its next use.
+        new_path = path + ".new"
+        write_snapshot(records.values(), len(records), new_path, sequence)
+        records.close()
+        os.replace(new_path, path)
+        sync_directory(path)
+        self._records = SnapshotStore(path, verify=False)
+        self._reset_indexes()
+
+    def save_snapshot(self, path):
+        '''
+            Save all contacts to a binary snapshot file that load_snapshot can open without parsing it.
+            The file is replaced in one step once it is complete. Saving over the snapshot this phone book was loaded from
+            reopens the phone book on the new file, which also drops the changes it kept in memory.
+        '''
+        self._write_snapshot(path)
+        logger.info("Snapshot of %d contacts saved to %s", len(self._records), path)
+
+    @classmethod
+    def load_snapshot(cls, path, verify=True):
+        '''
+            Return a phone book over a snapshot saved by save_snapshot.
+            The file is memory-mapped rather than read, and contacts are only decoded when they are accessed,
+            so opening takes the same time whatever the size of the phone book.
+            The snapshot's phone index answers lookups by phone number and changes in place, by binary search;
+            the other indexes are each built on their first use, e.g. the search indexes on the first search.
+            With verify, the file's checksums are checked first, which reads it once.
+            Raise a snapshot.SnapshotError (a ValueError) if the file is not a valid snapshot.
+        '''
+        return cls(store=SnapshotStore(path, verify))
 
     def add_contact(self, first_name, last_name, phone_number, email=None, address=None):
         '''
             Create a new contact with the provided attributes.
-            Raise a ValueError if the contact cannot be created due to missing or invalid attributes.
+            Return the new contact.
+            Raise a ValueError if the contact cannot be created due to missing or invalid attributes,
+            or if another contact already uses the same phone number.
         '''
         try:
             new_contact = Contact(first_name, last_name, phone_number, email, address)
-            self.contacts.append(new_contact)
+            self._insert(new_contact)
         except ValueError as ve:
             # Log the error and re-raise it to be handled by CLI
-            logging.error(f"Failed to add new contact: {ve}")
+            logger.error("Failed to add new contact: %s", ve)
             raise ve
+        return new_contact
+
+    def get_by_phone(self, phone_number):
+        '''
+            Return the contact with exactly the given phone number in O(1).
+            Return None if no contact uses that phone number.
+        '''
+        record_id = self._phones().get(phone_number)
+        if record_id is None:
+            return None
+        return self._records[record_id]
         
 
     def import_contacts(self, csv_file):
@@ -32,6 +305,7 @@ class PhoneBook:
             The first row of the CSV file should be the header row.
             Raise a ValueError if the file is not found, cannot be read, or has invalid CSV format.
         '''
+        import csv  # Imported on first use, like bulk_import and bulk_export, to keep the CLI's startup short
         try:
             with open(csv_file, 'r') as file:
                 reader = csv.DictReader(file)
@@ -46,51 +320,106 @@ class PhoneBook:
                         self.add_contact(first_name, last_name, phone_number, email, address)
                     except ValueError as ve:
                         # Log the error and continue to the next row
-                        logging.error(f"Error in row{reader.line_num}: {ve}")
+                        logger.error("Error in row%d: %s", reader.line_num, ve)
                         print(f"Skipping invalid row{reader.line_num}: {ve}")
                         continue
         
         except FileNotFoundError:
-            logging.error(f"File not found: {csv_file}")
+            logger.error("File not found: %s", csv_file)
             print(f"File not found: {csv_file}")
         except IOError as ioe:
-            logging.error(f"Error reading file {csv_file}: {ioe}")
+            logger.error("Error reading file %s: %s", csv_file, ioe)
             print(f"Error reading file {csv_file}: {ioe}")
         except csv.Error as cve:
-            logging.error(f"CSV parsing error in file {csv_file} : {cve}")
+            logger.error("CSV parsing error in file %s : %s", csv_file, cve)
             print(f"Invalid CSV format in file {csv_file}: {cve}")       
                 
 
-    def search_contact(self, keyword):
+    def bulk_import_contacts(self, csv_file, errors_file=None, chunk_size=10000, workers=1):
+        '''
+            Import contacts from a large CSV file, reading and validating it chunk_size rows at a time.
+            With workers > 1, the file is split into byte ranges that are parsed and validated in that many processes,
+            and the contacts are added in file order. Quoted fields must not contain line breaks in that mode.
+            Invalid rows and duplicate phone numbers are skipped without printing anything;
+            they are written to errors_file as CSV, with their line numbers, when it is given.
+            Return an ImportSummary with the rows read, accepted and rejected, the elapsed time and the rows per second.
+            Raise a ValueError if the file cannot be read or lacks a required column.
+        '''
+        import bulk_import
+        return bulk_import.import_csv(self, csv_file, errors_file, chunk_size, workers)
+
+    def iter_search_contact(self, keyword):
+        '''
+            Yield the contacts that match the keyword (name or phone number), in listing order, as they are found.
+            Matches the same contacts as search_contact. The phone book must not be changed while iterating.
+        '''
+        lowered = keyword.lower()
+        indexes = self._search_indexes()
+        name_candidates = phone_candidates = None
+        if indexes is not None:
+            name_grams, phone_grams = indexes
+            name_candidates = name_grams.candidates(lowered)
+            phone_candidates = phone_grams.candidates(keyword)
+        if name_candidates is None or phone_candidates is None:
+            # No search index, or keyword too short to narrow down: fall back to checking every contact
+            candidates = self._records.values()
+        else:
+            # Record ids follow the listing order, so sorting them keeps the results in the same order as a full scan
+            candidates = (self._records[record_id] for record_id in sorted(name_candidates | phone_candidates))
+        return (contact for contact in candidates if lowered in contact.first_name.lower() or lowered in contact.last_name.lower() or keyword in contact.phone_number)
+
+    def search_contact(self, keyword, offset=0, limit=None):
         '''
             Search for contacts by keyword (name or phone number).
             Return a list of contacts that match the keyword.
             Return an empty list if no contacts are found.
+            Names are matched case-insensitively, phone numbers as typed.
+            Keywords of at least three characters are answered from the trigram indexes,
+            unless the phone book was created with search_index=False.
+            With offset and limit, return only that page of the results.
         '''
-        results = [contact for contact in self.contacts if keyword.lower() in contact.first_name.lower() or keyword.lower() in contact.last_name.lower() or keyword in contact.phone_number]
-        logging.info(f"Search results for '{keyword}': {results}")
+        results = page(self.iter_search_contact(keyword), offset, limit)
+        log_results(logger, results, "Search results for '%s'", keyword)
         return results
-    
-    def search_contact_by_updated_time(self, start_time, end_time):
+
+    def iter_search_contact_by_updated_time(self, start_time, end_time):
+        '''
+            Yield the contacts updated within the time range, ordered by updated time.
+            The phone book must not be changed while iterating.
+        '''
+        index = self._time_index('updated_timestamp')
+        return (self._records[record_id] for record_id in index.iter_range(*timestamp_range(start_time, end_time)))
+
+    def search_contact_by_updated_time(self, start_time, end_time, offset=0, limit=None):
         '''
             Search for contacts updated within a specific time range.
             Raise a ValueError if the start time is greater than the end time. 
-            Return a list of contacts that were updated within the specified time range.
+            Return a list of contacts that were updated within the specified time range, ordered by updated time.
             Return an empty list if no contacts are found.
+            With offset and limit, return only that page of the results.
         '''
-        results = [contact for contact in self.contacts if start_time <= contact.updated_at <= end_time]
-        logging.info(f"Search results for contacts updated between {start_time} and {end_time}: {results}")
+        results = page(self.iter_search_contact_by_updated_time(start_time, end_time), offset, limit)
+        log_results(logger, results, "Search results for contacts updated between %s and %s", start_time, end_time)
         return results
-    
-    def search_contact_by_created_time(self, start_time, end_time):
+
+    def iter_search_contact_by_created_time(self, start_time, end_time):
+        '''
+            Yield the contacts created within the time range, ordered by created time.
+            The phone book must not be changed while iterating.
+        '''
+        index = self._time_index('created_timestamp')
+        return (self._records[record_id] for record_id in index.iter_range(*timestamp_range(start_time, end_time)))
+
+    def search_contact_by_created_time(self, start_time, end_time, offset=0, limit=None):
         '''
             Search for contacts created within a specific time range.
             Raise a ValueError if the start time is greater than the end time. 
-            Return a list of contacts that were created within the specified time range.
+            Return a list of contacts that were created within the specified time range, ordered by created time.
             Return an empty list if no contacts are found.
+            With offset and limit, return only that page of the results.
         '''
-        results = [contact for contact in self.contacts if start_time <= contact.created_at <= end_time]
-        logging.info(f"Search results for contacts created between {start_time} and {end_time}: {results}")
+        results = page(self.iter_search_contact_by_created_time(start_time, end_time), offset, limit)
+        log_results(logger, results, "Search results for contacts created between %s and %s", start_time, end_time)
         return results
 
 
@@ -99,99 +428,198 @@ class PhoneBook:
             Update a contact with the provided keyword arguments.
             The **kwargs parameter is a special syntax in Python that allows the method to accept an arbitrary number of keyword arguments.
             These keyword arguments are passed as a dictionary, where the keys are the argument names and the values are the corresponding values.
-            Raise a ValueError if the contact cannot be updated due to missing or invalid attributes.
+            Raise a ValueError if the contact cannot be updated due to missing or invalid attributes,
+            or if the new phone number is already used by another contact.
         '''
         try:
-            contact.update_contact(**kwargs)
+            record_id = self._find(contact)
+            old_phone_number = contact.phone_number
+            new_phone_number = kwargs.get('phone_number')
+            if new_phone_number and new_phone_number != old_phone_number and new_phone_number in self._phones():
+                raise ValueError(f"A contact with phone number {new_phone_number} already exists.")
+            # Take the old values out of the indexes and put the new ones back, even if the update fails.
+            # This also moves the contact to its new position in the updated time index.
+            self._unindex(record_id, self._records[record_id])
+            try:
+                contact.update_contact(**kwargs)
+            finally:
+                # Write the contact back, in case the store keeps copies rather than the objects themselves
+                self._records[record_id] = contact
+                self._index(record_id, contact)
         except ValueError as ve:
             # Log the error and re-raise it to be handled by CLI
-            logging.error(f"Failed to update contact: {ve}")
+            logger.error("Failed to update contact: %s", ve)
+            raise ve
         
         
     def delete_contact(self, contact):
         '''
-            Delete a contact from the phone book.
+            Delete a contact from the phone book in O(1).
+            Raise a ValueError if the contact is not in the phone book.
         '''
-        self.contacts.remove(contact)
-        logging.info(f"Contact deleted: {contact}")
+        self._remove(self._find(contact))
+        logger.info("Contact deleted: %s", contact)
     
     def delete_all_contacts(self):
         '''
             Delete all contacts from the phone book.
         '''
-        self.contacts = []
-        logging.info("All contacts deleted.")
+        self._rebuild([])
+        logger.info("All contacts deleted.")
+
+    def iter_contacts(self):
+        '''
+            Yield all contacts in listing order, one at a time. The phone book must not be changed while iterating.
+        '''
+        return iter(self._records.values())
 
-    def list_contacts(self):
+    def list_contacts(self, offset=0, limit=None):
         '''
             List all contacts in the phone book.
             Return a list of all contacts.
+            With offset and limit, return only the contacts from position offset, at most limit of them.
         '''
-        logging.info("Listing all contacts.")
-        return self.contacts
+        logger.info("Listing all contacts.")
+        return page(self.iter_contacts(), offset, limit)
     
-    def sort_contacts(self, key='first_name', reverse=False):
+    def _sort_view(self, key):
+        '''
+            Return the SortedView of the contacts by an attribute name or a sequence of them,
+            building it on the first sort by those attributes. Every later change keeps it up to date.
+            Raise a ValueError if a name is not a sortable attribute of the Contact class.
+        '''
+        attributes = (key,) if isinstance(key, str) else tuple(key)
+        entry = self._sort_views.get(attributes)
+        if entry is None:
+            unknown = [attribute for attribute in attributes if attribute not in SORT_KEYS]
+            if unknown or not attributes:
+                raise ValueError(f"Cannot sort by {', '.join(unknown) or 'no attribute'}")
+            get_key = sort_key(attributes)
+            entry = (get_key, SortedView((get_key(contact), record_id) for record_id, contact in self._records.items()))
+            self._sort_views[attributes] = entry
+        return entry[1]
+
+    def iter_sorted_contacts(self, key='first_name', reverse=False):
+        '''
+            Yield the contacts sorted by the key, as sort_contacts orders them, one at a time.
+            The phone book must not be changed while iterating.
+        '''
+        return map(self._records.__getitem__, self._sort_view(key).iter_ids(reverse))
+
+    def sort_contacts(self, key='first_name', reverse=False, offset=0, limit=None):
         '''
             Sort contacts by the specified key.
             Return a list of sorted contacts.
-            The key parameter specifies the attribute to sort by (e.g., 'first_name', 'last_name', 'phone_number', 'email', 'address').
+            The key parameter specifies the attribute to sort by (e.g., 'first_name', 'last_name', 'phone_number', 'email', 'address'),
+            or a sequence of attributes to break ties with, e.g. ('last_name', 'first_name').
             By default, contacts are sorted by first name in ascending order.
+            Contacts with equal keys keep their listing order, as with a stable sort. The listing order itself is not changed.
+            The first sort by a key builds a sorted view that later changes keep up to date, so sorting again only reads it.
+            With offset and limit, return only that page of the results.
             Raise a ValueError if the key is not a valid attribute of the Contact class.
         '''
-        # Sort contacts by the specified key
-        self.contacts.sort(key=lambda x: getattr(x, key), reverse=reverse)
-        logging.info(f"Contacts sorted by {key} in {ORDER_DICT_LOGGING[reverse]} order.")
-        return self.contacts
+        contacts = page(self.iter_sorted_contacts(key, reverse), offset, limit)
+        logger.info("Contacts sorted by %s in %s order.", key, ORDER_DICT_LOGGING[reverse])
+        return contacts
     
+    def _group_index(self, name, get_group):
+        # Return the GroupIndex of the grouping, building it on the grouping's first use; every later change keeps it up to date
+        entry = self._group_indexes.get(name)
+        if entry is None:
+            entry = (get_group, GroupIndex((get_group(contact), record_id) for record_id, contact in self._records.items()))
+            self._group_indexes[name] = entry
+        return entry[1]
+
+    def _initial_letter_index(self, key):
+        if key not in GROUP_KEYS:
+            raise ValueError(f"Cannot group by {key}")
+        # Contacts without a value, e.g. no email, are grouped under ""
+        get_value = attrgetter(key)
+        return self._group_index(('initial', key), lambda contact: (get_value(contact) or "")[:1].upper())
+
+    def _area_code_index(self):
+        return self._group_index('area_code', lambda contact: contact.phone_number[1:4])
+
+    def _groups(self, groups):
+        # Dictionary of every group, sorted, to the list of its contacts in listing order
+        return {group: [self._records[record_id] for record_id in groups.members(group)] for group in groups.groups()}
+
     def group_contacts_by_initial_letter(self, key):
         '''
             Group contacts by the initial letter of the specified key.
             Return a dictionary where the keys are the initial letters and the values are lists of contacts.
             The key parameter specifies the attribute to group by (e.g., 'first_name', 'last_name', 'phone_number', 'email', 'address').
+            Contacts without a value for the key are grouped under "".
             Raise a ValueError if the key is not a valid attribute of the Contact class.
         '''
-        # Group contacts by the initial letter of the specified key
-        groups = {}
-        for contact in self.contacts:
-            initial = getattr(contact, key)[0].upper()
-            if initial not in groups:
-                groups[initial] = []
-            groups[initial].append(contact)
-        groups = dict(sorted(groups.items())) # Sort the dictionary by key
-        logging.info(f"Contacts grouped by initial letter of {key}: {groups}")
+        groups = self._groups(self._initial_letter_index(key))
+        logger.info("Contacts grouped by initial letter of %s: %d groups", key, len(groups))
         return groups
-    
+
+    def count_contacts_by_initial_letter(self, key, letter=None):
+        '''
+            Return the number of contacts whose key starts with the letter, in O(1).
+            Without a letter, return a dictionary of every initial letter, sorted, to its number of contacts.
+            Raise a ValueError if the key is not a valid attribute of the Contact class.
+        '''
+        groups = self._initial_letter_index(key)
+        return groups.counts() if letter is None else groups.count(letter.upper())
+
+    def get_contacts_by_initial_letter(self, key, letter):
+        '''
+            Return the contacts whose key starts with the letter, in listing order, without reading any other contact.
+            Raise a ValueError if the key is not a valid attribute of the Contact class.
+        '''
+        return [self._records[record_id] for record_id in self._initial_letter_index(key).members(letter.upper())]
+
     def group_contacts_by_area_code(self):
         '''
             Group contacts by the area code of their phone numbers.
             Return a dictionary where the keys are the area codes and the values are lists of contacts.
             Return an empty dictionary if no contacts have phone numbers.
         '''
-        # Group contacts by the area code of their phone numbers
-        groups = {}
-        for contact in self.contacts:
-            area_code = contact.phone_number[1:4]
-            if area_code not in groups:
-                groups[area_code] = []
-            groups[area_code].append(contact)
-        groups = dict(sorted(groups.items())) # Sort the dictionary by key
-        logging.info(f"Contacts grouped by area code: {groups}")
+        groups = self._groups(self._area_code_index())
+        logger.info("Contacts grouped by area code: %d groups", len(groups))
         return groups
-         
-    def export_contacts(self, csv_file):
+
+    def count_contacts_by_area_code(self, area_code=None):
+        '''
+            Return the number of contacts with the area code, in O(1).
+            Without an area code, return a dictionary of every area code, sorted, to its number of contacts.
+        '''
+        groups = self._area_code_index()
+        return groups.counts() if area_code is None else groups.count(area_code)
+
+    def get_contacts_by_area_code(self, area_code):
+        '''
+            Return the contacts with the area code, in listing order, without reading any other contact.
+        '''
+        return [self._records[record_id] for record_id in self._area_code_index().members(area_code)]
+
+    def export_contacts(self, csv_file, columns=None, include_timestamps=False, contacts=None, where=None, compression=None, buffer_size=None):
         '''
             Export contacts to a CSV file.
-            The CSV file will contain the following columns: first_name, last_name, phone_number, email, address.
-            Raise a ValueError if the contacts cannot be exported due to an IO error.
+            By default the CSV file will contain the following columns: first_name, last_name, phone_number, email, address.
+            The columns parameter selects a subset of them, and include_timestamps adds created_at and updated_at.
+            The contacts parameter exports any iterable of contacts, e.g. search results, instead of the whole phone book,
+            and where keeps only the contacts for which it returns True. Neither copies the contacts.
+            The file is gzip, bz2 or lzma compressed when compression says so or the file name ends in .gz, .bz2 or .xz.
+            Rows are written in blocks of about buffer_size bytes, bulk_export.DEFAULT_BUFFER_SIZE by default.
+            Return an ExportSummary with the rows and bytes written and the throughput, or None if the file cannot be written.
+            Raise a ValueError for an unknown column or compression.
         '''
+        import bulk_export
+        columns = bulk_export.export_columns(columns, include_timestamps)
+        if buffer_size is None:
+            buffer_size = bulk_export.DEFAULT_BUFFER_SIZE
+        if contacts is None:
+            contacts = self._records.values()
+        if where is not None:
+            contacts = filter(where, contacts)
         try:
-            with open(csv_file, 'w', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow(['first_name', 'last_name', 'phone_number', 'email', 'address'])
-                for contact in self.contacts:
-                    writer.writerow([contact.first_name, contact.last_name, contact.phone_number, contact.email, contact.address])
-                logging.info(f"Contacts exported to {csv_file}")
+            summary = bulk_export.export_csv(contacts, csv_file, columns, compression, buffer_size)
+            logger.info("Contacts exported to %s: %s", csv_file, summary)
+            return summary
         except IOError as ioe:
-            logging.error(f"Error writing to file {csv_file}: {ioe}")
+            logger.error("Error writing to file %s: %s", csv_file, ioe)
             print(f"Error writing to file {csv_file}: {ioe}")
-
@@ -1,15 +1,43 @@
 # This file will provide a command-line interface for users to interact with the phonebook application.
+import argparse
+import operator
+import os
+import re
+import sys
+from itertools import islice
 from phone_book import PhoneBook
-from contact import Contact
+from contact import Contact, to_timestamp
 from datetime import datetime
+from logging_setup import LOG_FILE, configure_logging
 
 ATTRIBUTE_DICT = {"1": "first_name", "2": "last_name", "3": "created_at", "4": "updated_at"}
+SORT_DICT = {"1": "first_name", "2": "last_name", "3": "created_at", "4": "updated_at", "5": ("last_name", "first_name")}
 ORDER_DICT = {"1": False, "2": True}
 GROUP_DICT = {"1": "first_name", "2": "last_name", "3": "phone_number"}
+PAGE_SIZE = 20  # Contacts printed before asking whether to show the next page
 
 class PhoneBookCLI:
-    def __init__(self):
-        self.phonebook = PhoneBook()
+    def __init__(self, phonebook=None):
+        # Any PhoneBook implementation can be used; an empty in-memory one by default
+        self.phonebook = phonebook if phonebook is not None else PhoneBook()
+
+    def print_pages(self, contacts, numbered=False):
+        '''
+            Print contacts PAGE_SIZE at a time, asking before every next page, so that only the pages shown are read.
+            With numbered, each contact is printed after its index.
+            Return the list of contacts printed.
+        '''
+        contacts = iter(contacts)
+        printed = []
+        page = list(islice(contacts, PAGE_SIZE))
+        while page:
+            for contact in page:
+                print(f"{len(printed)}: {contact}" if numbered else contact)
+                printed.append(contact)
+            page = list(islice(contacts, PAGE_SIZE))
+            if page and input("Enter 'n' for the next page or any other key to stop: ").lower() != "n":
+                break
+        return printed
 
     def create_single_contact(self):
         first_name = input("First Name (Required): ")
@@ -19,9 +47,9 @@ class PhoneBookCLI:
         address = input("Address (Optional): ")
 
         try:
-            self.phonebook.add_contact(first_name, last_name, phone_number, email, address)
+            new_contact = self.phonebook.add_contact(first_name, last_name, phone_number, email, address)
             print("Contact added successfully.")
-            print(f"New contact: {self.phonebook.contacts[-1]}")
+            print(f"New contact: {new_contact}")
         except ValueError as ve:
             print(f"Error: {ve}")
 
@@ -35,11 +63,7 @@ class PhoneBookCLI:
     
     def search_contact_by_name_or_phone_number(self):
         keyword = input("Search by name or phone number: ")
-        results = self.phonebook.search_contact(keyword)
-        if results:
-            for idx, contact in enumerate(results):
-                print(f"{idx}: {contact}")
-        else:
+        if not self.print_pages(self.phonebook.iter_search_contact(keyword), numbered=True):
             print("No contacts found.")
 
     def search_contact_by_updated_time(self):
@@ -66,11 +90,11 @@ class PhoneBookCLI:
             else:
                 break  
         # Search for contacts within the specified time range
-        contacts = self.phonebook.search_contact_by_updated_time(start_time, end_time)
+        contacts = self.phonebook.iter_search_contact_by_updated_time(start_time, end_time)
 
-        # Print the search results
-        for contact in contacts:
-            print(contact)
+        # Print the search results a page at a time
+        if not self.print_pages(contacts):
+            print("No contacts found.")
     
     def search_contact_by_created_time(self):
         '''
@@ -96,11 +120,11 @@ class PhoneBookCLI:
             else:
                 break  
         # Search for contacts within the specified time range
-        contacts = self.phonebook.search_contact_by_created_time(start_time, end_time)
+        contacts = self.phonebook.iter_search_contact_by_created_time(start_time, end_time)
 
-        # Print the search results
-        for contact in contacts:
-            print(contact)
+        # Print the search results a page at a time
+        if not self.print_pages(contacts):
+            print("No contacts found.")
 
     def group_contacts_by_initial_letter(self, key):
         contacts = self.phonebook.group_contacts_by_initial_letter(key)
@@ -136,10 +160,8 @@ class PhoneBookCLI:
 
     
     def list_all_contacts(self):
-        contacts = self.phonebook.list_contacts()
-        # Note that print(contacts) will result in printing None at the end.
-        for contact in contacts:
-            print(contact)
+        # Contacts are read as the pages are shown, so the first page appears at once however many there are
+        self.print_pages(self.phonebook.iter_contacts())
     
     def list_sorted_contacts(self):
         while True:
@@ -147,16 +169,17 @@ class PhoneBookCLI:
             print("2. Sort by Last Name")
             print("3. Sort by Created Time")
             print("4. Sort by Updated Time")
-            print("5. Return to main menu")
+            print("5. Sort by Last Name, then First Name")
+            print("6. Return to main menu")
             choice = input("Enter your choice: ")
-            if choice == "5":
+            if choice == "6":
                 return
-            if choice <= "0" or choice > "5":
-                print("Invalid choice. Please enter a number between 1 and 5.")
+            if choice not in SORT_DICT:
+                print("Invalid choice. Please enter a number between 1 and 6.")
                 continue
             else:
-                # Get the attribute and order for sorting
-                key = ATTRIBUTE_DICT[choice]
+                # Get the attribute(s) and order for sorting
+                key = SORT_DICT[choice]
                 while True:
                     print("1. Ascending order")
                     print("2. Descending order")
@@ -168,10 +191,10 @@ class PhoneBookCLI:
                         order = ORDER_DICT[choice]
                         break
                 break
-        contacts = self.phonebook.sort_contacts(key, order)
-        print("Contacts sorted by", key, "in", "ascending" if not order else "descending", "order:")
-        for contact in contacts:
-            print(contact)
+        # The sorted contacts are read from the phone book's sorted view as the pages are shown
+        contacts = self.phonebook.iter_sorted_contacts(key, order)
+        print("Contacts sorted by", key if isinstance(key, str) else ", then ".join(key), "in", "ascending" if not order else "descending", "order:")
+        self.print_pages(contacts)
 
     def update_contact(self):
         # Search cantact using keyword
@@ -182,8 +205,7 @@ class PhoneBookCLI:
             print("No contacts found.")
             return
         # Print the search results
-        for idx, contact in enumerate(results):
-            print(f"{idx}: {contact}")
+        self.print_pages(results, numbered=True)
         # Select contact to update
         contact_index = int(input("Enter contact index to update: "))
         # If the contact index is invalid, print message and return
@@ -217,8 +239,7 @@ class PhoneBookCLI:
             print("No contacts found.")
             return
         # Print the search results
-        for idx, contact in enumerate(results):
-            print(f"{idx}: {contact}")
+        self.print_pages(results, numbered=True)
         # Select contact to delete
         contact_index = input("Enter contact index to delete (Seperate multiple choices with ','): ")
 
@@ -268,7 +289,7 @@ class PhoneBookCLI:
             - Search to delete contacts
             - Delete all contacts
         6. Sort Contacts
-            - Sort contacts by first name, last name, created time, or updated time
+            - Sort contacts by first name, last name, created time, updated time, or last name then first name
             - Sort in ascending or descending order
             - Return to main menu
         7. Quit
@@ -330,9 +351,8 @@ class PhoneBookCLI:
                             break
 
             elif choice == "3":
-                contacts = self.phonebook.list_contacts()
                 # Print message if no contacts are found
-                if not contacts:
+                if len(self.phonebook) == 0:
                     print("No contacts found.")
                     continue
                 print("1. List all contacts")
@@ -385,7 +405,382 @@ class PhoneBookCLI:
                 print("Invalid time format. Please use YYYY-MM-DD.")
 
 
-if __name__ == "__main__":
-    phonebook_cli = PhoneBookCLI()
-    phonebook_cli.main()
+# Batch mode: phone_book_CLI.py [--snapshot FILE | --db FILE] COMMAND ...  runs one command and exits,
+# and the script command runs a file of such commands, one per line, against one loaded phone book.
+WHERE_PATTERN = re.compile(r'\s*(\w+)\s*(!=|<=|>=|=|~|<|>)\s*(.*?)\s*$')
+WHERE_OPERATORS = {
+    '=': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '~': lambda value, text: text in value.lower(),
+}
+WHERE_ATTRIBUTES = ('first_name', 'last_name', 'phone_number', 'email', 'address', 'area_code', 'created_at', 'updated_at')
+# A script line of plain words and whole words in quotes, without escapes or comments, which split_words splits
+# into the same words as shlex.split, several times faster; any other line is left to shlex
+SIMPLE_WORDS = re.compile(r'\s*(?:"([^"\\]*)"|\'([^\'\\]*)\'|([^\s\'"\\#]+))(?=\s|$)')
+TIMESTAMP_WHERE = {'created_at': operator.attrgetter('created_timestamp'), 'updated_at': operator.attrgetter('updated_timestamp')}
+# "import time:       394 |       1477 |     logging_setup", as written by python -X importtime
+IMPORT_TIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+PROFILE_MODULES = 30  # Slowest imports listed by --profile-startup
+
+
+def where_filter(conditions):
+    """
+    Return a function that is True for the contacts meeting every condition, such as "last_name=Smith",
+    "email~example.com" (contains, ignoring case), "area_code!=212" or "created_at>=2024-01-01".
+    Attributes are compared as text, a missing email or address as "", and created_at and updated_at as times.
+    Raise a ValueError for a condition that cannot be parsed.
+    """
+    tests = []
+    for condition in conditions:
+        match = WHERE_PATTERN.match(condition)
+        if match is None or match.group(1) not in WHERE_ATTRIBUTES:
+            raise ValueError(f"Invalid condition {condition!r}: expected ATTRIBUTE OPERATOR VALUE, with an attribute among "
+                             f"{', '.join(WHERE_ATTRIBUTES)} and an operator among {' '.join(WHERE_OPERATORS)}")
+        attribute, symbol, value = match.groups()
+        compare = WHERE_OPERATORS[symbol]
+        if attribute in TIMESTAMP_WHERE:
+            if symbol == '~':
+                raise ValueError(f"Invalid condition {condition!r}: times cannot be matched with ~")
+            get_value = TIMESTAMP_WHERE[attribute]
+            value = to_timestamp(datetime.fromisoformat(value))
+        elif attribute == 'area_code':
+            get_value = lambda contact: contact.phone_number[1:4]
+        else:
+            get_value = lambda contact, attribute=attribute: getattr(contact, attribute) or ""
+        if symbol == '~':
+            value = str(value).lower()
+        tests.append(lambda contact, get_value=get_value, compare=compare, value=value: compare(get_value(contact), value))
+    return lambda contact: all(test(contact) for test in tests)
+
 
+def print_contacts(contacts, as_json=False):
+    if as_json:
+        import json  # Only loaded when JSON is printed, like shlex below, to keep the startup short
+        contacts = (json.dumps(contact.to_dict()) for contact in contacts)
+    for contact in contacts:
+        print(contact)
+
+
+def found_contact(phonebook, phone_number):
+    contact = phonebook.get_by_phone(phone_number)
+    if contact is None:
+        raise ValueError(f"No contact with phone number {phone_number}")
+    return contact
+
+
+# Every command takes the phone book and its parsed arguments, and returns True if it changed the phone book
+def command_import(phonebook, args):
+    print(phonebook.bulk_import_contacts(args.file, args.errors, workers=args.workers))
+    return True
+
+
+def command_add(phonebook, args):
+    print(phonebook.add_contact(args.first_name, args.last_name, args.phone_number, args.email, args.address))
+    return True
+
+
+def command_get(phonebook, args):
+    print_contacts([found_contact(phonebook, args.phone_number)], args.json)
+    return False
+
+
+def command_update(phonebook, args):
+    fields = {name: getattr(args, name) for name in ('first_name', 'last_name', 'phone_number', 'email', 'address')
+              if getattr(args, name) is not None}
+    contact = found_contact(phonebook, args.phone)
+    phonebook.update_contact(contact, **fields)
+    print(contact)
+    return True
+
+
+def command_delete(phonebook, args):
+    phonebook.delete_contact(found_contact(phonebook, args.phone_number))
+    return True
+
+
+def command_delete_all(phonebook, args):
+    phonebook.delete_all_contacts()
+    return True
+
+
+def command_search(phonebook, args):
+    print_contacts(phonebook.search_contact(args.keyword, args.offset, args.limit), args.json)
+    return False
+
+
+def command_list(phonebook, args):
+    if args.sort:
+        contacts = phonebook.sort_contacts(args.sort.split(','), args.reverse, args.offset, args.limit)
+    else:
+        contacts = phonebook.list_contacts(args.offset, args.limit)
+    print_contacts(contacts, args.json)
+    return False
+
+
+def command_export(phonebook, args):
+    where = where_filter(args.where) if args.where else None
+    summary = phonebook.export_contacts(args.file, args.columns, args.timestamps, where=where)
+    if summary is None:
+        raise ValueError(f"Cannot write {args.file}")
+    print(summary)
+    return False
+
+
+def command_stats(phonebook, args):
+    area_codes = phonebook.count_contacts_by_area_code()
+    stats = {
+        'contacts': len(phonebook),
+        'area_codes': len(area_codes),
+        'top_area_codes': dict(sorted(area_codes.items(), key=lambda item: -item[1])[:args.top]),
+        'last_name_initials': phonebook.count_contacts_by_initial_letter('last_name'),
+    }
+    if args.json:
+        import json
+        print(json.dumps(stats))
+        return False
+    print(f"Contacts: {stats['contacts']}")
+    print(f"Area codes: {stats['area_codes']}")
+    print("Most common area codes: " + ", ".join(f"{code} ({count})" for code, count in stats['top_area_codes'].items()))
+    print("Last name initials: " + ", ".join(f"{letter or '-'} ({count})" for letter, count in stats['last_name_initials'].items()))
+    return False
+
+
+def add_commands(subparsers):
+    """
+    Add the phone book commands to an argparse subparsers object, each with its command function as the run default.
+    """
+    command = subparsers.add_parser("import", help="Import contacts from a CSV file.")
+    command.add_argument("file")
+    command.add_argument("--errors", help="CSV file to write the rejected rows to.")
+    command.add_argument("--workers", type=int, default=1, help="Processes parsing the file.")
+    command.set_defaults(run=command_import)
+
+    command = subparsers.add_parser("add", help="Add a contact.")
+    command.add_argument("first_name")
+    command.add_argument("last_name")
+    command.add_argument("phone_number")
+    command.add_argument("--email")
+    command.add_argument("--address")
+    command.set_defaults(run=command_add)
+
+    command = subparsers.add_parser("get", help="Print the contact with a phone number.")
+    command.add_argument("phone_number")
+    command.add_argument("--json", action="store_true", help="Print it as JSON.")
+    command.set_defaults(run=command_get)
+
+    command = subparsers.add_parser("update", help="Update the contact with a phone number.")
+    command.add_argument("phone", help="Current phone number of the contact.")
+    for name in ('first_name', 'last_name', 'phone_number', 'email', 'address'):
+        command.add_argument("--" + name.replace('_', '-'), dest=name)
+    command.set_defaults(run=command_update)
+
+    command = subparsers.add_parser("delete", help="Delete the contact with a phone number.")
+    command.add_argument("phone_number")
+    command.set_defaults(run=command_delete)
+
+    command = subparsers.add_parser("delete-all", help="Delete every contact.")
+    command.set_defaults(run=command_delete_all)
+
+    for name, help_text, run in (("search", "Search contacts by name or phone number.", command_search),
+                                 ("list", "List contacts, in listing order or sorted.", command_list)):
+        command = subparsers.add_parser(name, help=help_text)
+        if name == "search":
+            command.add_argument("keyword")
+        else:
+            command.add_argument("--sort", help="Attributes to sort by, separated by commas, e.g. last_name,first_name.")
+            command.add_argument("--reverse", action="store_true", help="Sort in descending order.")
+        command.add_argument("--offset", type=int, default=0, help="Skip this many contacts first.")
+        command.add_argument("--limit", type=int, help="Print at most this many contacts.")
+        command.add_argument("--json", action="store_true", help="Print one JSON object per contact.")
+        command.set_defaults(run=run)
+
+    command = subparsers.add_parser("export", help="Export contacts to a CSV file.")
+    command.add_argument("file", help="CSV file, compressed when it ends in .gz, .bz2 or .xz.")
+    command.add_argument("--columns", nargs="+", help="Columns to export.")
+    command.add_argument("--timestamps", action="store_true", help="Also export created_at and updated_at.")
+    command.add_argument("--where", action="append",
+                         help="Only export contacts meeting a condition such as last_name=Smith, email~example.com, "
+                              "area_code!=212 or created_at>=2024-01-01. Repeat to require several.")
+    command.set_defaults(run=command_export)
+
+    command = subparsers.add_parser("stats", help="Print contact counts.")
+    command.add_argument("--top", type=int, default=5, help="Number of area codes to list.")
+    command.add_argument("--json", action="store_true", help="Print the counts as JSON.")
+    command.set_defaults(run=command_stats)
+
+
+def run_command(phonebook, args):
+    """
+    Run a parsed command, printing its ValueError, if any, to standard error.
+    Return (succeeded, changed the phone book).
+    """
+    try:
+        return True, args.run(phonebook, args)
+    except ValueError as ve:
+        print(f"Error: {ve}", file=sys.stderr)
+        return False, False
+
+
+def split_words(line):
+    # Words of a script line, in shell syntax
+    words = []
+    position = 0
+    end = len(line.rstrip())
+    while position < end:
+        match = SIMPLE_WORDS.match(line, position)
+        if match is None:
+            import shlex
+            return shlex.split(line, comments=True)
+        double_quoted, single_quoted, plain = match.groups()
+        words.append(plain if plain is not None else double_quoted if double_quoted is not None else single_quoted)
+        position = match.end()
+    return words
+
+
+def parse_script_line(commands, line):
+    """
+    Return the parsed arguments of a script line, or None for a blank or comment line.
+    Raise a ValueError if the line is not a valid command; argparse prints why to standard error.
+    """
+    words = split_words(line)
+    if not words:
+        return None
+    # Each line is parsed by its command's own parser, without a top-level parser to pick it
+    parser = commands.choices.get(words[0])
+    if parser is None:
+        raise ValueError(f"unknown command {words[0]}")
+    try:
+        return parser.parse_args(words[1:])
+    except SystemExit:
+        raise ValueError("invalid arguments")
+
+
+def run_script(phonebook, lines, stop_on_error=False):
+    """
+    Run commands from lines of text, one per line in shell syntax, skipping blank lines and # comments.
+    Errors are reported with their line number, and the script goes on unless stop_on_error.
+    Return (number of failed commands, whether any command changed the phone book).
+    """
+    commands = argparse.ArgumentParser(prog="script").add_subparsers()
+    add_commands(commands)
+    failures = 0
+    changed = False
+    for line_number, line in enumerate(lines, 1):
+        try:
+            args = parse_script_line(commands, line)
+        except ValueError as ve:
+            print(f"Line {line_number}: {ve}", file=sys.stderr)
+            succeeded = False
+        else:
+            if args is None:
+                continue
+            succeeded, command_changed = run_command(phonebook, args)
+            changed |= command_changed
+            if not succeeded:
+                print(f"Line {line_number}: {line.strip()}", file=sys.stderr)
+        if not succeeded:
+            failures += 1
+            if stop_on_error:
+                break
+    return failures, changed
+
+
+def command_script(phonebook, args):
+    # Only run from the command line, where its result is the exit status
+    if args.file == "-":
+        return run_script(phonebook, sys.stdin, args.stop_on_error)
+    with open(args.file, encoding="utf-8") as file:
+        return run_script(phonebook, file, args.stop_on_error)
+
+
+def import_times(report):
+    """
+    Parse the lines python -X importtime writes to stderr into (module, self µs, cumulative µs, nesting depth).
+    Other lines are returned separately, in order.
+    """
+    imports = []
+    other_lines = []
+    for line in report.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            if not line.startswith("import time: self"):
+                other_lines.append(line)
+            continue
+        self_time, cumulative, indent, module = match.groups()
+        imports.append((module, int(self_time), int(cumulative), len(indent) // 2))
+    return imports, other_lines
+
+
+def profile_startup(argv):
+    # Run the same command again in a child interpreter with -X importtime, then report its imports on stderr
+    import subprocess
+    import time
+    start = time.perf_counter()
+    child = subprocess.run([sys.executable, "-X", "importtime", os.path.abspath(__file__), *argv],
+                           stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    imports, other_lines = import_times(child.stderr)
+    for line in other_lines:
+        print(line, file=sys.stderr)
+    total = sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+    print(f"\nStartup: {total / 1000:.1f} ms importing {len(imports)} modules, {elapsed * 1000:.1f} ms for the whole run",
+          file=sys.stderr)
+    print(f"{'cumulative ms':>13} {'self ms':>8}  module", file=sys.stderr)
+    for module, self_time, cumulative, depth in sorted(imports, key=lambda entry: -entry[2])[:PROFILE_MODULES]:
+        print(f"{cumulative / 1000:>13.1f} {self_time / 1000:>8.1f}  {'  ' * depth}{module}", file=sys.stderr)
+    return child.returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Phone Book Manager. Without a command, runs the interactive menu.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--db", help="SQLite database file to keep the contacts in. Without it, contacts are only kept in memory.")
+    source.add_argument("--snapshot", help="Snapshot file to load the contacts from, if it exists, and to save them to after the menu, or after --contacts or a command changes them.")
+    parser.add_argument("--contacts", help="CSV file to import before running the command.")
+    parser.add_argument("--log-file", default=LOG_FILE, help="File to write the log to.")
+    parser.add_argument("--log-format", choices=["text", "json"], default="text",
+                        help="Write the log as plain text lines or as one JSON object per line.")
+    parser.add_argument("--log-max-bytes", type=int, default=0,
+                        help="Rotate the log once it reaches this size, keeping 5 old files. Without it, the log is never rotated.")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Run the command, then report how long the modules took to import, slowest first, like python -X importtime.")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    add_commands(subparsers)
+    command = subparsers.add_parser("script", help="Run the commands of a file, one per line, against one phone book.")
+    command.add_argument("file", help="File of commands, or - for standard input.")
+    command.add_argument("--stop-on-error", action="store_true", help="Stop at the first command that fails.")
+    command.set_defaults(run=command_script)
+    args = parser.parse_args(argv)
+    if args.profile_startup:
+        return profile_startup([arg for arg in (sys.argv[1:] if argv is None else argv) if arg != "--profile-startup"])
+    configure_logging(args.log_file, json_format=args.log_format == "json", max_bytes=args.log_max_bytes)
+
+    if args.db:
+        # Only load the SQLite backend when it is used
+        from sqlite_phone_book import SQLitePhoneBook
+        phonebook = SQLitePhoneBook(args.db)
+    elif args.snapshot and os.path.exists(args.snapshot):
+        phonebook = PhoneBook.load_snapshot(args.snapshot)
+    else:
+        phonebook = PhoneBook()
+    imported = False
+    if args.contacts:
+        imported = phonebook.bulk_import_contacts(args.contacts).accepted > 0
+    if args.command is None:
+        PhoneBookCLI(phonebook).main()
+        # The menu does not tell which choices changed the contacts: save whatever happened in it
+        if args.snapshot:
+            phonebook.save_snapshot(args.snapshot)
+        return 0
+
+    if args.command == "script":
+        failures, changed = command_script(phonebook, args)
+    else:
+        succeeded, changed = run_command(phonebook, args)
+        failures = 0 if succeeded else 1
+    if args.snapshot and (changed or imported):
+        phonebook.save_snapshot(args.snapshot)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
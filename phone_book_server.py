@@ -0,0 +1,477 @@
+# This file serves a phone book over HTTP with JSON requests and responses, so that other processes can use it.
+# Run with: python phone_book_server.py [--port 8080] [--contacts contacts.csv]
+# One in-memory phone book is shared by every connection. Connections are kept alive and may pipeline requests,
+# which are answered in order. Results that can be large are streamed with chunked transfer encoding, as
+# newline-delimited JSON (one contact per line) or CSV, and only read from the phone book as the client takes them.
+#
+#   POST   /contacts                     add a contact from a JSON object; returns it
+#   POST   /contacts/bulk                add contacts from a JSON array or JSON lines; returns the count and the errors
+#   GET    /contacts                     list every contact (NDJSON)
+#   GET    /contacts/{phone number}      get a contact
+#   PATCH  /contacts/{phone number}      update a contact with the fields of a JSON object; returns it
+#   DELETE /contacts/{phone number}      delete a contact
+#   DELETE /contacts                     delete every contact
+#   GET    /count                        number of contacts
+#   GET    /search?q=keyword             contacts matching the keyword (NDJSON)
+#   GET    /search/created?start=&end=   contacts created in a time range, given in ISO 8601 (NDJSON)
+#   GET    /search/updated?start=&end=   contacts updated in a time range (NDJSON)
+#   GET    /sorted?key=last_name,first_name&reverse=true    sorted contacts (NDJSON)
+#   GET    /groups/area_code[/{code}]    contact count of each area code, or the contacts of one (NDJSON)
+#   GET    /groups/initial/{attribute}[/{letter}]           the same by the initial letter of an attribute
+#   GET    /export?columns=&timestamps=true&q=              CSV of every contact, or of those matching q
+# Every list takes offset and limit; a limit of up to MAX_PAGE is read in one call, anything larger is streamed.
+# Errors are returned as {"error": message} with a 4xx status.
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import re
+from contextlib import nullcontext
+from datetime import datetime
+from http import HTTPStatus
+from operator import attrgetter
+from urllib.parse import parse_qs, unquote, urlsplit
+import bulk_export
+from async_phone_book import AsyncPhoneBook
+from logging_setup import LOG_FILE, configure_logging
+
+logger = logging.getLogger(__name__)
+
+NDJSON = 'application/x-ndjson'
+CHUNK_SIZE = 1 << 16  # Bytes of a streamed response collected before each chunk is sent
+MAX_BODY_SIZE = 1 << 27  # Largest request body accepted, in bytes
+KEEP_ALIVE_TIMEOUT = 60  # Seconds an idle connection is kept open
+TRUE_VALUES = ('1', 'true', 'yes')
+MAX_PAGE = 1000  # Largest limit answered by one query rather than streamed
+# Query method -> the iter_ method that streams its results
+ITERATORS = {
+    'list_contacts': 'iter_contacts',
+    'search_contact': 'iter_search_contact',
+    'search_contact_by_created_time': 'iter_search_contact_by_created_time',
+    'search_contact_by_updated_time': 'iter_search_contact_by_updated_time',
+    'sort_contacts': 'iter_sorted_contacts',
+}
+
+
+class HTTPError(Exception):
+    '''
+        Error answered with its status and {"error": message}.
+    '''
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Stream:
+    '''
+        Response body sent in chunks: an async iterator of strings, sent once each is ready.
+    '''
+    def __init__(self, chunks, content_type=NDJSON):
+        self.chunks = chunks
+        self.content_type = content_type
+
+
+class Request:
+    def __init__(self, method, target, version, headers, body):
+        self.method = method
+        parts = urlsplit(target)
+        self.path = unquote(parts.path)
+        self.query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        self.version = version
+        self.headers = headers
+        self.body = body
+        self.parameters = {}  # Named groups of the route's path pattern
+
+    def json(self):
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON")
+
+    def int(self, name, default=None, minimum=None):
+        value = self.query.get(name)
+        if value is None:
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            raise HTTPError(400, f"{name} must be an integer")
+        if minimum is not None and number < minimum:
+            raise HTTPError(400, f"{name} must be at least {minimum}")
+        return number
+
+    def page(self):
+        # offset and limit of a list; negative values mean different things to the phone book backends, so none are taken
+        return self.int('offset', 0, minimum=0), self.int('limit', minimum=0)
+
+    def datetime(self, name):
+        value = self.query.get(name)
+        if value is None:
+            raise HTTPError(400, f"{name} is required")
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise HTTPError(400, f"{name} must be an ISO 8601 date and time")
+
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def ndjson(contacts, offset=0, limit=None):
+    '''
+        Yield the contacts from position offset, at most limit of them, as JSON lines in chunks of about CHUNK_SIZE.
+        contacts is an iterable or async iterable.
+    '''
+    if not hasattr(contacts, '__aiter__'):
+        contacts = _aiter(contacts)
+    lines = []
+    size = 0
+    position = 0
+    async for contact in contacts:
+        if limit is not None and position >= offset + limit:
+            break
+        if position >= offset:
+            line = json.dumps(contact.to_dict()) + "\n"
+            lines.append(line)
+            size += len(line)
+            if size >= CHUNK_SIZE:
+                yield "".join(lines)
+                lines = []
+                size = 0
+        position += 1
+    if lines:
+        yield "".join(lines)
+
+
+async def csv_rows(contacts, columns):
+    '''
+        Yield the columns of the contacts as CSV, header first, in chunks of about CHUNK_SIZE.
+    '''
+    get_row = attrgetter(*columns)
+    single = len(columns) == 1  # attrgetter returns a bare value rather than a tuple for a single attribute
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    async for contact in contacts:
+        writer.writerow((get_row(contact),) if single else get_row(contact))
+        if text.tell() >= CHUNK_SIZE:
+            yield text.getvalue()
+            text.seek(0)
+            text.truncate()
+    yield text.getvalue()
+
+
+def add_contacts(phonebook, rows):
+    # Add the contacts of JSON objects under one write lock; return the number added and the errors by position
+    errors = []
+    lock = getattr(phonebook, 'lock', None)  # Only a PhoneBook served with one worker has none
+    with nullcontext() if lock is None else lock.writing():
+        for position, row in enumerate(rows):
+            try:
+                if not isinstance(row, dict):
+                    raise ValueError("Contact must be a JSON object")
+                phonebook.add_contact(row.get('first_name'), row.get('last_name'), row.get('phone_number'),
+                                      row.get('email'), row.get('address'))
+            except ValueError as ve:
+                errors.append({'index': position, 'error': str(ve)})
+    return len(rows) - len(errors), errors
+
+
+class PhoneBookServer:
+    '''
+        HTTP/1.1 server of an AsyncPhoneBook, on one event loop. See the top of this file for the endpoints.
+    '''
+    def __init__(self, phonebook=None, host='127.0.0.1', port=8080):
+        self.phonebook = AsyncPhoneBook() if phonebook is None else phonebook
+        self.host = host
+        self.port = port
+        self._server = None
+        self._routes = [(method, re.compile(pattern + '$'), handler) for method, pattern, handler in [
+            ('GET', r'/contacts', self.list_contacts),
+            ('POST', r'/contacts', self.add_contact),
+            ('DELETE', r'/contacts', self.delete_all_contacts),
+            ('POST', r'/contacts/bulk', self.add_contacts),
+            ('GET', r'/contacts/(?P<phone>[^/]+)', self.get_contact),
+            ('PATCH', r'/contacts/(?P<phone>[^/]+)', self.update_contact),
+            ('DELETE', r'/contacts/(?P<phone>[^/]+)', self.delete_contact),
+            ('GET', r'/count', self.count),
+            ('GET', r'/search', self.search),
+            ('GET', r'/search/(?P<attribute>created|updated)', self.search_by_time),
+            ('GET', r'/sorted', self.sort),
+            ('GET', r'/groups/area_code(?:/(?P<group>[^/]+))?', self.area_code_groups),
+            ('GET', r'/groups/initial/(?P<key>\w+)(?:/(?P<group>[^/]*))?', self.initial_letter_groups),
+            ('GET', r'/export', self.export),
+        ]]
+
+    async def start(self):
+        '''
+            Start accepting connections. With port 0, the port picked by the system is then in self.port.
+        '''
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Serving on %s:%d", self.host, self.port)
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        '''
+            Stop accepting connections and close the phone book's pool.
+        '''
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.phonebook.close()
+
+    async def _read_request(self, reader):
+        # Read the next request on the connection, or return None once the client closed it or stayed idle too long
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        if not request_line.strip():
+            return None
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'chunked' in headers.get('transfer-encoding', ''):
+            raise HTTPError(411, "Send the request body with a Content-Length")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, f"Request body is larger than {MAX_BODY_SIZE} bytes")
+        body = await reader.readexactly(length) if length else b''
+        return Request(method, target, version, headers, body)
+
+    async def _serve_connection(self, reader, writer):
+        # Answer the requests of one connection in order, until it is closed
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as error:
+                    await self._send(writer, 'HTTP/1.1', error.status, {'error': str(error)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                keep_alive = request.keep_alive()
+                status, body = await self._dispatch(request)
+                if isinstance(body, Stream) and request.version == 'HTTP/1.0':
+                    keep_alive = False  # No chunked encoding: the end of the body is the end of the connection
+                await self._send(writer, request.version, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            # Raised by a streamed body after its headers were sent: closing the connection without the last chunk
+            # tells the client the response is incomplete, and nothing more is read from a connection in that state
+            logger.exception("Error streaming a response; closing the connection")
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request):
+        # Status and body of the response to the request
+        allowed = False
+        for method, pattern, handler in self._routes:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed = True
+                continue
+            request.parameters = {name: value for name, value in match.groupdict().items() if value is not None}
+            try:
+                return await handler(request)
+            except HTTPError as error:
+                return error.status, {'error': str(error)}
+            except ValueError as ve:
+                return 400, {'error': str(ve)}
+            except Exception:
+                logger.exception("Error answering %s %s", request.method, request.path)
+                return 500, {'error': "Internal server error"}
+        if allowed:
+            return 405, {'error': f"{request.method} is not allowed on {request.path}"}
+        return 404, {'error': f"No endpoint {request.path}"}
+
+    async def _send(self, writer, version, status, body, keep_alive):
+        head = [f"{version} {status} {HTTPStatus(status).phrase}"]
+        head.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+        if not isinstance(body, Stream):
+            data = b'' if body is None else json.dumps(body).encode('utf-8')
+            if body is not None:
+                head.append("Content-Type: application/json")
+            head.append(f"Content-Length: {len(data)}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + data)
+            await writer.drain()
+            return
+        chunked = version != 'HTTP/1.0'
+        head.append(f"Content-Type: {body.content_type}")
+        if chunked:
+            head.append("Transfer-Encoding: chunked")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1'))
+        async for text in body.chunks:
+            data = text.encode('utf-8')
+            if not data:
+                continue
+            writer.write(b'%x\r\n%s\r\n' % (len(data), data) if chunked else data)
+            # Wait for a slow client to take the chunk before reading the next contacts
+            await writer.drain()
+        if chunked:
+            writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    def _page(self, request, contacts):
+        return 200, Stream(ndjson(contacts, *request.page()))
+
+    async def _query(self, request, name, *args):
+        # Results of the PhoneBook query method name and its iter_ method iter_name. A page of up to MAX_PAGE results
+        # is read in one call, which only finds the contacts up to its end; anything larger is streamed.
+        offset, limit = request.page()
+        if limit is not None and limit <= MAX_PAGE:
+            return 200, Stream(ndjson(await getattr(self.phonebook, name)(*args, offset=offset, limit=limit)))
+        return self._page(request, getattr(self.phonebook, ITERATORS[name])(*args))
+
+    async def _contact(self, request):
+        contact = await self.phonebook.get_by_phone(request.parameters['phone'])
+        if contact is None:
+            raise HTTPError(404, f"No contact with phone number {request.parameters['phone']}")
+        return contact
+
+    async def list_contacts(self, request):
+        return await self._query(request, 'list_contacts')
+
+    async def add_contact(self, request):
+        fields = request.json()
+        if not isinstance(fields, dict):
+            raise HTTPError(400, "Contact must be a JSON object")
+        contact = await self.phonebook.add_contact(fields.get('first_name'), fields.get('last_name'), fields.get('phone_number'),
+                                                   fields.get('email'), fields.get('address'))
+        return 201, contact.to_dict()
+
+    async def add_contacts(self, request):
+        text = request.body.decode('utf-8').strip()
+        try:
+            rows = json.loads(text) if text.startswith('[') else [json.loads(line) for line in text.splitlines() if line.strip()]
+        except ValueError:
+            raise HTTPError(400, "Request body is not a JSON array or JSON lines")
+        added, errors = await self.phonebook.call(add_contacts, rows)
+        return 200, {'added': added, 'errors': errors}
+
+    async def get_contact(self, request):
+        return 200, (await self._contact(request)).to_dict()
+
+    async def update_contact(self, request):
+        fields = request.json()
+        if not isinstance(fields, dict):
+            raise HTTPError(400, "Fields must be a JSON object")
+        unknown = [name for name in fields if name not in bulk_export.CONTACT_COLUMNS]
+        if unknown:
+            raise HTTPError(400, f"Unknown field(s): {', '.join(unknown)}")
+        contact = await self._contact(request)
+        await self.phonebook.update_contact(contact, **fields)
+        return 200, (await self.phonebook.get_by_phone(fields.get('phone_number') or contact.phone_number)).to_dict()
+
+    async def delete_contact(self, request):
+        await self.phonebook.delete_contact(await self._contact(request))
+        return 204, None
+
+    async def delete_all_contacts(self, request):
+        await self.phonebook.delete_all_contacts()
+        return 204, None
+
+    async def count(self, request):
+        return 200, {'count': await self.phonebook.count()}
+
+    async def search(self, request):
+        keyword = request.query.get('q')
+        if not keyword:
+            raise HTTPError(400, "q is required")
+        return await self._query(request, 'search_contact', keyword)
+
+    async def search_by_time(self, request):
+        start_time, end_time = request.datetime('start'), request.datetime('end')
+        if start_time > end_time:
+            raise HTTPError(400, "start must not be after end")
+        if request.parameters['attribute'] == 'created':
+            return await self._query(request, 'search_contact_by_created_time', start_time, end_time)
+        return await self._query(request, 'search_contact_by_updated_time', start_time, end_time)
+
+    async def sort(self, request):
+        key = request.query.get('key', 'first_name').split(',')
+        # Check the key now, while an error can still change the status
+        await self.phonebook.sort_contacts(key, limit=0)
+        reverse = request.query.get('reverse', '').lower() in TRUE_VALUES
+        return await self._query(request, 'sort_contacts', key, reverse)
+
+    async def area_code_groups(self, request):
+        if 'group' not in request.parameters:
+            return 200, await self.phonebook.count_contacts_by_area_code()
+        return self._page(request, await self.phonebook.get_contacts_by_area_code(request.parameters['group']))
+
+    async def initial_letter_groups(self, request):
+        key = request.parameters['key']
+        if 'group' not in request.parameters:
+            return 200, await self.phonebook.count_contacts_by_initial_letter(key)
+        return self._page(request, await self.phonebook.get_contacts_by_initial_letter(key, request.parameters['group']))
+
+    async def export(self, request):
+        columns = request.query.get('columns')
+        columns = bulk_export.export_columns(columns.split(',') if columns else None,
+                                             request.query.get('timestamps', '').lower() in TRUE_VALUES)
+        keyword = request.query.get('q')
+        contacts = self.phonebook.iter_search_contact(keyword) if keyword else self.phonebook.iter_contacts()
+        return 200, Stream(csv_rows(contacts, columns), 'text/csv; charset=utf-8')
+
+
+async def serve(args):
+    server = PhoneBookServer(AsyncPhoneBook(max_workers=args.workers), args.host, args.port)
+    if args.contacts:
+        print(await server.phonebook.bulk_import_contacts(args.contacts))
+    await server.start()
+    print(f"Serving on http://{server.host}:{server.port}", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python phone_book_server.py", description="Serve a phone book over HTTP with JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on; 0 picks a free one.")
+    parser.add_argument("--contacts", help="CSV file to bulk import before serving.")
+    parser.add_argument("--workers", type=int, default=4, help="Threads running phone book operations.")
+    parser.add_argument("--log-file", default=LOG_FILE, help="File to write the log to.")
+    args = parser.parse_args()
+    configure_logging(args.log_file)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
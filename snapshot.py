@@ -0,0 +1,340 @@
+# This file implements the binary snapshot format used by PhoneBook.save_snapshot and PhoneBook.load_snapshot.
+#
+# Layout, all integers little-endian:
+#   header   64 bytes: magic, version, record size, record count, heap offset, heap size, records CRC32, heap CRC32,
+#            journal sequence number the snapshot includes (0 without a journal), number of packed phone numbers,
+#            phone index CRC32
+#   records  one fixed-width record per contact:
+#            packed phone number (-1 if the phone number is kept in the heap), created_at, updated_at (epoch seconds),
+#            heap offset of the record's strings, then the UTF-8 lengths of first name, last name, email, address
+#            and phone number (-1 for None / not in the heap)
+#   heap     the strings of each record, stored back to back in that order
+#   phones   phone index, starting at the next multiple of 8 bytes, as int64 arrays: the packed phone numbers in
+#            ascending order, the record id of each, then the record ids whose phone number is kept in the heap
+# Version 1 files have no phone index; they can still be read.
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from contextlib import suppress
+from contact import Contact
+from contact_store import pack_phone, unpack_phone
+
+MAGIC = b"PHBKSNAP"
+VERSION = 2
+READABLE_VERSIONS = (1, 2)
+HEADER = struct.Struct('<8sHHQQQIIQQI')  # Version 1 headers have zero padding where the last two fields are
+HEADER_SIZE = 64
+RECORD = struct.Struct('<qqqQiiiii')
+RECORDS_PER_WRITE = 65536
+ID_BITS = 29  # The phone index is sorted as packed phone number << ID_BITS | record id, so record ids must fit in 29 bits
+
+
+class SnapshotError(ValueError):
+    '''
+        Raised when a file is not a valid snapshot.
+    '''
+
+
+def _encode(text):
+    return None if text is None else text.encode('utf-8')
+
+
+def _swapped(numbers):
+    # Little-endian bytes of an int64 array on a big-endian machine
+    numbers = array('q', numbers)
+    numbers.byteswap()
+    return numbers.tobytes()
+
+
+def _phones_offset(heap_offset, heap_size):
+    # The phone index starts at the first multiple of 8 after the heap, so that its int64 arrays are aligned
+    return -(-(heap_offset + heap_size) // 8) * 8
+
+
+def sync_directory(path):
+    '''
+        Make the last rename of path durable by syncing its directory. Does nothing where directories cannot be
+        opened, as on Windows, whose renames are durable once they return.
+    '''
+    if os.name != 'posix':
+        return
+    directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def write_snapshot(contacts, count, path, sequence=0):
+    '''
+        Write count contacts to a snapshot file.
+        sequence is the number of the last journal entry included in the snapshot, if the contacts are journaled.
+        The file is written next to path and renamed over it once complete, so a crash never leaves half a snapshot.
+        Raise a ValueError if there are not exactly count contacts, or 2**29 or more.
+    '''
+    if count >= 1 << ID_BITS:
+        raise ValueError(f"A snapshot holds fewer than {1 << ID_BITS} contacts")
+    heap_offset = HEADER_SIZE + count * RECORD.size
+    phone_keys = array('q')  # Packed phone number << ID_BITS | record id
+    unpacked = array('q')  # Record ids whose phone number is in the heap
+    temporary_path = path + ".tmp"
+    records_crc = 0
+    heap_crc = 0
+    heap_size = 0
+    written = 0
+    try:
+        # Records and heap grow in two regions of the same file, each through its own buffered handle
+        with open(temporary_path, 'wb') as records_file, open(temporary_path, 'r+b') as heap_file:
+            records_file.write(bytes(HEADER_SIZE))
+            heap_file.seek(heap_offset)
+            records = bytearray()
+            for contact in contacts:
+                number = pack_phone(contact.phone_number)
+                if number is None:
+                    unpacked.append(written)
+                else:
+                    phone_keys.append(number << ID_BITS | written)
+                strings = [_encode(contact.first_name), _encode(contact.last_name), _encode(contact.email),
+                           _encode(contact.address), None if number is not None else _encode(contact.phone_number)]
+                records += RECORD.pack(-1 if number is None else number, contact.created_timestamp,
+                                       contact.updated_timestamp, heap_size,
+                                       *(-1 if data is None else len(data) for data in strings))
+                data = b"".join(data for data in strings if data)
+                heap_file.write(data)
+                heap_crc = zlib.crc32(data, heap_crc)
+                heap_size += len(data)
+                written += 1
+                if len(records) >= RECORDS_PER_WRITE * RECORD.size:
+                    records_file.write(records)
+                    records_crc = zlib.crc32(records, records_crc)
+                    records = bytearray()
+            records_file.write(records)
+            records_crc = zlib.crc32(records, records_crc)
+            if written != count:
+                raise ValueError(f"Expected {count} contacts, got {written}")
+            # Sorting the combined keys sorts by phone number; each record id is then the key's low bits
+            phone_keys = sorted(phone_keys)
+            mask = (1 << ID_BITS) - 1
+            phones = array('q', [key >> ID_BITS for key in phone_keys])
+            phones += array('q', [key & mask for key in phone_keys])
+            phones += unpacked
+            phone_data = phones.tobytes() if sys.byteorder == 'little' else _swapped(phones)
+            heap_file.write(bytes(_phones_offset(heap_offset, heap_size) - heap_offset - heap_size))
+            heap_file.write(phone_data)
+            records_file.seek(0)
+            records_file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, count, heap_offset, heap_size, records_crc, heap_crc, sequence,
+                                           len(phone_keys), zlib.crc32(phone_data)))
+            # Make the whole file durable before it replaces the old snapshot
+            heap_file.flush()
+            records_file.flush()
+            os.fsync(records_file.fileno())
+    except BaseException:
+        # Out of space, an invalid contact or an interrupt: leave no partial file behind
+        with suppress(FileNotFoundError):
+            os.remove(temporary_path)
+        raise
+    os.replace(temporary_path, path)
+    sync_directory(path)
+
+
+class SnapshotStore:
+    '''
+        Read-mostly contact store backed by a memory-mapped snapshot file.
+        Opening only reads the header; records are decoded straight from the mapping when they are accessed,
+        and find_phone looks phone numbers up by binary search in the snapshot's phone index.
+        Supports the subset of the dict interface PhoneBook uses. Changes are kept in memory on top of the snapshot
+        and are only written by saving a new snapshot.
+    '''
+    def __init__(self, path, verify=True):
+        '''
+            Map the snapshot file. With verify, check the CRC32 checksums, which reads the whole file once.
+            Raise a SnapshotError if the file is not a valid snapshot.
+        '''
+        self.path = path
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise SnapshotError(f"{path} is not a phone book snapshot")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, record_size, count, heap_offset, heap_size, records_crc, heap_crc, sequence,
+         packed_count, phones_crc) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version not in READABLE_VERSIONS or record_size != RECORD.size:
+            self._map.close()
+            raise SnapshotError(f"{path} is not a phone book snapshot of version {READABLE_VERSIONS}")
+        heap_end = heap_offset + heap_size
+        self.has_phone_index = version >= 2
+        if self.has_phone_index:
+            phones_offset = _phones_offset(heap_offset, heap_size)
+            phones_end = phones_offset + (count + packed_count) * 8
+        else:
+            phones_offset = phones_end = heap_end
+        if heap_offset != HEADER_SIZE + count * RECORD.size or packed_count > count or phones_end != size:
+            self._map.close()
+            raise SnapshotError(f"{path} is truncated or corrupt")
+        self._view = memoryview(self._map)  # Strings are decoded from slices of this view without copying them first
+        if verify and (zlib.crc32(self._view[HEADER_SIZE:heap_offset]) != records_crc
+                       or zlib.crc32(self._view[heap_offset:heap_end]) != heap_crc
+                       or zlib.crc32(self._view[phones_offset:phones_end]) != phones_crc):
+            self._view.release()
+            self._map.close()
+            raise SnapshotError(f"Checksum mismatch in {path}")
+        self.sequence = sequence  # Last journal entry included in the snapshot
+        self._base_count = count  # Record ids 0 to count - 1 are in the file
+        self._heap_offset = heap_offset
+        self._changed = {}  # Record id -> Contact for updated and newly added records
+        self._deleted = set()  # Record ids of deleted records from the file
+        self._count = count
+        # Phone index of the file, read in place: sorted packed numbers, their record ids, then the unpacked record ids
+        phones = self._view[phones_offset:phones_end]
+        if sys.byteorder == 'little':
+            phones = phones.cast('q')
+        else:
+            phones = array('q', phones)
+            phones.byteswap()
+        self._phones = phones
+        self._packed_count = packed_count
+        self._heap_phones = None  # Phone number -> record id of the unpacked phone numbers, decoded on first use
+        self._changed_phones = {}  # Phone number -> record id of the changed records
+
+    def close(self):
+        if isinstance(self._phones, memoryview):
+            self._phones.release()  # The views of the mapping must be released before it is closed
+        self._view.release()
+        self._map.close()
+
+    @property
+    def next_record_id(self):
+        '''
+            A record id above every record id in the store.
+        '''
+        return max(self._base_count, max(self._changed, default=-1) + 1)
+
+    def find_phone(self, phone_number):
+        '''
+            Return the record id of the contact with this phone number, or None.
+            Takes a binary search in the snapshot's phone index, plus a dict lookup in the changes since.
+            Snapshots of version 1 have no phone index; there only changed records are found.
+        '''
+        record_id = self._changed_phones.get(phone_number)
+        if record_id is not None:
+            # An entry goes stale when its contact changed phone number in place before being stored again
+            contact = self._changed.get(record_id)
+            if contact is not None and contact.phone_number == phone_number:
+                return record_id
+        number = pack_phone(phone_number)
+        if number is None:
+            if self._heap_phones is None:
+                self._heap_phones = {self._read(record_id).phone_number: record_id
+                                     for record_id in self._phones[2 * self._packed_count:].tolist()}
+            record_id = self._heap_phones.get(phone_number)
+        else:
+            numbers = self._phones[:self._packed_count]
+            position = bisect_left(numbers, number)
+            record_id = self._phones[self._packed_count + position] if position < self._packed_count and numbers[position] == number else None
+        # A file record that changed has its current phone number in the changes, if it still exists
+        if record_id is None or record_id >= self._base_count or record_id in self._changed or record_id in self._deleted:
+            return None
+        return record_id
+
+    def _read(self, record_id):
+        # Decode one record from the mapping
+        number, created_at, updated_at, offset, *lengths = RECORD.unpack_from(self._map, HEADER_SIZE + record_id * RECORD.size)
+        position = self._heap_offset + offset
+        strings = []
+        for length in lengths:
+            if length < 0:
+                strings.append(None)
+            else:
+                strings.append(str(self._view[position:position + length], 'utf-8'))
+                position += length
+        first_name, last_name, email, address, phone_number = strings
+        if phone_number is None:
+            phone_number = unpack_phone(number)
+        return Contact.from_record(first_name, last_name, phone_number, email, address, created_at, updated_at)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, record_id):
+        if record_id in self._changed:
+            return True
+        return 0 <= record_id < self._base_count and record_id not in self._deleted
+
+    def __iter__(self):
+        for record_id in range(self._base_count):
+            if record_id not in self._deleted:
+                yield record_id
+        for record_id in self._changed:
+            if record_id >= self._base_count:
+                yield record_id
+
+    def __getitem__(self, record_id):
+        contact = self._changed.get(record_id)
+        if contact is not None:
+            return contact
+        if record_id not in self:
+            raise KeyError(record_id)
+        return self._read(record_id)
+
+    def __setitem__(self, record_id, contact):
+        if record_id not in self:
+            if record_id < self._base_count:
+                raise KeyError(record_id)
+            self._count += 1
+        self._changed[record_id] = contact
+        self._changed_phones[contact.phone_number] = record_id
+
+    def pop(self, record_id):
+        contact = self[record_id]
+        if self._changed.pop(record_id, None) is not None and self._changed_phones.get(contact.phone_number) == record_id:
+            del self._changed_phones[contact.phone_number]
+        if record_id < self._base_count:
+            self._deleted.add(record_id)
+        self._count -= 1
+        return contact
+
+    def clear(self):
+        self._base_count = 0
+        self._changed = {}
+        self._deleted = set()
+        self._count = 0
+        self._changed_phones = {}
+
+    def values(self):
+        return (self[record_id] for record_id in self)
+
+    def items(self):
+        return ((record_id, self[record_id]) for record_id in self)
+
+
+class SnapshotPhoneIndex:
+    '''
+        The phone index of a SnapshotStore, with the interface of the phone number -> record id dict PhoneBook keeps.
+        The store keeps its phone index up to date as records are stored and removed,
+        so setting and deleting entries here does nothing.
+    '''
+    def __init__(self, store):
+        self._store = store
+
+    def get(self, phone_number, default=None):
+        record_id = self._store.find_phone(phone_number)
+        return default if record_id is None else record_id
+
+    def __contains__(self, phone_number):
+        return self._store.find_phone(phone_number) is not None
+
+    def __getitem__(self, phone_number):
+        record_id = self._store.find_phone(phone_number)
+        if record_id is None:
+            raise KeyError(phone_number)
+        return record_id
+
+    def __setitem__(self, phone_number, record_id):
+        pass
+
+    def __delitem__(self, phone_number):
+        pass
@@ -0,0 +1,276 @@
+# This file provides a PhoneBook stored in an SQLite database instead of memory.
+# Opening a database does not load any contacts, and every operation is answered by an SQL query.
+import logging
+import sqlite3
+from contextlib import contextmanager
+from contact import Contact, timestamp_range
+from logging_setup import log_results
+from phone_book import PhoneBook, ORDER_DICT_LOGGING, SORT_KEYS, GROUP_KEYS
+from snapshot import write_snapshot
+
+logger = logging.getLogger(__name__)
+
+CONTACT_FIELDS = "first_name, last_name, phone_number, email, address, created_at, updated_at"
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    phone_number TEXT NOT NULL UNIQUE,
+    email TEXT,
+    address TEXT,
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS contacts_first_name ON contacts (first_name);
+CREATE INDEX IF NOT EXISTS contacts_last_name ON contacts (last_name);
+CREATE INDEX IF NOT EXISTS contacts_created_at ON contacts (created_at);
+CREATE INDEX IF NOT EXISTS contacts_updated_at ON contacts (updated_at);
+CREATE INDEX IF NOT EXISTS contacts_area_code ON contacts (substr(phone_number, 2, 3));
+'''
+# phone_number is indexed by its UNIQUE constraint; area codes are counted from the contacts_area_code expression index
+AREA_CODE = "substr(phone_number, 2, 3)"
+PAGE_CLAUSE = " LIMIT ? OFFSET ?"
+
+
+def page_parameters(offset=0, limit=None):
+    # Parameters of PAGE_CLAUSE; a negative LIMIT means no limit in SQLite
+    return (-1 if limit is None else limit, offset)
+
+
+def row_to_contact(row):
+    # The table stores the timestamps as epoch seconds, like Contact
+    return Contact.from_record(*row)
+
+
+class SQLitePhoneBook(PhoneBook):
+    '''
+        PhoneBook whose contacts live in an SQLite database file.
+        The database uses WAL mode and has indexes on phone_number, first_name, last_name, created_at and updated_at.
+        Returned contacts are copies of the stored rows; pass them back to update_contact or delete_contact to change the database.
+    '''
+    def __init__(self, database):
+        super().__init__()
+        self.database = database
+        # Autocommit mode: single statements commit on their own, bulk operations open an explicit transaction
+        self._connection = sqlite3.connect(database, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        # Use Python's case mapping so that results match the in-memory PhoneBook
+        self._connection.create_function("py_lower", 1, str.lower, deterministic=True)
+        self._connection.create_function("py_upper", 1, str.upper, deterministic=True)
+
+    def close(self):
+        self._connection.close()
+
+    @contextmanager
+    def _transaction(self):
+        # Run a group of statements as one transaction, rolled back if anything fails
+        self._connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def _select(self, clause="", parameters=()):
+        # Yield the contacts returned by a SELECT over the contacts table, streaming from the cursor
+        cursor = self._connection.execute(f"SELECT {CONTACT_FIELDS} FROM contacts {clause}", parameters)
+        return (row_to_contact(row) for row in cursor)
+
+    def __len__(self):
+        return self._connection.execute("SELECT count(*) FROM contacts").fetchone()[0]
+
+    def _insert(self, contact):
+        try:
+            cursor = self._connection.execute(
+                f"INSERT INTO contacts ({CONTACT_FIELDS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (contact.first_name, contact.last_name, contact.phone_number, contact.email, contact.address,
+                 contact.created_timestamp, contact.updated_timestamp))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"A contact with phone number {contact.phone_number} already exists.")
+        return cursor.lastrowid
+
+    def _find(self, contact):
+        row = self._connection.execute("SELECT id FROM contacts WHERE phone_number = ?", (contact.phone_number,)).fetchone()
+        if row is None:
+            raise ValueError("Contact is not in the phone book.")
+        return row[0]
+
+    def get_by_phone(self, phone_number):
+        '''
+            Return the contact with exactly the given phone number, using the phone_number index.
+            Return None if no contact uses that phone number.
+        '''
+        return next(self._select("WHERE phone_number = ?", (phone_number,)), None)
+
+    def import_contacts(self, csv_file):
+        # One transaction for the whole file instead of one per row
+        with self._transaction():
+            super().import_contacts(csv_file)
+
+    def bulk_import_contacts(self, csv_file, errors_file=None, chunk_size=10000, workers=1):
+        with self._transaction():
+            return super().bulk_import_contacts(csv_file, errors_file, chunk_size, workers)
+
+    def _search(self, keyword, offset=0, limit=None):
+        # Substring matches cannot use an index, so this scans the table inside SQLite
+        lowered = keyword.lower()
+        return self._select(
+            "WHERE instr(py_lower(first_name), ?) > 0 OR instr(py_lower(last_name), ?) > 0 OR instr(phone_number, ?) > 0 ORDER BY id" + PAGE_CLAUSE,
+            (lowered, lowered, keyword) + page_parameters(offset, limit))
+
+    def iter_search_contact(self, keyword):
+        return self._search(keyword)
+
+    def search_contact(self, keyword, offset=0, limit=None):
+        '''
+            Search for contacts by keyword (name or phone number), with the same matching rules as PhoneBook.search_contact.
+            Substring matches cannot use an index, so this scans the table inside SQLite, stopping at the end of the page.
+        '''
+        results = list(self._search(keyword, offset, limit))
+        log_results(logger, results, "Search results for '%s'", keyword)
+        return results
+
+    def _search_time_range(self, column, start_time, end_time, offset=0, limit=None):
+        start, end = timestamp_range(start_time, end_time)
+        return self._select(f"WHERE {column} BETWEEN ? AND ? ORDER BY {column}, id" + PAGE_CLAUSE, (start, end) + page_parameters(offset, limit))
+
+    def iter_search_contact_by_updated_time(self, start_time, end_time):
+        return self._search_time_range("updated_at", start_time, end_time)
+
+    def search_contact_by_updated_time(self, start_time, end_time, offset=0, limit=None):
+        results = list(self._search_time_range("updated_at", start_time, end_time, offset, limit))
+        log_results(logger, results, "Search results for contacts updated between %s and %s", start_time, end_time)
+        return results
+
+    def iter_search_contact_by_created_time(self, start_time, end_time):
+        return self._search_time_range("created_at", start_time, end_time)
+
+    def search_contact_by_created_time(self, start_time, end_time, offset=0, limit=None):
+        results = list(self._search_time_range("created_at", start_time, end_time, offset, limit))
+        log_results(logger, results, "Search results for contacts created between %s and %s", start_time, end_time)
+        return results
+
+    def update_contact(self, contact, **kwargs):
+        try:
+            record_id = self._find(contact)
+            new_phone_number = kwargs.get('phone_number')
+            if new_phone_number and new_phone_number != contact.phone_number and self.get_by_phone(new_phone_number):
+                raise ValueError(f"A contact with phone number {new_phone_number} already exists.")
+            contact.update_contact(**kwargs)
+        except ValueError as ve:
+            # Log the error and re-raise it to be handled by CLI
+            logger.error("Failed to update contact: %s", ve)
+            raise ve
+        self._connection.execute(
+            "UPDATE contacts SET first_name = ?, last_name = ?, phone_number = ?, email = ?, address = ?, updated_at = ? WHERE id = ?",
+            (contact.first_name, contact.last_name, contact.phone_number, contact.email, contact.address,
+             contact.updated_timestamp, record_id))
+
+    def delete_contact(self, contact):
+        if self._connection.execute("DELETE FROM contacts WHERE phone_number = ?", (contact.phone_number,)).rowcount == 0:
+            raise ValueError("Contact is not in the phone book.")
+        logger.info("Contact deleted: %s", contact)
+
+    def delete_all_contacts(self):
+        self._connection.execute("DELETE FROM contacts")
+        logger.info("All contacts deleted.")
+
+    def iter_contacts(self):
+        return self._select("ORDER BY id")
+
+    def list_contacts(self, offset=0, limit=None):
+        logger.info("Listing all contacts.")
+        return list(self._select("ORDER BY id" + PAGE_CLAUSE, page_parameters(offset, limit)))
+
+    def _sorted(self, key, reverse, offset=0, limit=None):
+        attributes = (key,) if isinstance(key, str) else tuple(key)
+        unknown = [attribute for attribute in attributes if attribute not in SORT_KEYS]
+        if unknown or not attributes:
+            raise ValueError(f"Cannot sort by {', '.join(unknown) or 'no attribute'}")
+        order = 'DESC' if reverse else 'ASC'
+        columns = ", ".join(f"{attribute} {order}" for attribute in attributes)
+        return self._select(f"ORDER BY {columns}, id" + PAGE_CLAUSE, page_parameters(offset, limit))
+
+    def iter_sorted_contacts(self, key='first_name', reverse=False):
+        return self._sorted(key, reverse)
+
+    def sort_contacts(self, key='first_name', reverse=False, offset=0, limit=None):
+        '''
+            Return the contacts sorted by the specified key or sequence of keys, using the column's index where there is one.
+            Contacts with equal keys keep their insertion order, as with a stable sort.
+            Raise a ValueError if the key is not a valid attribute of the Contact class.
+        '''
+        contacts = list(self._sorted(key, reverse, offset, limit))
+        logger.info("Contacts sorted by %s in %s order.", key, ORDER_DICT_LOGGING[reverse])
+        return contacts
+
+    def _group(self, expression):
+        # Group the contacts by the value of an SQL expression, sorted by group and then insertion order
+        groups = {}
+        cursor = self._connection.execute(f"SELECT {expression} AS grp, {CONTACT_FIELDS} FROM contacts ORDER BY grp, id")
+        for row in cursor:
+            groups.setdefault(row[0], []).append(row_to_contact(row[1:]))
+        return groups
+
+    def _count(self, expression, group=None):
+        # Count the contacts per value of an SQL expression, or the contacts with one value
+        if group is not None:
+            return self._connection.execute(f"SELECT count(*) FROM contacts WHERE {expression} = ?", (group,)).fetchone()[0]
+        return dict(self._connection.execute(f"SELECT {expression} AS grp, count(*) FROM contacts GROUP BY grp ORDER BY grp"))
+
+    def _initial_letter(self, key):
+        # SQL expression of the initial letter of a column, "" for contacts without a value, as in PhoneBook
+        if key not in GROUP_KEYS:
+            raise ValueError(f"Cannot group by {key}")
+        return f"py_upper(substr(coalesce({key}, ''), 1, 1))"
+
+    def group_contacts_by_initial_letter(self, key):
+        groups = self._group(self._initial_letter(key))
+        logger.info("Contacts grouped by initial letter of %s: %d groups", key, len(groups))
+        return groups
+
+    def count_contacts_by_initial_letter(self, key, letter=None):
+        return self._count(self._initial_letter(key), None if letter is None else letter.upper())
+
+    def get_contacts_by_initial_letter(self, key, letter):
+        return list(self._select(f"WHERE {self._initial_letter(key)} = ? ORDER BY id", (letter.upper(),)))
+
+    def group_contacts_by_area_code(self):
+        groups = self._group(AREA_CODE)
+        logger.info("Contacts grouped by area code: %d groups", len(groups))
+        return groups
+
+    def count_contacts_by_area_code(self, area_code=None):
+        return self._count(AREA_CODE, area_code)
+
+    def get_contacts_by_area_code(self, area_code):
+        return list(self._select(f"WHERE {AREA_CODE} = ? ORDER BY id", (area_code,)))
+
+    def _write_snapshot(self, path, sequence=0):
+        # The count and the rows are read in one transaction, so that they agree whatever other connections write
+        with self._transaction():
+            write_snapshot(self._select("ORDER BY id"), len(self), path, sequence)
+
+    def save_snapshot(self, path):
+        '''
+            Export the contacts table to a snapshot file, which PhoneBook.load_snapshot opens as an in-memory phone book.
+            The database itself is left as it is.
+        '''
+        self._write_snapshot(path)
+        logger.info("Snapshot of the contacts in %s saved to %s", self.database, path)
+
+    @classmethod
+    def load_snapshot(cls, path, verify=True):
+        # The contacts of an SQLitePhoneBook live in its database, never in a snapshot's memory mapping
+        raise NotImplementedError("Open snapshots with PhoneBook.load_snapshot, or bulk import their contacts into the database")
+
+    def export_contacts(self, csv_file, columns=None, include_timestamps=False, contacts=None, **kwargs):
+        if contacts is None:
+            # Stream the rows straight from the database
+            contacts = self._select("ORDER BY id")
+        return super().export_contacts(csv_file, columns, include_timestamps, contacts, **kwargs)
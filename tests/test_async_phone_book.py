@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from async_phone_book import AsyncPhoneBook
+from benchmarks.dataset import generate_rows, write_csv
+from phone_book import PhoneBook
+from sqlite_phone_book import SQLitePhoneBook
+
+
+class TestAsyncPhoneBook(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.phonebook = AsyncPhoneBook(batch_size=3)
+        await self.phonebook.bulk_import_contacts("data.csv")
+
+    async def asyncTearDown(self):
+        await self.phonebook.close()
+
+    async def test_operations(self):
+        reference = PhoneBook()
+        reference.bulk_import_contacts("data.csv")
+        self.assertEqual(await self.phonebook.count(), 4)
+        contact = await self.phonebook.add_contact("Ann", "Lee", "(222) 222-2222")
+        self.assertIs(await self.phonebook.get_by_phone("(222) 222-2222"), contact)
+        with self.assertRaises(ValueError):
+            await self.phonebook.add_contact("Bob", "Lee", "(222) 222-2222")
+        await self.phonebook.update_contact(contact, first_name="Anna")
+        self.assertEqual([c.first_name for c in await self.phonebook.search_contact("Lee")], ["Anna"])
+        await self.phonebook.delete_contact(contact)
+        self.assertEqual([str(c) for c in await self.phonebook.sort_contacts('last_name', limit=2)],
+                         [str(c) for c in reference.sort_contacts('last_name', limit=2)])
+        self.assertEqual(await self.phonebook.count_contacts_by_area_code(), reference.count_contacts_by_area_code())
+
+    async def test_async_iterators(self):
+        reference = PhoneBook()
+        reference.bulk_import_contacts("data.csv")
+        self.assertEqual([str(c) async for c in self.phonebook.iter_contacts()], [str(c) for c in reference.contacts])
+        self.assertEqual([str(c) async for c in self.phonebook.iter_sorted_contacts('first_name', reverse=True)],
+                         [str(c) for c in reference.sort_contacts('first_name', reverse=True)])
+        self.assertEqual([str(c) async for c in self.phonebook.iter_search_contact("(")],
+                         [str(c) for c in reference.search_contact("(")])
+
+    async def test_changes_while_iterating(self):
+        contacts = self.phonebook.iter_contacts()
+        first = await anext(contacts)
+        # The first batch of 3 is already read: the deletion is seen from the next batch on
+        listed = await self.phonebook.list_contacts()
+        await self.phonebook.delete_contact(listed[1])
+        await self.phonebook.delete_contact(listed[3])
+        self.assertEqual([first] + [c async for c in contacts], listed[:3])
+
+        self.phonebook.batch_size = 1
+        contacts = self.phonebook.iter_contacts()
+        self.assertIs(await anext(contacts), listed[0])
+        await self.phonebook.delete_all_contacts()
+        await self.phonebook.add_contact("Ann", "Lee", "(222) 222-2222")
+        await self.phonebook.add_contact("Bob", "Lee", "(333) 333-3333")
+        await self.phonebook.add_contact("Cy", "Lee", "(444) 444-4444")
+        # The new contacts reuse the old record ids, so the iterator stops rather than list them
+        self.assertEqual([c async for c in contacts], [])
+
+    async def test_import_does_not_block_the_event_loop(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_file = os.path.join(directory, "contacts.csv")
+            write_csv(csv_file, generate_rows(50000))
+            gaps = []
+
+            async def tick():
+                last = time.perf_counter()
+                while True:
+                    await asyncio.sleep(0.001)
+                    now = time.perf_counter()
+                    gaps.append(now - last)
+                    last = now
+
+            ticker = asyncio.create_task(tick())
+            start = time.perf_counter()
+            summary = await self.phonebook.bulk_import_contacts(csv_file)
+            elapsed = time.perf_counter() - start
+            ticker.cancel()
+        self.assertEqual(summary.accepted, 50000)
+        # The loop kept running while the pool imported
+        self.assertGreater(len(gaps), 10)
+        self.assertLess(max(gaps), elapsed / 2)
+
+    async def test_plain_phone_book_needs_one_worker(self):
+        with self.assertRaises(ValueError):
+            AsyncPhoneBook(PhoneBook())
+        phonebook = AsyncPhoneBook(PhoneBook(), max_workers=1)
+        await phonebook.import_contacts("data.csv")
+        self.assertEqual(len([c async for c in phonebook.iter_search_contact("Smith")]), 2)
+        await phonebook.close()
+        database = SQLitePhoneBook(":memory:")
+        with self.assertRaises(ValueError):
+            AsyncPhoneBook(database, max_workers=1)
+        database.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import gzip
+import lzma
+import os
+import tempfile
+import unittest
+from phone_book import PhoneBook
+
+class TestBulkExport(unittest.TestCase):
+    def setUp(self):
+        self.phonebook = PhoneBook()
+        self.phonebook.import_contacts("data.csv")
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_export_summary(self):
+        summary = self.phonebook.export_contacts(self.path("export.csv"), buffer_size=16)
+        with open(self.path("export.csv"), "rb") as file:
+            data = file.read()
+        self.assertEqual(summary.rows, 4)
+        self.assertEqual(summary.bytes_written, len(data))
+        self.assertEqual(summary.file_size, len(data))
+        self.assertTrue(data.startswith(b"first_name,last_name,phone_number,email,address\r\nJohn,Smith,"))
+
+    def test_compression_from_extension(self):
+        self.phonebook.export_contacts(self.path("export.csv.gz"))
+        self.phonebook.export_contacts(self.path("export.csv"), compression="lzma")
+        with gzip.open(self.path("export.csv.gz"), "rt") as file:
+            self.assertEqual(len(file.readlines()), 5)
+        with lzma.open(self.path("export.csv"), "rt") as file:
+            self.assertEqual(len(file.readlines()), 5)
+        with self.assertRaises(ValueError):
+            self.phonebook.export_contacts(self.path("export.csv"), compression="zip")
+
+    def test_columns_and_timestamps(self):
+        self.phonebook.export_contacts(self.path("export.csv"), columns=["phone_number"], include_timestamps=True)
+        with open(self.path("export.csv")) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(lines[0], "phone_number,created_at,updated_at")
+        self.assertTrue(lines[1].startswith("(123) 456-7890,20"))
+        with self.assertRaises(ValueError):
+            self.phonebook.export_contacts(self.path("export.csv"), columns=["nickname"])
+
+    def test_export_search_results_with_filter(self):
+        results = self.phonebook.search_contact("Smith")
+        summary = self.phonebook.export_contacts(self.path("export.csv"), columns=["first_name"], contacts=results, where=lambda c: c.first_name != "John")
+        self.assertEqual(summary.rows, 1)
+        with open(self.path("export.csv")) as file:
+            self.assertEqual(file.read().splitlines(), ["first_name", "Lily"])
+
+if __name__ == "__main__":
+    unittest.main()
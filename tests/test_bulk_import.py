@@ -0,0 +1,88 @@
+import csv
+import itertools
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+import bulk_import
+from phone_book import PhoneBook
+
+class TestBulkImport(unittest.TestCase):
+    def setUp(self):
+        self.phonebook = PhoneBook()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.errors_file = os.path.join(self.tmpdir.name, "errors.csv")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_bulk_import_matches_import_contacts(self):
+        summary = self.phonebook.bulk_import_contacts("data.csv", self.errors_file, chunk_size=3)
+        self.assertEqual((summary.rows_read, summary.accepted, summary.rejected), (8, 4, 4))
+        reference = PhoneBook()
+        reference.import_contacts("data.csv")
+        self.assertEqual([(c.first_name, c.phone_number, c.email) for c in self.phonebook.contacts],
+                         [(c.first_name, c.phone_number, c.email) for c in reference.contacts])
+
+    def test_one_timestamp_per_import(self):
+        # A clock that moves on at every read: with 3-row chunks, the fourth contact comes from the second chunk
+        # and still has the timestamp of the first, since the clock is read once per import
+        clock = Mock(time=Mock(side_effect=itertools.count(1700000000, 60)), perf_counter=time.perf_counter)
+        with patch.object(bulk_import, 'time', clock):
+            self.phonebook.bulk_import_contacts("data.csv", chunk_size=3)
+        self.assertEqual([c.created_timestamp for c in self.phonebook.contacts], [1700000000] * 4)
+
+    def test_import_into_indexed_book(self):
+        self.phonebook.add_contact("Ann", "Lee", "(222) 222-2222")
+        self.assertEqual(len(self.phonebook.search_contact("Smith")), 0)
+        self.phonebook.sort_contacts('last_name')
+        # The import outgrows the book, so its secondary indexes are dropped and rebuilt by their next use
+        self.phonebook.bulk_import_contacts("data.csv")
+        self.assertIsNone(self.phonebook._name_grams)
+        self.assertEqual([c.phone_number for c in self.phonebook.search_contact("Smith")], ["(123) 456-7890", "(343) 343-7890"])
+        self.assertEqual([c.last_name for c in self.phonebook.sort_contacts('last_name')], ["Doe", "Lee", "Smith", "Smith", "Ying"])
+        self.assertEqual(self.phonebook.get_by_phone("(555) 455-9999").first_name, "Emily")
+
+    def test_errors_report(self):
+        self.phonebook.bulk_import_contacts("data.csv", self.errors_file)
+        with open(self.errors_file, newline='') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual([row['line_number'] for row in rows], ['6', '7', '8', '9'])
+        self.assertEqual(rows[0]['error'], "Phone number must be in the format (###) ###-####")
+        self.assertEqual(rows[1]['error'], "Invalid email address")
+        self.assertEqual(rows[2]['error'], "First name is required.")
+
+    def test_duplicates_are_rejected(self):
+        self.phonebook.bulk_import_contacts("data.csv")
+        summary = self.phonebook.bulk_import_contacts("data.csv", self.errors_file)
+        self.assertEqual((summary.accepted, summary.rejected), (0, 8))
+        self.assertEqual(len(self.phonebook), 4)
+
+    def test_parallel_import_matches_serial(self):
+        serial_errors = os.path.join(self.tmpdir.name, "serial_errors.csv")
+        self.phonebook.bulk_import_contacts("data.csv", serial_errors)
+        parallel = PhoneBook()
+        summary = parallel.bulk_import_contacts("data.csv", self.errors_file, workers=2)
+        self.assertEqual((summary.rows_read, summary.accepted, summary.rejected), (8, 4, 4))
+        self.assertEqual([c.phone_number for c in parallel.contacts], [c.phone_number for c in self.phonebook.contacts])
+        with open(serial_errors) as expected, open(self.errors_file) as actual:
+            self.assertEqual(actual.read(), expected.read())
+
+    def test_shards_cover_every_line_once(self):
+        fieldnames, data_start = bulk_import.read_header("data.csv")
+        shards = bulk_import.shard_bounds(data_start, os.path.getsize("data.csv"), 37)
+        self.assertGreater(len(shards), 8)
+        phone_numbers = []
+        for start, end in shards:
+            _, _, valid, rejected = bulk_import.parse_shard("data.csv", fieldnames, start, end)
+            phone_numbers += [row[3] for row in valid] + [row[2]['phone_number'] for row in rejected]
+        self.assertEqual(phone_numbers, ["(123) 456-7890", "(999) 999-9999", "(343) 343-7890", "(555) 455-9999",
+                                         "(***)", "(999) 123-4567", "(123) 456-7890", "(343) 343-7890"])
+
+    def test_missing_file(self):
+        with self.assertRaises(ValueError):
+            self.phonebook.bulk_import_contacts(os.path.join(self.tmpdir.name, "missing.csv"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -50,6 +50,24 @@ class TestContact(unittest.TestCase):
         self.assertEqual(contact.email, "johnny.doe@example.com")
         self.assertNotEqual(contact.updated_at, old_updated_at)
 
+    def test_timestamps_are_epoch_seconds(self):
+        contact = Contact("John", "Doe", "(123) 456-7890")
+        self.assertIsInstance(contact.created_timestamp, int)
+        self.assertEqual(contact.created_timestamp, contact.updated_timestamp)
+        self.assertEqual(contact.created_at, datetime.fromtimestamp(contact.created_timestamp))
+        contact.updated_at = datetime(2024, 5, 1, 12, 30, 15)
+        self.assertEqual(contact.updated_timestamp, int(datetime(2024, 5, 1, 12, 30, 15).timestamp()))
+        self.assertEqual(contact.updated_at, datetime(2024, 5, 1, 12, 30, 15))
+
+    def test_from_rows(self):
+        rows = [("John", "Doe", "(123) 456-7890", None, None), ("Jane", "Doe", "(987) 654-3210", "jane@example.com", "1 Elm Street")]
+        contacts = Contact.from_rows(rows)
+        self.assertEqual([contact.first_name for contact in contacts], ["John", "Jane"])
+        self.assertEqual(len({contact.created_timestamp for contact in contacts}), 1)
+        self.assertEqual(Contact.from_rows(rows, timestamp=1000)[1].updated_timestamp, 1000)
+        with self.assertRaises(ValueError):
+            Contact.from_rows(rows + [("Tom", "Lee", "123-456-7890", None, None)])
+
     def test_str_representation(self):
         contact = Contact("John", "Doe", "(123) 456-7890", "john.doe@example.com", "123 Elm Street")
         expected_str = f"John Doe - (123) 456-7890 - john.doe@example.com - 123 Elm Street (Created: {contact.created_at}, Updated: {contact.updated_at})"
@@ -0,0 +1,62 @@
+import unittest
+from datetime import datetime
+from contact import Contact
+from contact_store import ContactStore, pack_phone, unpack_phone
+from phone_book import PhoneBook
+
+class TestContactStore(unittest.TestCase):
+    def setUp(self):
+        self.store = ContactStore()
+
+    def test_pack_phone(self):
+        self.assertEqual(pack_phone("(012) 345-6789"), 123456789)
+        self.assertEqual(unpack_phone(123456789), "(012) 345-6789")
+        self.assertIsNone(pack_phone("(123) 456-7890 ext 5"))
+
+    def test_round_trip(self):
+        contact = Contact("John", "Doe", "(123) 456-7890", "jöhn@example.com", None)
+        self.store[0] = contact
+        self.store[1] = Contact("Jane", "Doe", "(123) 456-7890 ext 5")
+        copy = self.store[0]
+        self.assertIsNot(copy, contact)
+        self.assertEqual(str(copy), str(contact))
+        self.assertEqual(self.store[1].phone_number, "(123) 456-7890 ext 5")
+        self.assertEqual(len(self.store), 2)
+
+    def test_overwrite_and_pop(self):
+        self.store[0] = Contact("John", "Doe", "(123) 456-7890", "john@example.com", "12 Long Street Name")
+        self.store[0] = Contact("John", "Doe", "(123) 456-7890", "j@example.com", "A much longer street name than before")
+        self.assertEqual(self.store[0].email, "j@example.com")
+        self.assertEqual(self.store[0].address, "A much longer street name than before")
+        self.store.pop(0)
+        self.assertNotIn(0, self.store)
+        self.assertEqual(len(self.store), 0)
+        with self.assertRaises(KeyError):
+            self.store[0] = Contact("John", "Doe", "(123) 456-7890")
+
+    def test_phone_book_with_store(self):
+        phonebook = PhoneBook(store=self.store)
+        phonebook.import_contacts("data.csv")
+        self.assertEqual(len(phonebook), 4)
+        contact = phonebook.search_contact("Johnson")[0]
+        phonebook.update_contact(contact, first_name="Tommy")
+        self.assertEqual(phonebook.get_by_phone("(999) 999-9999").first_name, "Tommy")
+        phonebook.delete_contact(phonebook.get_by_phone("(999) 999-9999"))
+        self.assertEqual([c.first_name for c in phonebook.contacts], ["John", "Lily", "Emily"])
+        # A new phone book over the same store indexes the stored contacts
+        reopened = PhoneBook(store=self.store)
+        self.assertEqual(reopened.get_by_phone("(343) 343-7890").first_name, "Lily")
+        self.assertEqual(len(reopened.search_contact_by_created_time(datetime(2000, 1, 1), datetime(2100, 1, 1))), 3)
+
+    def test_phone_book_without_search_index(self):
+        phonebook = PhoneBook(store=self.store, search_index=False)
+        phonebook.import_contacts("data.csv")
+        reference = PhoneBook()
+        reference.import_contacts("data.csv")
+        for keyword in ["Smith", "smi", "99", "(343)", "nobody"]:
+            self.assertEqual([c.phone_number for c in phonebook.search_contact(keyword)],
+                             [c.phone_number for c in reference.search_contact(keyword)])
+        self.assertIsNone(phonebook._name_grams)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+from benchmarks import dataset
+from benchmarks.generate import AREA_CODES, ContactGenerator, HEADER, TRACE_MIX, zipf_probabilities
+from phone_book import PhoneBook
+from validation import contact_error
+
+
+class TestContactGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.csv_file = os.path.join(self.directory.name, "contacts.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_rows(self):
+        with open(self.csv_file, newline='', encoding='utf-8') as file:
+            return list(csv.DictReader(file))
+
+    def test_same_seed_same_file(self):
+        ContactGenerator(seed=7).write_csv(self.csv_file, 3000, chunk_size=1000)
+        with open(self.csv_file, 'rb') as file:
+            first = file.read()
+        ContactGenerator(seed=7).write_csv(self.csv_file, 3000, chunk_size=1000)
+        with open(self.csv_file, 'rb') as file:
+            self.assertEqual(file.read(), first)
+        ContactGenerator(seed=8).write_csv(self.csv_file, 3000, chunk_size=1000)
+        with open(self.csv_file, 'rb') as file:
+            self.assertNotEqual(file.read(), first)
+
+    def test_schema_and_unique_phone_numbers(self):
+        ContactGenerator().write_csv(self.csv_file, 5000, chunk_size=1500)
+        with open(self.csv_file, 'rb') as file:
+            self.assertEqual(file.readline(), HEADER)
+        rows = self.read_rows()
+        self.assertEqual(len(rows), 5000)
+        self.assertEqual(len({row['phone_number'] for row in rows}), 5000)
+        self.assertTrue(all(contact_error(row['first_name'], row['last_name'], row['phone_number'], row['email']) is None
+                            for row in rows))
+
+    def test_rates(self):
+        generator = ContactGenerator(invalid_phone_rate=0.1, invalid_email_rate=0.1, missing_email_rate=0.2,
+                                     missing_address_rate=0.3)
+        generator.write_csv(self.csv_file, 20000)
+        rows = self.read_rows()
+        invalid = [contact_error(row['first_name'], row['last_name'], row['phone_number'], row['email']) is not None
+                   for row in rows]
+        self.assertEqual(invalid, (~generator.valid).tolist())
+        self.assertAlmostEqual(sum(not row['email'] for row in rows) / 20000, 0.2, delta=0.02)
+        self.assertAlmostEqual(sum(not row['address'] for row in rows) / 20000, 0.3, delta=0.02)
+        # About 10% invalid phones, plus 10% of the other rows with an email that is present and malformed
+        self.assertAlmostEqual(sum(invalid) / 20000, 0.1 + 0.9 * 0.8 * 0.1, delta=0.02)
+
+    def test_name_skew(self):
+        generator = ContactGenerator(name_skew=2.0)
+        generator.write_csv(self.csv_file, 10000)
+        counts = Counter(row['first_name'] for row in self.read_rows())
+        self.assertGreater(counts.most_common(1)[0][1], 5000)
+        generator = ContactGenerator(name_skew=0)
+        generator.write_csv(self.csv_file, 10000)
+        counts = Counter(row['first_name'] for row in self.read_rows())
+        self.assertLess(counts.most_common(1)[0][1], 500)
+
+    def test_trace_replays_on_imported_contacts(self):
+        generator = ContactGenerator(invalid_phone_rate=0.05, invalid_email_rate=0.05)
+        generator.write_csv(self.csv_file, 2000)
+        trace_file = os.path.join(self.directory.name, "trace.jsonl")
+        self.assertEqual(generator.write_trace(trace_file, 500, mix={**TRACE_MIX, 'search_contact': 0.05}), 500)
+        phonebook = PhoneBook()
+        phonebook.bulk_import_contacts(self.csv_file)
+        operations = Counter()
+        with open(trace_file, encoding='utf-8') as file:
+            for line in file:
+                arguments = json.loads(line)
+                op = arguments.pop('op')
+                operations[op] += 1
+                if op in ('update_contact', 'delete_contact'):
+                    contact = phonebook.get_by_phone(arguments.pop('phone'))
+                    self.assertIsNotNone(contact)
+                    getattr(phonebook, op)(contact, **arguments)
+                elif op == 'get_by_phone':
+                    self.assertIsNotNone(phonebook.get_by_phone(**arguments))
+                else:
+                    getattr(phonebook, op)(**arguments)
+        self.assertEqual(set(operations), set(TRACE_MIX))
+
+
+class TestDatasetPhoneNumbers(unittest.TestCase):
+
+    def test_unique_with_skewed_area_codes(self):
+        phone_numbers = [dataset.phone_number(i) for i in range(30000)]
+        self.assertEqual(len(set(phone_numbers)), 30000)
+        self.assertTrue(all(contact_error("A", "B", phone_number, None) is None for phone_number in phone_numbers))
+        # Same area code distribution as ContactGenerator's default
+        counts = Counter(int(phone_number[1:4]) for phone_number in phone_numbers)
+        expected = zipf_probabilities(AREA_CODES, dataset.AREA_CODE_SKEW) * 30000
+        for rank in range(3):
+            self.assertAlmostEqual(counts[200 + rank], expected[rank], delta=expected[rank] * 0.05)
+        self.assertGreater(len(counts), 250)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from indexes import GroupIndex, NGramIndex, SortedIndex, SortedView
+
+class TestNGramIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = NGramIndex()
+        self.index.add(1, "john", "smith")
+        self.index.add(2, "johnson", "doe")
+
+    def test_candidates(self):
+        self.assertEqual(self.index.candidates("john"), {1, 2})
+        self.assertEqual(self.index.candidates("son"), {2})
+        self.assertEqual(self.index.candidates("mit"), {1})
+        self.assertEqual(self.index.candidates("tom"), set())
+
+    def test_short_keyword_cannot_be_narrowed(self):
+        self.assertIsNone(self.index.candidates("jo"))
+        self.assertIsNone(self.index.candidates(""))
+
+    def test_remove(self):
+        self.index.remove(2, "johnson", "doe")
+        self.assertEqual(self.index.candidates("john"), {1})
+        self.assertEqual(self.index.candidates("doe"), set())
+
+class TestSortedIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SortedIndex()
+        for record_id, key in enumerate([5, 1, 3, 3, 9]):
+            self.index.add(key, record_id)
+
+    def test_range(self):
+        self.assertEqual(self.index.range(3, 5), [2, 3, 0])
+        self.assertEqual(self.index.range(0, 100), [1, 2, 3, 0, 4])
+        self.assertEqual(self.index.range(6, 8), [])
+
+    def test_built_from_pairs(self):
+        # Built at once from unordered pairs, the index matches one built pair by pair and still takes single changes
+        index = SortedIndex((key, record_id) for record_id, key in enumerate([5, 1, 3, 3, 9]))
+        self.assertEqual(index.range(0, 100), self.index.range(0, 100))
+        index.add(3, 5)
+        self.assertEqual(index.range(3, 3), [2, 3, 5])
+
+    def test_remove(self):
+        self.index.remove(3, 2)
+        self.assertEqual(self.index.range(3, 3), [3])
+        with self.assertRaises(KeyError):
+            self.index.remove(3, 2)
+        self.assertEqual(len(self.index), 4)
+
+class TestSortedView(unittest.TestCase):
+    def test_iter_ids_is_stable_in_both_orders(self):
+        keys = [5, 1, 3, 3, 9]
+        view = SortedView((key, record_id) for record_id, key in enumerate(keys))
+        self.assertEqual(list(view.iter_ids()), sorted(range(5), key=keys.__getitem__))
+        self.assertEqual(list(view.iter_ids(reverse=True)), sorted(range(5), key=keys.__getitem__, reverse=True))
+
+    def test_buffered_changes(self):
+        view = SortedView([("b", 0), ("a", 1), ("b", 2)])
+        view.add("a", 3)
+        view.remove("b", 0)
+        view.add("b", 0)  # Unchanged update
+        view.remove("a", 1)
+        view.add("c", 1)
+        view.add("z", 4)
+        view.remove("z", 4)
+        self.assertEqual(len(view), 4)
+        self.assertEqual(list(view.iter_ids()), [3, 0, 2, 1])
+        view.remove("b", 2)
+        self.assertEqual(list(view.iter_ids(reverse=True)), [1, 0, 3])
+
+    def test_failed_merge_keeps_changes(self):
+        view = SortedView([("a", 0), ("b", 1)])
+        view.remove("a", 0)
+        view.add(None, 2)  # Cannot be compared with the other keys
+        with self.assertRaises(TypeError):
+            list(view.iter_ids())
+        view.remove(None, 2)
+        view.add("c", 2)
+        self.assertEqual(list(view.iter_ids()), [1, 2])
+
+class TestGroupIndex(unittest.TestCase):
+    def test_counts_and_members(self):
+        index = GroupIndex([("555", 3), ("123", 1), ("555", 0)])
+        self.assertEqual(index.counts(), {"123": 1, "555": 2})
+        self.assertEqual(index.count("555"), 2)
+        self.assertEqual(index.count("999"), 0)
+        self.assertEqual(index.members("555"), [0, 3])
+        index.remove("123", 1)
+        self.assertEqual(index.groups(), ["555"])
+        with self.assertRaises(KeyError):
+            index.remove("555", 1)
+
+if __name__ == "__main__":
+    unittest.main()
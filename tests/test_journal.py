@@ -0,0 +1,124 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from journal import Journal, JournaledPhoneBook
+from snapshot import SnapshotStore
+
+class TestJournaledPhoneBook(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.tmpdir.name, "phonebook.journal")
+        self.snapshot_path = os.path.join(self.tmpdir.name, "phonebook.snap")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def open(self, **kwargs):
+        return JournaledPhoneBook(self.journal_path, self.snapshot_path, **kwargs)
+
+    def make_changes(self, phonebook):
+        phonebook.import_contacts("data.csv")
+        contact = phonebook.get_by_phone("(999) 999-9999")
+        phonebook.update_contact(contact, first_name="Tommy", phone_number="(111) 111-1111")
+        phonebook.delete_contact(phonebook.get_by_phone("(123) 456-7890"))
+        phonebook.add_contact("Ann", "Lee", "(222) 222-2222")
+        phonebook.sort_contacts("last_name")
+
+    def test_replay(self):
+        phonebook = self.open(sync_every=None)
+        self.make_changes(phonebook)
+        expected = [str(c) for c in phonebook.contacts]
+        phonebook.close()
+        reopened = self.open()
+        self.assertEqual([str(c) for c in reopened.contacts], expected)
+        self.assertEqual(reopened.get_by_phone("(111) 111-1111").first_name, "Tommy")
+        reopened.delete_all_contacts()
+        reopened.close()
+        self.assertEqual(self.open().contacts, [])
+
+    def test_compaction(self):
+        phonebook = self.open(compact_every=3)
+        self.make_changes(phonebook)
+        expected = [str(c) for c in phonebook.contacts]
+        phonebook.close()
+        self.assertTrue(os.path.exists(self.snapshot_path))
+        with open(self.journal_path) as file:
+            self.assertLess(len(file.readlines()), 3)
+        reopened = self.open()
+        self.assertEqual([str(c) for c in reopened.contacts], expected)
+        # Entries already in the snapshot are skipped, e.g. after a crash between the snapshot and the truncation
+        reopened.add_contact("Bob", "Ray", "(333) 333-3333")
+        reopened.compact()
+        reopened.close()
+        self.assertEqual(len(self.open()), len(expected) + 1)
+
+    def test_compaction_reopens_the_snapshot(self):
+        phonebook = self.open()
+        phonebook.import_contacts("data.csv")
+        phonebook.compact()
+        phonebook.close()
+        phonebook = self.open()
+        old_store = phonebook._records
+        phonebook.add_contact("Ann", "Lee", "(222) 222-2222")
+        # The contacts are read from the mapped snapshot being replaced, which is closed before the rename
+        phonebook.compact()
+        self.assertTrue(old_store._map.closed)
+        self.assertIsInstance(phonebook._records, SnapshotStore)
+        self.assertEqual(phonebook._records._changed, {})
+        self.assertEqual(phonebook.get_by_phone("(222) 222-2222").first_name, "Ann")
+        phonebook.delete_contact(phonebook.get_by_phone("(123) 456-7890"))
+        expected = [str(c) for c in phonebook.contacts]
+        phonebook.close()
+        self.assertEqual([str(c) for c in self.open().contacts], expected)
+
+    def test_sync_interval_is_a_bound(self):
+        journal = Journal(self.journal_path, sync_every=None, sync_interval=0.05)
+        journal.append('clear')
+        self.assertEqual(journal._unsynced, 1)
+        # No further append comes to check the interval; the flusher thread syncs the entry
+        deadline = time.monotonic() + 5
+        while journal._unsynced and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(journal._unsynced, 0)
+        journal.close()
+        self.assertIsNone(journal._flusher)
+
+    def test_torn_last_entry(self):
+        phonebook = self.open()
+        phonebook.add_contact("John", "Doe", "(123) 456-7890")
+        phonebook.close()
+        with open(self.journal_path, "ab") as file:
+            file.write(b'{"seq":2,"op":"add","cont')
+        reopened = self.open()
+        self.assertEqual(len(reopened), 1)
+        reopened.add_contact("Jane", "Doe", "(123) 456-7891")
+        reopened.close()
+        self.assertEqual(len(self.open()), 2)
+
+    def test_failed_append_leaves_memory_unchanged(self):
+        phonebook = self.open()
+        phonebook.import_contacts("data.csv")
+        expected = [str(c) for c in phonebook.contacts]
+        contact = phonebook.get_by_phone("(999) 999-9999")
+        with patch.object(Journal, 'append', side_effect=OSError("No space left on device")):
+            with self.assertRaises(OSError):
+                phonebook.add_contact("Ann", "Lee", "(222) 222-2222")
+            with self.assertRaises(OSError):
+                phonebook.update_contact(contact, first_name="Tommy", phone_number="(111) 111-1111")
+            with self.assertRaises(OSError):
+                phonebook.delete_contact(contact)
+            with self.assertRaises(OSError):
+                phonebook.delete_all_contacts()
+        # Memory still matches what the journal replays, and every index still finds the contacts
+        self.assertEqual([str(c) for c in phonebook.contacts], expected)
+        self.assertIsNone(phonebook.get_by_phone("(222) 222-2222"))
+        self.assertIs(phonebook.get_by_phone("(999) 999-9999"), contact)
+        self.assertEqual(phonebook.search_contact("Tommy"), [])
+        phonebook.add_contact("Ann", "Lee", "(222) 222-2222")
+        phonebook.close()
+        self.assertEqual([str(c) for c in self.open().contacts], [str(c) for c in phonebook.contacts])
+
+if __name__ == "__main__":
+    unittest.main()
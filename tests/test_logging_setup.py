@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+from contact import Contact
+from logging_setup import JsonFormatter, configure_logging, shutdown_logging, log_results, SAMPLE_SIZE
+
+
+class TestLoggingSetup(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, "test.log")
+        self.logger = logging.getLogger("test_logging_setup")
+        self.contacts = [Contact("John", "Doe", f"(123) 456-{number:04d}") for number in range(10)]
+
+    def tearDown(self):
+        shutdown_logging()
+        self.directory.cleanup()
+
+    def read_log(self, writer, path=None):
+        # The writer works on a background thread; stopping it writes out every queued record
+        writer.stop()
+        with open(path or self.log_file, encoding='utf-8') as file:
+            return file.read().splitlines()
+
+    def test_log_results_writes_count_and_sample(self):
+        writer = configure_logging(self.log_file)
+        log_results(self.logger, self.contacts, "Search results for '%s'", "Doe")
+        lines = self.read_log(writer)
+        self.assertEqual(len(lines), 1)
+        self.assertIn("Search results for 'Doe': 10 contacts, first ['(123) 456-0000'", lines[0])
+        self.assertNotIn("(123) 456-0005", lines[0])
+
+    def test_log_results_does_not_format_contacts(self):
+        configure_logging(self.log_file)
+        with patch.object(Contact, '__str__', side_effect=AssertionError("contact formatted")):
+            log_results(self.logger, self.contacts, "Results")
+
+    def test_log_results_skipped_when_info_disabled(self):
+        writer = configure_logging(self.log_file, level=logging.WARNING)
+        results = unittest.mock.MagicMock()
+        log_results(self.logger, results, "Results")
+        results.__len__.assert_not_called()
+        results.__iter__.assert_not_called()
+        # Nothing was logged, so the file was never created
+        writer.stop()
+        self.assertFalse(os.path.exists(self.log_file))
+
+    def test_json_format(self):
+        writer = configure_logging(self.log_file, json_format=True)
+        log_results(self.logger, self.contacts, "Results")
+        self.logger.error("Plain %s", "message")
+        first, second = [json.loads(line) for line in self.read_log(writer)]
+        self.assertEqual(first['message'], f"Results: 10 contacts, first {[c.phone_number for c in self.contacts[:SAMPLE_SIZE]]}")
+        self.assertEqual(first['count'], 10)
+        self.assertEqual(first['sample'], [contact.phone_number for contact in self.contacts[:SAMPLE_SIZE]])
+        self.assertEqual(first['level'], "INFO")
+        self.assertEqual(second['message'], "Plain message")
+        self.assertEqual(second['level'], "ERROR")
+        self.assertNotIn('count', second)
+
+    def test_batches_are_written_in_order(self):
+        writer = configure_logging(self.log_file, batch_size=7, flush_interval=0)
+        for number in range(100):
+            self.logger.info("Record %d", number)
+        self.assertEqual([line.split(" - ")[1] for line in self.read_log(writer)], [f"Record {number}" for number in range(100)])
+
+    def test_arguments_are_logged_as_they_were(self):
+        writer = configure_logging(self.log_file)
+        contact = self.contacts[0]
+        self.logger.info("Contact added: %s", contact)
+        contact.update_contact(first_name="Jane")
+        self.assertIn("Contact added: John Doe", self.read_log(writer)[0])
+
+    def test_rotation_by_size(self):
+        writer = configure_logging(self.log_file, max_bytes=1000, backup_count=2)
+        for number in range(100):
+            self.logger.info("Record %d", number)
+        lines = self.read_log(writer)
+        self.assertTrue(os.path.exists(self.log_file + ".1"))
+        self.assertTrue(os.path.exists(self.log_file + ".2"))
+        self.assertFalse(os.path.exists(self.log_file + ".3"))
+        self.assertLess(os.path.getsize(self.log_file), 1000)
+        self.assertTrue(lines[-1].endswith("Record 99"))
+
+    def test_rotation_by_size_and_time_rejected(self):
+        with self.assertRaises(ValueError):
+            configure_logging(self.log_file, max_bytes=1000, when='midnight')
+
+    def test_nothing_configured_on_import(self):
+        # A fresh interpreter, so that the import really runs
+        code = "import logging, phone_book, sqlite_phone_book, journal; print(len(logging.getLogger().handlers))"
+        package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, "-c", code], cwd=self.directory.name, capture_output=True, text=True, check=True,
+                                env={**os.environ, 'PYTHONPATH': package}).stdout
+        self.assertEqual(output.strip(), "0")
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_json_formatter_includes_exception(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = self.logger.makeRecord(self.logger.name, logging.ERROR, __file__, 0, "Failed", (), sys.exc_info())
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertIn("ValueError: boom", entry['exception'])
+
+
+if __name__ == '__main__':
+    unittest.main()
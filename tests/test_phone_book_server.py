@@ -0,0 +1,127 @@
+import asyncio
+import http.client
+import json
+import re
+import unittest
+from urllib.parse import quote
+from phone_book_server import PhoneBookServer
+
+
+class TestPhoneBookServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = PhoneBookServer(port=0)
+        await self.server.phonebook.bulk_import_contacts("data.csv")
+        await self.server.start()
+        self.connection = http.client.HTTPConnection(self.server.host, self.server.port, timeout=10)
+
+    async def asyncTearDown(self):
+        self.connection.close()
+        await self.server.close()
+
+    async def request(self, method, path, body=None):
+        # Run the blocking client on a thread, so the server keeps running on the loop; one connection for every request
+        def send():
+            data = None if body is None else body if isinstance(body, str) else json.dumps(body)
+            self.connection.request(method, path, data)
+            response = self.connection.getresponse()
+            return response.status, response.getheaders(), response.read().decode('utf-8')
+        return await asyncio.to_thread(send)
+
+    async def json_request(self, method, path, body=None):
+        status, _, text = await self.request(method, path, body)
+        return status, json.loads(text) if text else None
+
+    async def ndjson_request(self, path):
+        status, headers, text = await self.request('GET', path)
+        self.assertEqual((status, dict(headers)['Transfer-Encoding']), (200, 'chunked'))
+        return [json.loads(line) for line in text.splitlines()]
+
+    async def test_contact_lifecycle(self):
+        status, contact = await self.json_request('POST', '/contacts', {'first_name': "Ann", 'last_name': "Lee", 'phone_number': "(222) 222-2222"})
+        self.assertEqual((status, contact['first_name'], contact['email']), (201, "Ann", None))
+        status, error = await self.json_request('POST', '/contacts', {'first_name': "Bob", 'last_name': "Lee", 'phone_number': "(222) 222-2222"})
+        self.assertEqual(status, 400)
+        self.assertIn("already exists", error['error'])
+        path = '/contacts/' + quote("(222) 222-2222")
+        self.assertEqual((await self.json_request('GET', path))[1]['last_name'], "Lee")
+        status, contact = await self.json_request('PATCH', path, {'first_name': "Anna", 'phone_number': "(333) 333-3333"})
+        self.assertEqual((status, contact['first_name'], contact['phone_number']), (200, "Anna", "(333) 333-3333"))
+        self.assertEqual((await self.json_request('GET', path))[0], 404)
+        self.assertEqual((await self.json_request('PATCH', '/contacts/' + quote("(333) 333-3333"), {'age': 3}))[0], 400)
+        self.assertEqual(await self.json_request('DELETE', '/contacts/' + quote("(333) 333-3333")), (204, None))
+        self.assertEqual(await self.json_request('GET', '/count'), (200, {'count': 4}))
+        self.assertEqual(await self.json_request('DELETE', '/contacts'), (204, None))
+        self.assertEqual(await self.json_request('GET', '/count'), (200, {'count': 0}))
+
+    async def test_bulk_add(self):
+        rows = [{'first_name': "Ann", 'last_name': "Lee", 'phone_number': "(222) 222-2222"},
+                {'first_name': "Bob", 'last_name': "Lee", 'phone_number': "bad"},
+                {'first_name': "Cy", 'last_name': "Lee", 'phone_number': "(444) 444-4444"}]
+        status, result = await self.json_request('POST', '/contacts/bulk', "\n".join(map(json.dumps, rows)))
+        self.assertEqual((status, result['added'], [error['index'] for error in result['errors']]), (200, 2, [1]))
+        status, result = await self.json_request('POST', '/contacts/bulk', rows)
+        self.assertEqual((result['added'], len(result['errors'])), (0, 3))
+
+    async def test_streamed_queries(self):
+        contacts = await self.ndjson_request('/contacts')
+        self.assertEqual([contact['phone_number'] for contact in contacts],
+                         ["(123) 456-7890", "(999) 999-9999", "(343) 343-7890", "(555) 455-9999"])
+        self.assertEqual([contact['last_name'] for contact in await self.ndjson_request('/search?q=Smith&offset=1')], ["Smith"])
+        sorted_contacts = await self.ndjson_request('/sorted?key=last_name,first_name&reverse=true&limit=2')
+        self.assertEqual([(c['last_name'], c['first_name']) for c in sorted_contacts], [("Ying", "Emily"), ("Smith", "Lily")])
+        created = await self.ndjson_request('/search/created?start=2000-01-01T00:00:00&end=2100-01-01T00:00:00')
+        self.assertEqual(len(created), 4)
+        self.assertEqual((await self.json_request('GET', '/search/updated?start=2000-01-01'))[0], 400)
+        self.assertEqual(await self.json_request('GET', '/groups/area_code'),
+                         (200, {'123': 1, '343': 1, '555': 1, '999': 1}))
+        self.assertEqual([c['first_name'] for c in await self.ndjson_request('/groups/initial/first_name/L')], ["Lily"])
+        self.assertEqual((await self.json_request('GET', '/sorted?key=age'))[0], 400)
+
+    async def test_export(self):
+        status, headers, text = await self.request('GET', '/export?columns=first_name,phone_number&q=Smith')
+        self.assertEqual(dict(headers)['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(text.splitlines(), ["first_name,phone_number", "John,(123) 456-7890", "Lily,(343) 343-7890"])
+        self.assertEqual((await self.json_request('GET', '/export?columns=age'))[0], 400)
+
+    async def test_errors(self):
+        self.assertEqual((await self.json_request('GET', '/nowhere'))[0], 404)
+        self.assertEqual((await self.json_request('PUT', '/contacts'))[0], 405)
+        self.assertEqual((await self.json_request('POST', '/contacts', "{not json"))[0], 400)
+        self.assertEqual((await self.json_request('GET', '/contacts?limit=-1'))[0], 400)
+        self.assertEqual((await self.json_request('GET', '/search?q=Smith&offset=-2'))[0], 400)
+        # The connection is still usable after every error
+        self.assertEqual((await self.json_request('GET', '/count'))[1], {'count': 4})
+
+    async def test_pipelined_requests(self):
+        reader, writer = await asyncio.open_connection(self.server.host, self.server.port)
+        body = json.dumps({'first_name': "Ann", 'last_name': "Lee", 'phone_number': "(222) 222-2222"}).encode()
+        writer.write(b"GET /count HTTP/1.1\r\nHost: x\r\n\r\n"
+                     b"POST /contacts HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n%s"
+                     b"GET /count HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n" % (len(body), body))
+        await writer.drain()
+        responses = (await asyncio.wait_for(reader.read(), 10)).decode()
+        writer.close()
+        # Answered in order, on the one connection
+        self.assertEqual(re.findall(r"HTTP/1.1 \d+", responses), ["HTTP/1.1 200", "HTTP/1.1 201", "HTTP/1.1 200"])
+        self.assertLess(responses.index('{"count": 4}'), responses.index('{"count": 5}'))
+
+
+    async def test_error_while_streaming_closes_the_connection(self):
+        async def failing_contacts():
+            yield (await self.server.phonebook.list_contacts())[0]
+            raise RuntimeError("storage failed")
+        self.server.phonebook.iter_contacts = failing_contacts
+        reader, writer = await asyncio.open_connection(self.server.host, self.server.port)
+        writer.write(b"GET /contacts HTTP/1.1\r\nHost: x\r\n\r\nGET /count HTTP/1.1\r\nHost: x\r\n\r\n")
+        await writer.drain()
+        with self.assertLogs('phone_book_server', 'ERROR'):
+            response = (await asyncio.wait_for(reader.read(), 10)).decode()
+        writer.close()
+        # The headers were sent, but the body never ends and the next request is not answered
+        self.assertTrue(response.startswith("HTTP/1.1 200"))
+        self.assertNotIn("0\r\n\r\n", response)
+        self.assertEqual(len(re.findall(r"HTTP/1.1 \d+", response)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
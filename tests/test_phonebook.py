@@ -10,7 +10,7 @@ class Test_PhoneBook(unittest.TestCase):
     def test_add_contact(self):
         contact = Contact("John", "Doe", "1234567890", "john@gmail.com", "123 Main St")
         self.phonebook.add_contact(contact)  # Add a contact
-        self.assertEqual(len(self.phonebook.contacts), 1)
+        self.assertEqual(len(self.phonebook), 1)
         self.assertEqual(self.phonebook.contacts[0].first_name, "John")
         self.assertEqual(self.phonebook.contacts[0].last_name, "Doe")
         self.assertEqual(self.phonebook.contacts[0].phone_number, "1234567890")
@@ -18,11 +18,20 @@ class Test_PhoneBook(unittest.TestCase):
         self.assertEqual(self.phonebook.contacts[0].address, "123 Main St")
     def test_import_contacts(self):
         self.phonebook.import_contacts("data.csv")  # Import contacts from CSV file
-        self.assertEqual(len(self.phonebook.contacts), 4)
+        self.assertEqual(len(self.phonebook), 4)
     def test_search_contact(self):
         self.phonebook.import_contacts("data.csv")
         results = self.phonebook.search_contact("Tom")
         self.assertEqual(len(results), 0)
+    def test_search_contact_matches_linear_scan(self):
+        self.phonebook.import_contacts("data.csv")
+        self.phonebook.add_contact("Ann", "O'Brien", "(456) 123-4567")
+        contact = self.phonebook.get_by_phone("(343) 343-7890")
+        self.phonebook.update_contact(contact, last_name="Smithson", phone_number="(343) 343-0000")
+        self.phonebook.delete_contact(self.phonebook.get_by_phone("(555) 455-9999"))
+        for keyword in ["", "j", "Jo", "john", "SMITH", "mith", "son", "(123", "456", "3-4", "7890", "brien", "Tom", "xyz"]:
+            expected = [c for c in self.phonebook.contacts if keyword.lower() in c.first_name.lower() or keyword.lower() in c.last_name.lower() or keyword in c.phone_number]
+            self.assertEqual(self.phonebook.search_contact(keyword), expected, keyword)
     def test_update_contact(self):
         self.phonebook.import_contacts("data.csv")
         contact = self.phonebook.search_contact("Johnson")[0]
@@ -34,6 +43,30 @@ class Test_PhoneBook(unittest.TestCase):
         contact = self.phonebook.search_contact("Johnson")[0]
         self.phonebook.delete_contact(contact)
         self.assertEqual(len(self.phonebook.search_contact("Johnson")), 0)
+    def test_get_by_phone(self):
+        self.phonebook.import_contacts("data.csv")
+        contact = self.phonebook.get_by_phone("(999) 999-9999")
+        self.assertEqual(contact.first_name, "Johnson")
+        self.assertIsNone(self.phonebook.get_by_phone("(000) 000-0000"))
+    def test_add_duplicate_phone_number(self):
+        self.phonebook.add_contact("John", "Doe", "(123) 456-7890")
+        with self.assertRaises(ValueError):
+            self.phonebook.add_contact("Jane", "Doe", "(123) 456-7890")
+        self.assertEqual(len(self.phonebook), 1)
+    def test_phone_index_follows_update_and_delete(self):
+        self.phonebook.import_contacts("data.csv")
+        contact = self.phonebook.get_by_phone("(999) 999-9999")
+        self.phonebook.update_contact(contact, phone_number="(111) 111-1111")
+        self.assertIsNone(self.phonebook.get_by_phone("(999) 999-9999"))
+        self.assertIs(self.phonebook.get_by_phone("(111) 111-1111"), contact)
+        with self.assertRaises(ValueError):
+            self.phonebook.update_contact(contact, phone_number="(123) 456-7890")
+        self.phonebook.delete_contact(contact)
+        self.assertIsNone(self.phonebook.get_by_phone("(111) 111-1111"))
+        with self.assertRaises(ValueError):
+            self.phonebook.delete_contact(contact)
+        self.phonebook.delete_all_contacts()
+        self.assertIsNone(self.phonebook.get_by_phone("(123) 456-7890"))
     def test_search_contact_by_updated_time(self):
         self.phonebook.import_contacts("data.csv")
         results = self.phonebook.search_contact_by_time(datetime.datetime(2021, 1, 1), datetime.datetime(2021, 1, 31))
@@ -42,6 +75,83 @@ class Test_PhoneBook(unittest.TestCase):
         results = self.phonebook.search_contact_by_time(datetime.datetime(2024, 1, 1), datetime.datetime(2024, 12, 31))
         self.assertEqual(len(results), 4)
     
+    def test_search_contact_by_time_range_follows_updates(self):
+        self.phonebook.import_contacts("data.csv")
+        now = datetime.datetime.now()
+        hour = datetime.timedelta(hours=1)
+        self.assertEqual(len(self.phonebook.search_contact_by_created_time(now - hour, now + hour)), 4)
+        self.assertEqual(len(self.phonebook.search_contact_by_created_time(now + hour, now + 2 * hour)), 0)
+        contact = self.phonebook.get_by_phone("(999) 999-9999")
+        # Backdate the contact so that the update moves it in the updated time index
+        self.phonebook.delete_contact(contact)
+        contact.updated_at = now - 3 * hour
+        self.phonebook._insert(contact)
+        self.assertEqual(self.phonebook.search_contact_by_updated_time(now - 4 * hour, now - 2 * hour), [contact])
+        self.phonebook.update_contact(contact, first_name="Tommy")
+        self.assertEqual(self.phonebook.search_contact_by_updated_time(now - 4 * hour, now - 2 * hour), [])
+        self.assertIn(contact, self.phonebook.search_contact_by_updated_time(now - hour, now + hour))
+    def test_pagination(self):
+        for i in range(10):
+            self.phonebook.add_contact(f"John{i}", "Doe", "(123) 456-%04d" % i)
+        contacts = self.phonebook.contacts
+        self.assertEqual(self.phonebook.list_contacts(offset=3, limit=4), contacts[3:7])
+        self.assertEqual(self.phonebook.list_contacts(offset=8, limit=4), contacts[8:])
+        self.assertEqual(self.phonebook.list_contacts(limit=0), [])
+        self.assertEqual(list(self.phonebook.iter_contacts()), contacts)
+        self.assertEqual(self.phonebook.search_contact("john", offset=2, limit=2), contacts[2:4])
+        self.assertEqual(list(self.phonebook.iter_search_contact("456")), contacts)
+        now = datetime.datetime.now()
+        hour = datetime.timedelta(hours=1)
+        self.assertEqual(len(self.phonebook.search_contact_by_created_time(now - hour, now + hour, offset=7)), 3)
+        self.assertEqual(len(list(self.phonebook.iter_search_contact_by_updated_time(now - hour, now + hour))), 10)
+    def test_contacts_view(self):
+        self.phonebook.import_contacts("data.csv")
+        contacts = self.phonebook.contacts
+        self.assertEqual((len(contacts), contacts[-1], contacts[1:3]), (4, self.phonebook.list_contacts()[3], self.phonebook.list_contacts(1, 2)))
+        # Read-only: changing the phone book goes through its methods, and the view follows them
+        with self.assertRaises(AttributeError):
+            contacts.append(Contact("Ann", "Lee", "(222) 222-2222"))
+        with self.assertRaises(TypeError):
+            contacts[0] = None
+        contact = self.phonebook.add_contact("Ann", "Lee", "(222) 222-2222")
+        self.assertEqual((len(contacts), contacts[4]), (5, contact))
+        with self.assertRaises(IndexError):
+            contacts[5]
+    def test_sort_contacts_is_non_destructive_and_follows_changes(self):
+        self.phonebook.import_contacts("data.csv")
+        self.phonebook.add_contact("Anna", "Doe", "(555) 555-5555")
+        listing = self.phonebook.contacts
+        for key in ["first_name", "last_name", "created_at"]:
+            for reverse in [False, True]:
+                expected = sorted(listing, key=lambda c: getattr(c, key), reverse=reverse)
+                self.assertEqual(self.phonebook.sort_contacts(key, reverse), expected)
+        self.assertEqual(self.phonebook.contacts, listing)
+        by_name = self.phonebook.sort_contacts(("last_name", "first_name"))
+        self.assertEqual(by_name, sorted(listing, key=lambda c: (c.last_name, c.first_name)))
+        # The cached views are kept up to date by later changes
+        contact = self.phonebook.add_contact("Aaron", "Zed", "(666) 666-6666")
+        self.phonebook.update_contact(self.phonebook.get_by_phone("(555) 555-5555"), first_name="Zoe")
+        self.phonebook.delete_contact(self.phonebook.get_by_phone("(999) 999-9999"))
+        listing = self.phonebook.contacts
+        self.assertEqual(self.phonebook.sort_contacts("first_name"), sorted(listing, key=lambda c: c.first_name))
+        self.assertEqual(self.phonebook.sort_contacts(["last_name", "first_name"], True),
+                         sorted(listing, key=lambda c: (c.last_name, c.first_name), reverse=True))
+        self.assertEqual(self.phonebook.sort_contacts("first_name", limit=1), [contact])
+        with self.assertRaises(ValueError):
+            self.phonebook.sort_contacts("nickname")
+    def test_sort_by_optional_attribute(self):
+        self.phonebook.import_contacts("data.csv")
+        self.assertEqual(self.phonebook.sort_contacts("email")[0].phone_number, "(555) 455-9999")  # Empty email
+        # A contact without an email, None, added after a deletion the view has not merged yet
+        self.phonebook.delete_contact(self.phonebook.get_by_phone("(123) 456-7890"))
+        contact = self.phonebook.add_contact("Anna", "Doe", "(555) 555-5555")
+        self.assertEqual(self.phonebook.sort_contacts("email")[:2], [contact, self.phonebook.get_by_phone("(555) 455-9999")])
+        self.phonebook.update_contact(contact, email="aaa@example.com")
+        listing = self.phonebook.contacts
+        expected = sorted(listing, key=lambda c: (c.email is not None, c.email or ""))
+        self.assertEqual(self.phonebook.sort_contacts("email"), expected)
+        self.assertEqual(self.phonebook.sort_contacts(("email", "first_name"), True),
+                         sorted(listing, key=lambda c: (c.email is not None, c.email or "", c.first_name), reverse=True))
     def test_group_contact_by_initial_letter(self):
         self.phonebook.import_contacts("data.csv")
         # Group contacts by first name
@@ -59,6 +169,29 @@ class Test_PhoneBook(unittest.TestCase):
         self.assertEqual(len(results['Y']), 1)
         self.assertIsNone(results.get('T'))
 
+    def test_group_indexes_follow_changes(self):
+        self.phonebook.import_contacts("data.csv")
+        self.assertEqual(self.phonebook.count_contacts_by_area_code(), {"123": 1, "343": 1, "555": 1, "999": 1})
+        self.assertEqual(self.phonebook.count_contacts_by_initial_letter("first_name"), {"E": 1, "J": 2, "L": 1})
+        self.phonebook.add_contact("jim", "Beam", "(555) 000-0000")
+        contact = self.phonebook.get_by_phone("(999) 999-9999")
+        self.phonebook.update_contact(contact, first_name="Zed", phone_number="(555) 999-9999")
+        self.phonebook.delete_contact(self.phonebook.get_by_phone("(343) 343-7890"))
+        self.assertEqual(self.phonebook.count_contacts_by_area_code("555"), 3)
+        self.assertEqual(self.phonebook.count_contacts_by_area_code("999"), 0)
+        self.assertEqual(self.phonebook.count_contacts_by_initial_letter("first_name", "j"), 2)
+        self.assertEqual(self.phonebook.get_contacts_by_area_code("555")[0], contact)
+        self.assertEqual([c.first_name for c in self.phonebook.get_contacts_by_initial_letter("first_name", "J")], ["John", "jim"])
+        # Same groups as grouping every contact from scratch
+        expected = {}
+        for c in self.phonebook.contacts:
+            expected.setdefault(c.phone_number[1:4], []).append(c)
+        self.assertEqual(self.phonebook.group_contacts_by_area_code(), dict(sorted(expected.items())))
+        self.assertEqual(self.phonebook.count_contacts_by_initial_letter("email")[""], 2)
+        with self.assertRaises(ValueError):
+            self.phonebook.count_contacts_by_initial_letter("created_at")
+        self.phonebook.delete_all_contacts()
+        self.assertEqual(self.phonebook.count_contacts_by_area_code(), {})
     def test_export_contacts(self):
         self.phonebook.import_contacts("data.csv")
         self.phonebook.export_contacts("export.csv")
@@ -1,7 +1,22 @@
+import csv
+import io
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
 from unittest.mock import patch, MagicMock
-from phone_book_CLI import PhoneBookCLI
+from phone_book_CLI import PhoneBookCLI, PAGE_SIZE, main, run_script, split_words, where_filter
 from contact import Contact
+from logging_setup import shutdown_logging
+from phone_book import PhoneBook
+
+PACKAGE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 class TestPhoneBookCLI(unittest.TestCase):
     def setUp(self):
@@ -26,9 +41,26 @@ class TestPhoneBookCLI(unittest.TestCase):
 
     @patch('builtins.input', side_effect=["John"])
     def test_search_contact_by_name_or_phone_number(self, mock_input):
-        self.cli.phonebook.search_contact.return_value = [Contact("John", "Doe", "(123) 456-7890", "john@example.com", "123 Main St")]
+        self.cli.phonebook.iter_search_contact.return_value = iter([Contact("John", "Doe", "(123) 456-7890", "john@example.com", "123 Main St")])
         self.cli.search_contact_by_name_or_phone_number()
-        self.cli.phonebook.search_contact.assert_called_once_with("John")
+        self.cli.phonebook.iter_search_contact.assert_called_once_with("John")
+
+    @patch('builtins.input', side_effect=["n", "q"])
+    def test_list_all_contacts_pages(self, mock_input):
+        contacts = [Contact("John", "Doe", "(123) 456-%04d" % i) for i in range(100)]
+        read = []
+        def iter_contacts():
+            # Record how far the listing reads
+            for contact in contacts:
+                read.append(contact)
+                yield contact
+        self.cli.phonebook.iter_contacts.side_effect = iter_contacts
+        with patch('builtins.print') as mock_print:
+            self.cli.list_all_contacts()
+        # Two pages printed; the third was read to know there was more, and the user stopped there
+        self.assertEqual(mock_print.call_count, 2 * PAGE_SIZE)
+        self.assertEqual(len(read), 3 * PAGE_SIZE)
+        self.assertEqual(mock_input.call_count, 2)
 
     @patch('builtins.input', side_effect=["John", "1, 22,    2"])
     def test_delete_contact_by_search(self, mock_input):
@@ -42,5 +74,133 @@ class TestPhoneBookCLI(unittest.TestCase):
         self.cli.phonebook.delete_contact.assert_any_call(self.cli.phonebook.search_contact.return_value[2])
         self.assertEqual(self.cli.phonebook.delete_contact.call_count, 2)
 
+class TestBatchCommands(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.tmpdir.name, "book.snap")
+
+    def tearDown(self):
+        shutdown_logging()
+        self.tmpdir.cleanup()
+
+    def run_cli(self, *arguments):
+        # Run the command line; return the exit status and what it printed
+        output = io.StringIO()
+        errors = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(errors):
+            status = main(["--snapshot", self.snapshot, "--log-file", os.path.join(self.tmpdir.name, "log"), *arguments])
+        return status, output.getvalue(), errors.getvalue()
+
+    def test_commands_share_a_snapshot(self):
+        status, output, _ = self.run_cli("import", "data.csv")
+        self.assertEqual(status, 0)
+        self.assertIn("4 accepted", output)
+        status, output, _ = self.run_cli("search", "Smith", "--limit", "1", "--json")
+        self.assertEqual([json.loads(line)['first_name'] for line in output.splitlines()], ["John"])
+        self.assertEqual(self.run_cli("add", "Ann", "Lee", "(222) 222-2222", "--email", "ann@example.com")[0], 0)
+        self.assertEqual(self.run_cli("update", "(222) 222-2222", "--first-name", "Anna")[0], 0)
+        self.assertIn("Anna Lee", self.run_cli("get", "(222) 222-2222")[1])
+        status, _, errors = self.run_cli("delete", "(000) 000-0000")
+        self.assertEqual(status, 1)
+        self.assertIn("No contact", errors)
+        status, output, _ = self.run_cli("stats", "--json")
+        stats = json.loads(output)
+        self.assertEqual((stats['contacts'], stats['last_name_initials']), (5, {'D': 1, 'L': 1, 'S': 2, 'Y': 1}))
+
+    def test_menu_changes_are_saved(self):
+        with patch.object(PhoneBookCLI, 'main', lambda cli: cli.phonebook.add_contact("Ann", "Lee", "(222) 222-2222")):
+            self.assertEqual(self.run_cli()[0], 0)
+        self.assertEqual([c.first_name for c in PhoneBook.load_snapshot(self.snapshot).contacts], ["Ann"])
+
+    def test_contacts_import_is_saved(self):
+        # Seeding a snapshot with --contacts saves it even though the command itself changes nothing
+        status, output, _ = self.run_cli("--contacts", "data.csv", "stats", "--json")
+        self.assertEqual((status, json.loads(output)['contacts']), (0, 4))
+        self.assertEqual(len(PhoneBook.load_snapshot(self.snapshot)), 4)
+
+    def test_read_only_command_creates_no_log(self):
+        self.run_cli("--contacts", "data.csv", "stats")
+        shutdown_logging()  # Writes out the import's records
+        log_file = os.path.join(self.tmpdir.name, "log")
+        self.assertTrue(os.path.exists(log_file))
+        os.remove(log_file)
+        # Logging is configured, but nothing is opened or started until a record is logged
+        status, output, _ = self.run_cli("stats")
+        self.assertEqual((status, output.splitlines()[0]), (0, "Contacts: 4"))
+        self.assertFalse(os.path.exists(log_file))
+        self.assertNotIn("LogWriter", [thread.name for thread in threading.enumerate()])
+
+    def test_export_where(self):
+        self.run_cli("import", "data.csv")
+        export_file = os.path.join(self.tmpdir.name, "export.csv")
+        status, _, _ = self.run_cli("export", export_file, "--columns", "first_name", "phone_number",
+                                    "--where", "email~EXAMPLE.com", "--where", "area_code!=123")
+        self.assertEqual(status, 0)
+        with open(export_file, newline='') as file:
+            self.assertEqual(list(csv.reader(file)), [["first_name", "phone_number"], ["Johnson", "(999) 999-9999"], ["Lily", "(343) 343-7890"]])
+        self.assertEqual(self.run_cli("export", export_file, "--where", "age>3")[0], 1)
+
+    def test_script(self):
+        lines = ["import data.csv",
+                 "# Comments and blank lines are skipped",
+                 "",
+                 'add Ann Lee "(222) 222-2222"',
+                 "add Bob Lee '(222) 222-2222'",
+                 "frobnicate",
+                 "delete '(999) 999-9999'",
+                 "list --sort last_name,first_name --limit 2"]
+        phonebook = PhoneBook()
+        output = io.StringIO()
+        errors = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(errors):
+            failures, changed = run_script(phonebook, lines)
+        # The duplicate phone number and the unknown command fail; the other commands run
+        self.assertEqual((failures, changed), (2, True))
+        self.assertIn("Line 5:", errors.getvalue())
+        self.assertIn("Line 6: unknown command frobnicate", errors.getvalue())
+        self.assertEqual([c.first_name for c in phonebook.contacts], ["John", "Lily", "Emily", "Ann"])
+        self.assertEqual(output.getvalue().splitlines()[-2:], [str(phonebook.get_by_phone("(222) 222-2222")),
+                                                               str(phonebook.get_by_phone("(123) 456-7890"))])
+
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            self.assertEqual(run_script(PhoneBook(), ["frobnicate", "import data.csv"], stop_on_error=True), (1, False))
+
+    def test_split_words(self):
+        for line in ['add Ann Lee "(222) 222-2222" --email a@b.com', "get '(222) 222-2222'", "  # comment", "",
+                     'a"b"c', 'x "" y', "x 'it''s'", "a\\ b", "a #c", "a#b", 'search "x y"  \n']:
+            self.assertEqual(split_words(line), shlex.split(line, comments=True))
+
+    def test_where_filter(self):
+        contact = Contact("Ann", "Lee", "(212) 555-0000", "ann@example.com")
+        contact.created_at = datetime(2024, 6, 1)
+        self.assertTrue(where_filter(["last_name=Lee", "email~EXAMPLE", "area_code=212", "created_at>=2024-01-01"])(contact))
+        self.assertFalse(where_filter(["address!="])(contact))
+        self.assertFalse(where_filter(["created_at<2024-06-01"])(contact))
+        for condition in ["age=3", "last_name", "created_at~2024"]:
+            with self.assertRaises(ValueError):
+                where_filter([condition])
+
+
+    def test_startup_imports(self):
+        # A fresh interpreter, so that the imports really run; these modules are only needed by some commands
+        code = ("import sys, phone_book_CLI; print([name for name in ['csv', 'json', 'shlex', 'bulk_import', 'bulk_export', "
+                "'concurrent.futures', 'multiprocessing', 'logging.handlers'] if name in sys.modules])")
+        output = subprocess.run([sys.executable, "-c", code], cwd=PACKAGE, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+    def test_profile_startup(self):
+        result = subprocess.run([sys.executable, os.path.join(PACKAGE, "phone_book_CLI.py"), "--profile-startup",
+                                 "--log-file", os.path.join(self.tmpdir.name, "log"), "import", os.path.join(PACKAGE, "data.csv")],
+                                capture_output=True, text=True)
+        # The command runs as usual, and the imports are reported on stderr, slowest first
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("4 accepted", result.stdout)
+        report = result.stderr.splitlines()
+        self.assertTrue(report[1].startswith("Startup: "))
+        times = [float(line.split()[0]) for line in report[3:]]
+        self.assertEqual(times, sorted(times, reverse=True))
+        self.assertIn("phone_book", [line.split()[-1] for line in report[3:]])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
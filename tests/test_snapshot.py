@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from phone_book import PhoneBook
+from snapshot import HEADER, SnapshotError, SnapshotPhoneIndex, write_snapshot
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "phonebook.snap")
+        self.phonebook = PhoneBook()
+        self.phonebook.import_contacts("data.csv")
+        self.phonebook.add_contact("Zoë", "Ng", "(000) 123-4567 ext 9", None, "1 Rue d'Été")
+        self.phonebook.save_snapshot(self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        loaded = PhoneBook.load_snapshot(self.path)
+        self.assertEqual([str(c) for c in loaded.contacts], [str(c) for c in self.phonebook.contacts])
+        self.assertEqual(loaded.get_by_phone("(000) 123-4567 ext 9").address, "1 Rue d'Été")
+        self.assertEqual(len(loaded.search_contact("smith")), 2)
+        loaded._records.close()
+
+    def test_changes_on_top_of_snapshot(self):
+        loaded = PhoneBook.load_snapshot(self.path)
+        contact = loaded.get_by_phone("(999) 999-9999")
+        loaded.update_contact(contact, first_name="Tommy")
+        loaded.delete_contact(loaded.get_by_phone("(123) 456-7890"))
+        loaded.add_contact("Ann", "Lee", "(222) 222-2222")
+        self.assertEqual([c.first_name for c in loaded.contacts], ["Tommy", "Lily", "Emily", "Zoë", "Ann"])
+        # Saving the changes over the open snapshot replaces it
+        loaded.save_snapshot(self.path)
+        reloaded = PhoneBook.load_snapshot(self.path)
+        self.assertEqual([c.first_name for c in reloaded.contacts], ["Tommy", "Lily", "Emily", "Zoë", "Ann"])
+        reloaded.delete_all_contacts()
+        self.assertEqual(len(reloaded), 0)
+        loaded._records.close()
+
+    def test_phone_index_in_snapshot(self):
+        loaded = PhoneBook.load_snapshot(self.path)
+        self.assertEqual(loaded.get_by_phone("(999) 999-9999").first_name, "Johnson")
+        self.assertIsNone(loaded.get_by_phone("(999) 999-9998"))
+        # Lookups bisect the stored index; the other indexes wait for their own first use
+        self.assertIsInstance(loaded._phone_index, SnapshotPhoneIndex)
+        self.assertIsNone(loaded._name_grams)
+        self.assertEqual(loaded._time_indexes, {})
+        contact = loaded.get_by_phone("(999) 999-9999")
+        loaded.update_contact(contact, phone_number="(111) 111-1111")
+        self.assertIsNone(loaded.get_by_phone("(999) 999-9999"))
+        self.assertEqual(loaded.get_by_phone("(111) 111-1111").first_name, "Johnson")
+        loaded.delete_contact(loaded.get_by_phone("(000) 123-4567 ext 9"))
+        self.assertIsNone(loaded.get_by_phone("(000) 123-4567 ext 9"))
+        loaded.add_contact("Ann", "Lee", "(999) 999-9999")
+        self.assertEqual(loaded.get_by_phone("(999) 999-9999").first_name, "Ann")
+        with self.assertRaises(ValueError):
+            loaded.add_contact("Bob", "Lee", "(111) 111-1111")
+        loaded._records.close()
+
+    def test_version_1_snapshot(self):
+        # Version 1 files end after the heap and have no phone index; lookups then build one from the records
+        with open(self.path, "rb") as file:
+            data = bytearray(file.read())
+        magic, version, record_size, count, heap_offset, heap_size, *checksums, sequence, _, _ = HEADER.unpack_from(data)
+        HEADER.pack_into(data, 0, magic, 1, record_size, count, heap_offset, heap_size, *checksums, sequence, 0, 0)
+        with open(self.path, "wb") as file:
+            file.write(data[:heap_offset + heap_size])
+        loaded = PhoneBook.load_snapshot(self.path)
+        self.assertEqual(loaded.get_by_phone("(000) 123-4567 ext 9").address, "1 Rue d'Été")
+        self.assertIsInstance(loaded._phone_index, dict)
+        loaded._records.close()
+
+    def test_corrupt_snapshot(self):
+        with open(self.path, "r+b") as file:
+            file.seek(-1, os.SEEK_END)
+            file.write(b"#")
+        with self.assertRaises(SnapshotError):
+            PhoneBook.load_snapshot(self.path)
+        PhoneBook.load_snapshot(self.path, verify=False)._records.close()
+        with open(self.path, "r+b") as file:
+            file.truncate(100)
+        with self.assertRaises(SnapshotError):
+            PhoneBook.load_snapshot(self.path, verify=False)
+
+    def test_failed_write_keeps_old_snapshot(self):
+        contacts = self.phonebook.list_contacts()
+        with self.assertRaises(ValueError):
+            write_snapshot(contacts, len(contacts) + 1, self.path)
+        # The partial file is removed, and the previous snapshot is untouched
+        self.assertEqual(os.listdir(self.tmpdir.name), ["phonebook.snap"])
+        loaded = PhoneBook.load_snapshot(self.path)
+        self.assertEqual(len(loaded), len(contacts))
+        loaded._records.close()
+
+if __name__ == "__main__":
+    unittest.main()
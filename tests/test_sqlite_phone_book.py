@@ -0,0 +1,88 @@
+import datetime
+import os
+import tempfile
+import unittest
+from phone_book import PhoneBook
+from sqlite_phone_book import SQLitePhoneBook
+
+class TestSQLitePhoneBook(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmpdir.name, "phonebook.db")
+        self.phonebook = SQLitePhoneBook(self.database)
+        self.phonebook.import_contacts("data.csv")
+        self.reference = PhoneBook()
+        self.reference.import_contacts("data.csv")
+
+    def tearDown(self):
+        self.phonebook.close()
+        self.tmpdir.cleanup()
+
+    def assertSameContacts(self, actual, expected):
+        self.assertEqual([str(c) for c in actual], [str(c) for c in expected])
+
+    def test_matches_in_memory_phone_book(self):
+        self.assertEqual(len(self.phonebook), 4)
+        for keyword in ["", "jo", "SMITH", "(999", "Tom"]:
+            self.assertSameContacts(self.phonebook.search_contact(keyword), self.reference.search_contact(keyword))
+        for key in ["first_name", "last_name", "created_at"]:
+            expected = sorted(self.phonebook.contacts, key=lambda c: getattr(c, key), reverse=True)
+            self.assertSameContacts(self.phonebook.sort_contacts(key, True), expected)
+        self.assertSameContacts(self.phonebook.sort_contacts(("last_name", "first_name")), self.reference.sort_contacts(("last_name", "first_name")))
+        self.assertSameContacts(self.phonebook.iter_sorted_contacts("last_name", True), self.reference.iter_sorted_contacts("last_name", True))
+        expected = self.reference.group_contacts_by_initial_letter("last_name")
+        actual = self.phonebook.group_contacts_by_initial_letter("last_name")
+        self.assertEqual(list(actual), list(expected))
+        self.assertEqual(list(self.phonebook.group_contacts_by_area_code()), list(self.reference.group_contacts_by_area_code()))
+        self.assertEqual(self.phonebook.count_contacts_by_area_code(), self.reference.count_contacts_by_area_code())
+        self.assertEqual(self.phonebook.count_contacts_by_area_code("555"), 1)
+        self.assertEqual(self.phonebook.count_contacts_by_initial_letter("email"), self.reference.count_contacts_by_initial_letter("email"))
+        self.assertSameContacts(self.phonebook.get_contacts_by_initial_letter("first_name", "j"), self.reference.get_contacts_by_initial_letter("first_name", "J"))
+        self.assertSameContacts(self.phonebook.get_contacts_by_area_code("999"), self.reference.get_contacts_by_area_code("999"))
+        now = datetime.datetime.now()
+        hour = datetime.timedelta(hours=1)
+        self.assertEqual(len(self.phonebook.search_contact_by_created_time(now - hour, now + hour)), 4)
+        self.assertEqual(len(self.phonebook.search_contact_by_updated_time(now + hour, now + 2 * hour)), 0)
+
+    def test_pagination(self):
+        self.assertSameContacts(self.phonebook.list_contacts(offset=1, limit=2), self.reference.list_contacts(offset=1, limit=2))
+        self.assertSameContacts(self.phonebook.iter_contacts(), self.reference.iter_contacts())
+        self.assertSameContacts(self.phonebook.search_contact("o", offset=1), self.reference.search_contact("o", offset=1))
+        self.assertSameContacts(self.phonebook.iter_search_contact("SMITH"), self.reference.iter_search_contact("SMITH"))
+        now = datetime.datetime.now()
+        hour = datetime.timedelta(hours=1)
+        self.assertEqual(len(self.phonebook.search_contact_by_created_time(now - hour, now + hour, offset=1, limit=2)), 2)
+        self.assertEqual(len(list(self.phonebook.iter_search_contact_by_updated_time(now - hour, now + hour))), 4)
+
+    def test_update_and_delete(self):
+        contact = self.phonebook.get_by_phone("(999) 999-9999")
+        self.phonebook.update_contact(contact, first_name="Tommy", phone_number="(111) 111-1111")
+        self.assertIsNone(self.phonebook.get_by_phone("(999) 999-9999"))
+        self.assertEqual(self.phonebook.get_by_phone("(111) 111-1111").first_name, "Tommy")
+        with self.assertRaises(ValueError):
+            self.phonebook.add_contact("Jane", "Doe", "(123) 456-7890")
+        self.phonebook.delete_contact(contact)
+        with self.assertRaises(ValueError):
+            self.phonebook.delete_contact(contact)
+        self.assertEqual(len(self.phonebook), 3)
+        self.phonebook.delete_all_contacts()
+        self.assertEqual(self.phonebook.contacts, [])
+
+    def test_contacts_persist(self):
+        self.phonebook.close()
+        self.phonebook = SQLitePhoneBook(self.database)
+        self.assertSameContacts(self.phonebook.contacts, self.reference.contacts)
+        summary = self.phonebook.export_contacts(os.path.join(self.tmpdir.name, "export.csv"))
+        self.assertEqual(summary.rows, 4)
+
+    def test_snapshots(self):
+        # Saving exports the table; the snapshot opens as an in-memory phone book, never as a database
+        snapshot_file = os.path.join(self.tmpdir.name, "contacts.snap")
+        self.phonebook.save_snapshot(snapshot_file)
+        self.assertSameContacts(PhoneBook.load_snapshot(snapshot_file).contacts, self.reference.contacts)
+        self.assertEqual(len(self.phonebook), 4)
+        with self.assertRaises(NotImplementedError):
+            SQLitePhoneBook.load_snapshot(snapshot_file)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+import unittest
+from datetime import datetime
+from phone_book import PhoneBook
+from thread_safe_phone_book import ReadWriteLock, ThreadSafePhoneBook
+
+INITIAL_CONTACTS = 500
+NAMES = ["Ann", "Bob", "Chen", "Dana", "Eli", "Fatima", "Gus", "Hana"]
+
+
+class TestReadWriteLock(unittest.TestCase):
+    def test_readers_share_writers_wait(self):
+        lock = ReadWriteLock()
+        events = []
+        lock.acquire_read()
+        other_reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append('read'), lock.release_read()))
+        other_reader.start()
+        other_reader.join(5)
+        self.assertEqual(events, ['read'])
+        writer = threading.Thread(target=lambda: (lock.acquire_write(), events.append('write'), lock.release_write()))
+        writer.start()
+        time.sleep(0.05)
+        # A waiting writer keeps new readers out, so reads cannot starve it
+        late_reader = threading.Thread(target=lambda: (lock.acquire_read(), events.append('late read'), lock.release_read()))
+        late_reader.start()
+        time.sleep(0.05)
+        self.assertEqual(events, ['read'])
+        lock.release_read()
+        writer.join(5)
+        late_reader.join(5)
+        self.assertEqual(events, ['read', 'write', 'late read'])
+
+    def test_reentrant(self):
+        lock = ReadWriteLock()
+        with lock.writing():
+            with lock.writing(), lock.reading():
+                self.assertTrue(lock.held())
+            self.assertTrue(lock.held())
+        self.assertFalse(lock.held())
+        with lock.reading():
+            with lock.reading():
+                pass
+            with self.assertRaises(RuntimeError):
+                lock.acquire_write()
+        # Released completely: another thread can write
+        thread = threading.Thread(target=lambda: lock.writing().__enter__())
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+
+class TestThreadSafePhoneBook(unittest.TestCase):
+    def setUp(self):
+        self.phonebook = ThreadSafePhoneBook()
+        for i in range(INITIAL_CONTACTS):
+            self.phonebook.add_contact(NAMES[i % len(NAMES)], f"Base{i}", "(555) %03d-%04d" % (i // 100, i))
+
+    def test_snapshot_iteration(self):
+        results = self.phonebook.iter_search_contact("Base1")
+        self.phonebook.delete_all_contacts()
+        # The results were collected when the iterator was made
+        self.assertEqual(len(list(results)), 111)
+        self.assertEqual(self.phonebook.search_contact("Base1"), [])
+
+    def test_concurrent_readers_and_writers(self):
+        failures = []
+        stop = threading.Event()
+        writer_counts = []
+
+        def check(condition, message):
+            if not condition:
+                failures.append(message)
+
+        def reader(seed):
+            rng = random.Random(seed)
+            try:
+                while not stop.is_set():
+                    keyword = rng.choice(NAMES + ["Base2", "Writer", "(555)"])
+                    results = self.phonebook.search_contact(keyword)
+                    check(all(keyword in c.first_name or keyword in c.last_name or keyword in c.phone_number for c in results),
+                          f"search {keyword} returned a non-matching contact")
+                    with self.phonebook.lock.reading():
+                        # Several calls under one read lock see the same phone book
+                        contacts = self.phonebook.list_contacts()
+                        check(len(contacts) == len(self.phonebook), "list_contacts and len disagree")
+                        check(len({c.phone_number for c in contacts}) == len(contacts), "duplicate phone numbers listed")
+                        check(sum(self.phonebook.count_contacts_by_area_code().values()) == len(contacts), "area code counts disagree")
+                        check(len(self.phonebook.sort_contacts('last_name')) == len(contacts), "sort lost contacts")
+                    contact = rng.choice(contacts)
+                    found = self.phonebook.get_by_phone(contact.phone_number)
+                    check(found is None or found.phone_number == contact.phone_number, "lookup returned another contact")
+                    self.phonebook.search_contact_by_updated_time(datetime(2000, 1, 1), datetime(2100, 1, 1), limit=5)
+            except Exception as error:
+                failures.append(repr(error))
+
+        def writer(number):
+            added = deleted = 0
+            try:
+                for i in range(150):
+                    contact = self.phonebook.add_contact("Writer", f"W{number}x{i}", "(%03d) 000-%04d" % (600 + number, i))
+                    added += 1
+                    self.phonebook.update_contact(contact, last_name=f"Updated{number}x{i}")
+                    if i % 3 == 0:
+                        self.phonebook.delete_contact(contact)
+                        deleted += 1
+            except Exception as error:
+                failures.append(repr(error))
+            writer_counts.append(added - deleted)
+
+        readers = [threading.Thread(target=reader, args=(seed,)) for seed in range(4)]
+        writers = [threading.Thread(target=writer, args=(number,)) for number in range(2)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join(60)
+        stop.set()
+        for thread in readers:
+            thread.join(60)
+        self.assertEqual(failures, [])
+        self.assertEqual(len(self.phonebook), INITIAL_CONTACTS + sum(writer_counts))
+        # Every index agrees with a phone book built from the final contacts
+        reference = PhoneBook()
+        for contact in self.phonebook.contacts:
+            reference.add_contact(contact.first_name, contact.last_name, contact.phone_number)
+            self.assertIs(self.phonebook.get_by_phone(contact.phone_number), contact)
+        for keyword in ["Writer", "Updated1", "Base4"]:
+            self.assertEqual([c.phone_number for c in self.phonebook.search_contact(keyword)],
+                             [c.phone_number for c in reference.search_contact(keyword)])
+        self.assertEqual([c.last_name for c in self.phonebook.sort_contacts('last_name')],
+                         [c.last_name for c in reference.sort_contacts('last_name')])
+
+
+if __name__ == "__main__":
+    unittest.main()
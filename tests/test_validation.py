@@ -0,0 +1,58 @@
+import unittest
+from contact import Contact
+from validation import (is_valid_phone, is_valid_email, contact_error, update_error, validate_many,
+                        FIRST_NAME_REQUIRED, LAST_NAME_REQUIRED, PHONE_REQUIRED, INVALID_EMAIL, INVALID_PHONE)
+
+
+class TestValidation(unittest.TestCase):
+
+    def test_phone_format(self):
+        self.assertTrue(is_valid_phone("(123) 456-7890"))
+        self.assertTrue(is_valid_phone("(123) 456-7890 ext 12"))
+        for phone_number in ["123-456-7890", "(123)456-7890", "(12a) 456-7890", "(123) 456-789", " (123) 456-7890"]:
+            self.assertFalse(is_valid_phone(phone_number), phone_number)
+
+    def test_email_format(self):
+        self.assertTrue(is_valid_email("john.doe@example.com"))
+        for email in ["john.doe@com", "@example.com", "john@.", "john@example.", "john@@example.com"]:
+            self.assertFalse(is_valid_email(email), email)
+
+    def test_contact_error_order(self):
+        self.assertIsNone(contact_error("John", "Doe", "(123) 456-7890", "john@example.com"))
+        self.assertIsNone(contact_error("John", "Doe", "(123) 456-7890"))
+        self.assertEqual(contact_error("", "", ""), FIRST_NAME_REQUIRED)
+        self.assertEqual(contact_error("John", None, ""), LAST_NAME_REQUIRED)
+        self.assertEqual(contact_error("John", "Doe", ""), PHONE_REQUIRED)
+        self.assertEqual(contact_error("John", "Doe", "bad", "bad"), INVALID_EMAIL)
+        self.assertEqual(contact_error("John", "Doe", "bad", "john@example.com"), INVALID_PHONE)
+
+    def test_update_error_checks_only_given_fields(self):
+        self.assertIsNone(update_error())
+        self.assertIsNone(update_error(phone_number="(123) 456-7890", email="john@example.com"))
+        self.assertEqual(update_error(phone_number="bad", email="bad"), INVALID_PHONE)
+        self.assertEqual(update_error(email="bad"), INVALID_EMAIL)
+
+    def test_validate_many_matches_contact_error(self):
+        rows = [
+            ("John", "Doe", "(123) 456-7890", "john@example.com", "1 Elm Street"),
+            ("", "Doe", "(123) 456-7890", None, None),
+            ("John", "", "(123) 456-7890", None, None),
+            ("John", "Doe", None, None, None),
+            ("John", "Doe", "(123) 456-7890", "john@com", None),
+            ("John", "Doe", "123-456-7890", "", None),
+        ]
+        self.assertEqual(validate_many(rows), [contact_error(*row[:4]) for row in rows])
+        self.assertEqual(validate_many([]), [])
+
+    def test_contact_raises_validation_messages(self):
+        with self.assertRaisesRegex(ValueError, r"format \(###\)"):
+            Contact("John", "Doe", "(123) 456-789 ext. 12")
+        contact = Contact("John", "Doe", "(123) 456-7890")
+        self.assertEqual(contact.created_at, contact.updated_at)
+        with self.assertRaisesRegex(ValueError, INVALID_EMAIL):
+            contact.update_contact(first_name="Johnny", email="johnny@")
+        self.assertEqual(contact.first_name, "John")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from benchmarks.generate import ContactGenerator
+from phone_book import PhoneBook
+from workload import LatencyHistogram, TraceRecorder, read_trace, replay
+
+
+class TestTraceRecorder(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.trace_file = os.path.join(self.tmpdir.name, "trace.jsonl")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def record_session(self):
+        with TraceRecorder(PhoneBook(), self.trace_file) as phonebook:
+            phonebook.bulk_import_contacts("data.csv")
+            phonebook.add_contact("Ann", "Lee", "(222) 222-2222", address="1 Main St")
+            phonebook.search_contact("Smith", limit=1)
+            contact = phonebook.get_by_phone("(999) 999-9999")
+            phonebook.update_contact(contact, first_name="Tommy", phone_number="(111) 111-1111")
+            phonebook.delete_contact(phonebook.get_by_phone("(123) 456-7890"))
+            with self.assertRaises(ValueError):
+                phonebook.add_contact("Bob", "Lee", "(222) 222-2222")
+            phonebook.search_contact_by_created_time(datetime(2000, 1, 1), datetime(2100, 1, 1))
+            phonebook.sort_contacts(('last_name', 'first_name'))
+            phonebook.group_contacts_by_area_code()
+            # Attributes that are not recorded operations are the phone book's own
+            self.assertEqual(len(phonebook), 4)
+            self.assertEqual(phonebook.recorded, 11)
+            return [str(c) for c in phonebook.contacts]
+
+    def test_trace_entries(self):
+        self.record_session()
+        entries = list(read_trace(self.trace_file))
+        self.assertEqual([entry['op'] for entry in entries],
+                         ['bulk_import_contacts', 'add_contact', 'search_contact', 'get_by_phone', 'update_contact',
+                          'get_by_phone', 'delete_contact', 'add_contact', 'search_contact_by_created_time',
+                          'sort_contacts', 'group_contacts_by_area_code'])
+        self.assertEqual(entries[1], {**entries[1], 'first_name': "Ann", 'phone_number': "(222) 222-2222", 'address': "1 Main St"})
+        self.assertEqual((entries[2]['keyword'], entries[2]['limit']), ("Smith", 1))
+        self.assertEqual(entries[9]['key'], ['last_name', 'first_name'])
+
+    def test_replay_reproduces_the_phone_book(self):
+        expected = self.record_session()
+        entries = list(read_trace(self.trace_file))
+        update = next(entry for entry in entries if entry['op'] == 'update_contact')
+        self.assertEqual(update['phone'], "(999) 999-9999")
+        self.assertEqual((update['first_name'], update['phone_number']), ("Tommy", "(111) 111-1111"))
+        self.assertEqual(entries[8]['start_time'], "2000-01-01T00:00:00")
+        self.assertTrue(all(entry['elapsed'] >= 0 and entry['t'] >= 0 for entry in entries))
+        self.assertIn('error', entries[7])
+
+        phonebook = PhoneBook()
+        report = replay(phonebook, entries)
+        self.assertEqual(report.calls, len(entries))
+        self.assertEqual(report.errors['add_contact'], 1)
+        self.assertEqual(report.histograms['get_by_phone'].count, 2)
+        # Timestamps differ from the recording; everything else is the same
+        self.assertEqual([str(c) for c in phonebook.contacts], expected)
+
+    def test_recorded_pacing(self):
+        entries = [{'op': 'get_by_phone', 'phone_number': "(123) 456-7890", 't': t} for t in (0.0, 0.1, 0.2)]
+        start = time.perf_counter()
+        replay(PhoneBook(), entries, pacing='recorded', speed=2.0)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+        with self.assertRaises(ValueError):
+            replay(PhoneBook(), entries, pacing='slow')
+
+    def test_threaded_replay_of_generated_trace(self):
+        generator = ContactGenerator(seed=3)
+        csv_file = os.path.join(self.tmpdir.name, "contacts.csv")
+        generator.write_csv(csv_file, 2000)
+        generator.write_trace(self.trace_file, 300, mix={'search_contact': 0.5, 'get_by_phone': 0.5})
+        phonebook = PhoneBook()
+        phonebook.bulk_import_contacts(csv_file)
+        phonebook.search_contact("abc")  # Builds the search indexes before the threads share them
+        report = replay(phonebook, read_trace(self.trace_file), threads=4)
+        self.assertEqual(report.calls, 300)
+        self.assertEqual(sum(report.errors.values()), 0)
+        self.assertEqual(set(report.histograms), {'search_contact', 'get_by_phone'})
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_a_bucket(self):
+        histogram = LatencyHistogram()
+        for microseconds in range(1, 1001):
+            histogram.add(microseconds / 1e6)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.mean, 500.5e-6)
+        for fraction in (0.5, 0.9, 0.99):
+            exact = fraction * 1000e-6
+            self.assertGreaterEqual(histogram.percentile(fraction), exact)
+            self.assertLessEqual(histogram.percentile(fraction), exact * 2 ** (1 / 8) + 1e-6)
+        self.assertEqual(histogram.percentile(1.0), 1000e-6)
+        self.assertEqual(sum(count for _, count in histogram.rows()), 1000)
+        self.assertEqual(LatencyHistogram().percentile(0.5), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+# This file provides a PhoneBook that can be shared between threads, e.g. the worker threads of a server.
+# Searches, lookups, listings and exports run concurrently under a shared lock; changes take it exclusively.
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from phone_book import PhoneBook
+
+
+class ReadWriteLock:
+    '''
+        Lock held by any number of readers at once, or by one writer.
+        Writers are preferred: once a writer waits, new readers wait behind it, so a steady stream of reads cannot
+        starve changes. The lock is reentrant: a thread holding it may take it again for reading, and the writer
+        may take it again for writing. A reader cannot take it for writing, which could deadlock with another reader.
+    '''
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0  # Threads holding the lock for reading
+        self._writer = None  # Identifier of the thread holding the lock for writing
+        self._writes = 0  # Nested write acquisitions of the writer
+        self._writers_waiting = 0
+        self._local = threading.local()  # Nested read acquisitions of each thread, in .reads
+
+    def held(self):
+        '''
+            Return True if the current thread holds the lock, for reading or writing.
+        '''
+        return getattr(self._local, 'reads', 0) > 0 or self._writer == threading.get_ident()
+
+    def acquire_read(self):
+        local = self._local
+        reads = getattr(local, 'reads', 0)
+        if reads == 0 and self._writer != threading.get_ident():
+            with self._condition:
+                while self._writer is not None or self._writers_waiting:
+                    self._condition.wait()
+                self._readers += 1
+        local.reads = reads + 1
+
+    def release_read(self):
+        local = self._local
+        local.reads -= 1
+        if local.reads == 0 and self._writer != threading.get_ident():
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    def acquire_write(self):
+        '''
+            Raise a RuntimeError if the current thread holds the lock for reading only.
+        '''
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writes += 1
+            return
+        if getattr(self._local, 'reads', 0):
+            raise RuntimeError("Cannot take a read lock for writing")
+        with self._condition:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+            self._writes = 1
+
+    def release_write(self):
+        self._writes -= 1
+        if self._writes == 0:
+            with self._condition:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def reading(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def writing(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def _reading(method):
+    # Run the method under the read lock
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.lock.reading():
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def _writing(method):
+    # Run the method under the write lock
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.lock.writing():
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def _snapshot(method):
+    # Run an iter_ method under the read lock. Called from outside the lock, its results are collected before the lock
+    # is released, so the iterator is a consistent snapshot that later changes do not affect; called by a method that
+    # already holds the lock, e.g. search_contact reading one page, it stays lazy.
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        if self.lock.held():
+            return method(self, *args, **kwargs)
+        with self.lock.reading():
+            return iter(list(method(self, *args, **kwargs)))
+    return locked
+
+
+class ThreadSafePhoneBook(PhoneBook):
+    '''
+        PhoneBook whose methods may be called from several threads at once.
+        Reads (lookups, searches, listings, sorts, groupings, exports) share a ReadWriteLock, so they run concurrently
+        and each sees the phone book as it was at one point in time; changes (adds, imports, updates, deletes,
+        snapshots) hold it exclusively. The iter_ methods return a snapshot of their results rather than reading
+        the phone book lazily, so iterating them never sees a half-applied change.
+        The lock is available as .lock, to group several calls into one consistent read or one atomic change:
+
+            with phonebook.lock.writing():
+                if phonebook.get_by_phone(phone_number) is None:
+                    phonebook.add_contact(first_name, last_name, phone_number)
+
+        Threads share one interpreter lock, so concurrent reads interleave rather than run in parallel,
+        except while a read waits on file I/O such as an export.
+    '''
+    def __init__(self, store=None, search_index=True):
+        super().__init__(store, search_index)
+        self.lock = ReadWriteLock()
+        # Indexes are built by the first read that needs them, which may run alongside other reads:
+        # building, and merging a sort view's buffered changes, is serialised by this lock
+        self._build_lock = threading.Lock()
+
+    # The index accessors check for a built index without the lock, which is safe because an index is only
+    # published by a single assignment once complete, and build it under the lock, checking again there
+    def _phones(self):
+        if self._phone_index is None:
+            with self._build_lock:
+                return super()._phones()
+        return self._phone_index
+
+    def _search_indexes(self):
+        if self._name_grams is None and self.search_index:
+            with self._build_lock:
+                return super()._search_indexes()
+        return super()._search_indexes()
+
+    def _time_index(self, attribute):
+        if attribute not in self._time_indexes:
+            with self._build_lock:
+                return super()._time_index(attribute)
+        return super()._time_index(attribute)
+
+    def _group_index(self, name, get_group):
+        if name not in self._group_indexes:
+            with self._build_lock:
+                return super()._group_index(name, get_group)
+        return super()._group_index(name, get_group)
+
+    def _sort_view(self, key):
+        with self._build_lock:
+            view = super()._sort_view(key)
+            view._merge()  # Apply the changes buffered since the last sort before readers iterate the view together
+        return view
+
+    __len__ = _reading(PhoneBook.__len__)
+
+    add_contact = _writing(PhoneBook.add_contact)
+    import_contacts = _writing(PhoneBook.import_contacts)
+    bulk_import_contacts = _writing(PhoneBook.bulk_import_contacts)
+    update_contact = _writing(PhoneBook.update_contact)
+    delete_contact = _writing(PhoneBook.delete_contact)
+    delete_all_contacts = _writing(PhoneBook.delete_all_contacts)
+    # Writing a snapshot only reads the contacts, but saving over the loaded snapshot reopens the store
+    save_snapshot = _writing(PhoneBook.save_snapshot)
+
+    get_by_phone = _reading(PhoneBook.get_by_phone)
+    search_contact = _reading(PhoneBook.search_contact)
+    search_contact_by_updated_time = _reading(PhoneBook.search_contact_by_updated_time)
+    search_contact_by_created_time = _reading(PhoneBook.search_contact_by_created_time)
+    list_contacts = _reading(PhoneBook.list_contacts)
+    sort_contacts = _reading(PhoneBook.sort_contacts)
+    group_contacts_by_initial_letter = _reading(PhoneBook.group_contacts_by_initial_letter)
+    count_contacts_by_initial_letter = _reading(PhoneBook.count_contacts_by_initial_letter)
+    get_contacts_by_initial_letter = _reading(PhoneBook.get_contacts_by_initial_letter)
+    group_contacts_by_area_code = _reading(PhoneBook.group_contacts_by_area_code)
+    count_contacts_by_area_code = _reading(PhoneBook.count_contacts_by_area_code)
+    get_contacts_by_area_code = _reading(PhoneBook.get_contacts_by_area_code)
+    export_contacts = _reading(PhoneBook.export_contacts)
+
+    iter_contacts = _snapshot(PhoneBook.iter_contacts)
+    iter_search_contact = _snapshot(PhoneBook.iter_search_contact)
+    iter_search_contact_by_updated_time = _snapshot(PhoneBook.iter_search_contact_by_updated_time)
+    iter_search_contact_by_created_time = _snapshot(PhoneBook.iter_search_contact_by_created_time)
+    iter_sorted_contacts = _snapshot(PhoneBook.iter_sorted_contacts)
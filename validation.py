@@ -0,0 +1,88 @@
+# This file implements the validation rules for contact fields, shared by Contact and the bulk import.
+# The patterns are compiled once and their match methods bound at import, so each check is a single call.
+# Matching is anchored at the start of the value only: text after a valid prefix, such as a phone extension, is allowed.
+import re
+
+PHONE_PATTERN = re.compile(r"\(\d{3}\) \d{3}-\d{4}")
+EMAIL_PATTERN = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+FIRST_NAME_REQUIRED = "First name is required."
+LAST_NAME_REQUIRED = "Last name is required."
+PHONE_REQUIRED = "Phone number is required."
+INVALID_EMAIL = "Invalid email address"
+INVALID_PHONE = "Phone number must be in the format (###) ###-####"
+
+_phone_match = PHONE_PATTERN.match
+_email_match = EMAIL_PATTERN.match
+
+
+def is_valid_phone(phone_number):
+    '''
+        Return whether the phone number starts with the format (###) ###-####.
+    '''
+    # A compiled regex beats slicing and str.isdecimal on this fixed shape in CPython, so the regex is the fast path
+    return _phone_match(phone_number) is not None
+
+
+def is_valid_email(email):
+    '''
+        Return whether the email address starts with the shape name@domain.tld.
+    '''
+    return _email_match(email) is not None
+
+
+def contact_error(first_name, last_name, phone_number, email=None):
+    '''
+        Return the error message for the first invalid field of a new contact, or None if all are valid.
+        Fields are checked in this order: required first name, last name and phone number, email format, phone format.
+    '''
+    if not first_name:
+        return FIRST_NAME_REQUIRED
+    if not last_name:
+        return LAST_NAME_REQUIRED
+    if not phone_number:
+        return PHONE_REQUIRED
+    if email and not _email_match(email):
+        return INVALID_EMAIL
+    if not _phone_match(phone_number):
+        return INVALID_PHONE
+    return None
+
+
+def update_error(phone_number=None, email=None):
+    '''
+        Return the error message for an invalid phone number or email given to an update, or None if both are valid.
+        Fields that are not given are not checked.
+    '''
+    if phone_number and not _phone_match(phone_number):
+        return INVALID_PHONE
+    if email and not _email_match(email):
+        return INVALID_EMAIL
+    return None
+
+
+def validate_many(rows):
+    '''
+        Validate many new contacts at once.
+        Each row is a sequence starting with first name, last name, phone number and email; further fields are ignored.
+        Return a list with one entry per row: None for a valid row, else the message contact_error would return.
+    '''
+    # Same checks as contact_error, inlined so that a large batch does not pay a function call per row
+    phone_match = _phone_match
+    email_match = _email_match
+    errors = []
+    append = errors.append
+    for first_name, last_name, phone_number, email, *_ in rows:
+        if not first_name:
+            append(FIRST_NAME_REQUIRED)
+        elif not last_name:
+            append(LAST_NAME_REQUIRED)
+        elif not phone_number:
+            append(PHONE_REQUIRED)
+        elif email and not email_match(email):
+            append(INVALID_EMAIL)
+        elif not phone_match(phone_number):
+            append(INVALID_PHONE)
+        else:
+            append(None)
+    return errors
@@ -0,0 +1,340 @@
+# This file records the calls made to a PhoneBook as a trace, and replays traces against a phone book with latency
+# histograms, so that a workload seen in use can be rerun as a benchmark.
+# A trace is a JSON lines file in the format benchmarks.generate writes: one object per call, with 'op', the name of
+# the PhoneBook method, and its arguments by name. The contact passed to update_contact or delete_contact is given
+# by its phone number, under 'phone', and datetimes as ISO 8601 strings. Recorded calls also carry 't', the seconds
+# from the start of the recording to the call, 'elapsed', the seconds the call took, and 'error' if it raised.
+# Replay a trace with: python workload.py trace.jsonl [--contacts contacts.csv] [--pacing recorded] [--speed 2] [--threads 4]
+import argparse
+import inspect
+import json
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from contact import Contact
+from phone_book import PhoneBook
+from thread_safe_phone_book import ThreadSafePhoneBook
+
+logger = logging.getLogger(__name__)
+
+# PhoneBook methods a TraceRecorder records. The iter_ methods are not recorded: they return before doing their work.
+RECORDED_OPERATIONS = (
+    'add_contact', 'get_by_phone', 'import_contacts', 'bulk_import_contacts',
+    'search_contact', 'search_contact_by_created_time', 'search_contact_by_updated_time',
+    'update_contact', 'delete_contact', 'delete_all_contacts', 'list_contacts', 'sort_contacts',
+    'group_contacts_by_initial_letter', 'count_contacts_by_initial_letter', 'get_contacts_by_initial_letter',
+    'group_contacts_by_area_code', 'count_contacts_by_area_code', 'get_contacts_by_area_code',
+    'export_contacts', 'save_snapshot',
+)
+DATETIME_ARGUMENTS = ('start_time', 'end_time')
+# Arguments that cannot be written to a trace: export_contacts' contacts iterable and where function
+UNRECORDED_ARGUMENTS = ('contacts', 'where')
+BUCKETS_PER_OCTAVE = 8  # Latency histogram resolution: buckets are 2 ** (1 / 8), about 9%, wide
+PACINGS = ('max', 'recorded')
+
+
+def encode_arguments(operation, arguments):
+    '''
+        Return the trace fields of a call's arguments, given by name as inspect.BoundArguments.arguments gives them.
+        Raise a ValueError for an argument that cannot be written to a trace, other than those the trace drops.
+    '''
+    fields = {}
+    for name, value in arguments.items():
+        if name in UNRECORDED_ARGUMENTS:
+            if value is not None:
+                logger.warning("Argument %s of %s is not recorded", name, operation)
+            continue
+        if name == 'kwargs':
+            fields.update(value)  # update_contact's new attribute values
+        elif isinstance(value, Contact):
+            fields['phone'] = value.phone_number
+        elif isinstance(value, datetime):
+            fields[name] = value.isoformat()
+        elif isinstance(value, tuple):
+            fields[name] = list(value)
+        elif value is None or isinstance(value, (str, int, float, bool, list)):
+            fields[name] = value
+        else:
+            raise ValueError(f"Cannot record argument {name} of {operation}: {value!r}")
+    return fields
+
+
+class TraceRecorder:
+    '''
+        Wrapper around a PhoneBook that appends every call of RECORDED_OPERATIONS to a trace file, with its timing.
+        Every other attribute is the phone book's own. Use it in place of the phone book, and close it when done:
+
+            with TraceRecorder(PhoneBook(), "trace.jsonl") as phonebook:
+                phonebook.add_contact("John", "Doe", "(123) 456-7890")
+
+        Calls may come from several threads if the phone book allows it; their entries are written one at a time.
+    '''
+    def __init__(self, phonebook, path):
+        self.phonebook = phonebook
+        self.path = path
+        self.recorded = 0  # Calls written so far
+        self._file = open(path, 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._signatures = {}  # Operation -> signature of the phone book's method
+        self._start = time.perf_counter()
+
+    def __getattr__(self, name):
+        attribute = getattr(self.phonebook, name)
+        if name not in RECORDED_OPERATIONS:
+            return attribute
+        signature = self._signatures.get(name)
+        if signature is None:
+            signature = self._signatures[name] = inspect.signature(attribute)
+
+        def record(*args, **kwargs):
+            # Arguments are encoded before the call, so that a contact is identified by its phone number before an update
+            fields = encode_arguments(name, signature.bind(*args, **kwargs).arguments)
+            error = None
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            except ValueError as ve:
+                error = str(ve)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                entry = {'op': name, **fields, 't': round(start - self._start, 6), 'elapsed': round(elapsed, 9)}
+                if error is not None:
+                    entry['error'] = error
+                self._write(entry)
+        return record
+
+    def __len__(self):
+        # Special methods are looked up on the class, so __getattr__ does not pass this one on
+        return len(self.phonebook)
+
+    def _write(self, entry):
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self.recorded += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_trace(path):
+    '''
+        Yield the entries of a trace file one at a time.
+        Raise a ValueError if a line is not valid JSON.
+    '''
+    with open(path, encoding='utf-8') as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as ve:
+                raise ValueError(f"Invalid trace {path} at line {number}: {ve}")
+
+
+class LatencyHistogram:
+    '''
+        Latencies of one operation in logarithmic buckets, BUCKETS_PER_OCTAVE to each doubling from 1 microsecond,
+        so that any number of calls is kept in a few hundred counters and percentiles are exact to within a bucket.
+    '''
+    def __init__(self):
+        self.buckets = Counter()  # Bucket -> number of latencies in it; bucket b holds 2 ** (b / 8) to 2 ** ((b + 1) / 8) microseconds
+        self.count = 0
+        self.total = 0.0  # Seconds
+        self.max = 0.0
+
+    def add(self, seconds):
+        microseconds = seconds * 1e6
+        self.buckets[math.floor(math.log2(microseconds) * BUCKETS_PER_OCTAVE) if microseconds > 1 else 0] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @staticmethod
+    def upper_bound(bucket):
+        # Largest latency, in seconds, that falls in the bucket
+        return 2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE) / 1e6
+
+    def percentile(self, fraction):
+        '''
+            Return the latency in seconds that the fraction of the calls, e.g. 0.99, did not exceed:
+            the upper bound of the bucket holding it, but never more than the slowest call. Return 0.0 without calls.
+        '''
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.upper_bound(bucket), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def rows(self):
+        '''
+            Return (upper bound in seconds, number of calls) for each bucket from the fastest to the slowest call,
+            including the empty buckets in between.
+        '''
+        if not self.buckets:
+            return []
+        return [(self.upper_bound(bucket), self.buckets[bucket]) for bucket in range(min(self.buckets), max(self.buckets) + 1)]
+
+
+class ReplayReport:
+    '''
+        Latency histogram and error count of each operation of a replay, and its duration.
+    '''
+    def __init__(self):
+        self.histograms = {}  # Operation -> LatencyHistogram
+        self.errors = Counter()  # Operation -> calls that raised a ValueError
+        self.elapsed = 0.0  # Seconds
+        self._lock = threading.Lock()
+
+    def add(self, operation, seconds, failed=False):
+        with self._lock:
+            histogram = self.histograms.get(operation)
+            if histogram is None:
+                histogram = self.histograms[operation] = LatencyHistogram()
+            histogram.add(seconds)
+            if failed:
+                self.errors[operation] += 1
+
+    @property
+    def calls(self):
+        return sum(histogram.count for histogram in self.histograms.values())
+
+    def __str__(self):
+        lines = [f"Replayed {self.calls} calls in {self.elapsed:.2f}s ({self.calls / self.elapsed if self.elapsed else 0:.0f} calls/s)",
+                 f"{'operation':32} {'calls':>8} {'errors':>7} {'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for operation, histogram in sorted(self.histograms.items()):
+            lines.append(f"{operation:32} {histogram.count:8} {self.errors[operation]:7} {histogram.mean * 1000:9.3f} "
+                         f"{histogram.percentile(0.5) * 1000:9.3f} {histogram.percentile(0.9) * 1000:9.3f} "
+                         f"{histogram.percentile(0.99) * 1000:9.3f} {histogram.max * 1000:9.3f}")
+        return "\n".join(lines)
+
+
+def decode_call(phonebook, entry):
+    '''
+        Return the phone book method and keyword arguments that a trace entry calls.
+        Raise a ValueError if the operation is not a recorded PhoneBook operation,
+        or if the contact it updates or deletes is not in the phone book.
+    '''
+    arguments = {name: value for name, value in entry.items() if name not in ('op', 't', 'elapsed', 'error')}
+    operation = entry['op']
+    if operation not in RECORDED_OPERATIONS:
+        raise ValueError(f"Unknown trace operation {operation}")
+    if 'phone' in arguments:
+        contact = phonebook.get_by_phone(arguments.pop('phone'))
+        if contact is None:
+            raise ValueError(f"No contact to {operation}")
+        arguments['contact'] = contact
+    for name in DATETIME_ARGUMENTS:
+        if name in arguments:
+            arguments[name] = datetime.fromisoformat(arguments[name])
+    return getattr(phonebook, operation), arguments
+
+
+def replay(phonebook, entries, pacing='max', speed=1.0, threads=1):
+    '''
+        Run the calls of trace entries against the phone book and return a ReplayReport of their latencies.
+        With pacing 'max' each call starts as soon as the previous one is done; with 'recorded', calls start at their
+        recorded times, divided by speed, or as soon as possible once behind. Entries without a time start at once.
+        With threads > 1, the calls are run by that many threads, at most threads calls ahead of the slowest one,
+        so the phone book must be safe to call from several threads, e.g. a ThreadSafePhoneBook. Calls that raise a ValueError,
+        e.g. the update of a contact the trace deleted, are counted as errors of their operation.
+    '''
+    if pacing not in PACINGS:
+        raise ValueError(f"Unknown pacing {pacing}; choose from {', '.join(PACINGS)}")
+    report = ReplayReport()
+    clock = time.perf_counter
+
+    def call(entry):
+        start = clock()
+        failed = False
+        try:
+            method, arguments = decode_call(phonebook, entry)
+            method(**arguments)
+        except ValueError:
+            failed = True
+        report.add(entry['op'], clock() - start, failed)
+
+    def paced(entries):
+        # Wait for the recorded start time of each entry before handing it on
+        for entry in entries:
+            if pacing == 'recorded' and 't' in entry:
+                delay = begin + entry['t'] / speed - clock()
+                if delay > 0:
+                    time.sleep(delay)
+            yield entry
+
+    begin = clock()
+    if threads > 1:
+        # A bounded number of calls in flight, so that a long trace is not read into the executor's queue at once
+        slots = threading.BoundedSemaphore(threads * 2)
+        crashes = []  # Exceptions other than ValueError, raised again once the threads are done
+
+        def release_after(entry):
+            try:
+                call(entry)
+            except Exception as error:
+                crashes.append(error)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for entry in paced(entries):
+                if crashes:
+                    break
+                slots.acquire()
+                executor.submit(release_after, entry)
+        if crashes:
+            raise crashes[0]
+    else:
+        for entry in paced(entries):
+            call(entry)
+    report.elapsed = clock() - begin
+    logger.info("Trace replayed: %d calls in %.2fs", report.calls, report.elapsed)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python workload.py", description="Replay a trace of phone book calls and report their latencies.")
+    parser.add_argument("trace", help="JSON lines trace, recorded by TraceRecorder or written by benchmarks.generate.")
+    parser.add_argument("--contacts", help="CSV file to bulk import before the replay, e.g. the one the trace was generated for.")
+    parser.add_argument("--pacing", choices=PACINGS, default='max', help="Run calls back to back, or at their recorded times.")
+    parser.add_argument("--speed", type=float, default=1.0, help="With --pacing recorded, replay this many times faster.")
+    parser.add_argument("--threads", type=int, default=1, help="Replay with this many threads, on a ThreadSafePhoneBook.")
+    parser.add_argument("--histogram", action='store_true', help="Also print the latency histogram of each operation.")
+    args = parser.parse_args()
+
+    phonebook = ThreadSafePhoneBook() if args.threads > 1 else PhoneBook()
+    if args.contacts:
+        print(phonebook.bulk_import_contacts(args.contacts))
+    report = replay(phonebook, read_trace(args.trace), args.pacing, args.speed, args.threads)
+    print(report)
+    if args.histogram:
+        for operation, histogram in sorted(report.histograms.items()):
+            print(f"\n{operation}")
+            peak = max(count for _, count in histogram.rows())
+            for upper_bound, count in histogram.rows():
+                print(f"  <= {upper_bound * 1000:10.3f} ms {count:8} {'#' * math.ceil(40 * count / peak)}")
+
+
+if __name__ == "__main__":
+    main()